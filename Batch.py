@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from core.engine import GameEngine
+
+ERROR_PREFIXES = ("[ERR]", "Unknown command", "Ambiguous command")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a command script through the game without the interactive UI.")
+    parser.add_argument("script", help="script file, one command per line ('-' reads stdin)")
+    parser.add_argument("--config-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="directory holding nodes.json")
+    parser.add_argument("--save-dir", default="",
+                        help="save directory (default: a throwaway temp dir, never the player's save)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not echo commands")
+    parser.add_argument("--strict", action="store_true", help="exit 1 if any command reports an error")
+    args = parser.parse_args()
+
+    if args.script == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.script, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    errors = 0
+
+    def sink(line: str):
+        nonlocal errors
+        if line.startswith(ERROR_PREFIXES):
+            errors += 1
+        print(line)
+
+    with tempfile.TemporaryDirectory(prefix="tt_batch_") as tmp:
+        engine = GameEngine(args.config_dir, save_dir=args.save_dir or tmp, sink=sink)
+        engine.boot()
+
+        t0 = time.perf_counter()
+        ran = engine.router.run_script(lines, echo=not args.quiet)
+        ms = (time.perf_counter() - t0) * 1000.0
+
+    print(f"[BATCH] {ran} command(s) in {ms:.1f} ms, {errors} error(s).", file=sys.stderr)
+    if args.strict and errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
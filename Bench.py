@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from core.config import ConfigLoader
+from core.engine import GameEngine
+from core.worldgen import WorldSpec, write_world
+
+COMMANDS = [
+    "status",
+    "nodes",
+    "routes",
+    "games",
+    "hint",
+    "story",
+    "isgoal",
+    "time",
+    "vars",
+    "help",
+]
+
+
+def _summary(samples_ms):
+    if not samples_ms:
+        return {"n": 0}
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def bench_config_load(base_dir: str, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        ConfigLoader(base_dir).load()
+        times.append((time.perf_counter() - t0) * 1000.0)
+
+    tracemalloc.start()
+    cfg = ConfigLoader(base_dir).load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cfg
+
+    out = _summary(times)
+    out["retained_mb"] = round(current / 1e6, 2)
+    out["peak_mb"] = round(peak / 1e6, 2)
+    return out
+
+
+def bench_app(base_dir: str, save_dir: str, repeat: int, unlock_steps: int) -> dict:
+    output_lines = 0
+
+    def sink(line: str):
+        nonlocal output_lines
+        output_lines += 1
+
+    t0 = time.perf_counter()
+    app = GameEngine(base_dir, save_dir=save_dir, sink=sink)
+    app.boot()
+    startup_ms = (time.perf_counter() - t0) * 1000.0
+
+    per_command = {}
+    for cmd in COMMANDS:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            app.router.run(cmd)
+            times.append((time.perf_counter() - t0) * 1000.0)
+        per_command[cmd] = _summary(times)
+
+    unlock_times = []
+    travel_times = []
+    for _ in range(unlock_steps):
+        nid = app.state["current_node"]
+        ncfg = app.node_cfg(nid)
+        games = ncfg.get("games", [])
+        routes = ncfg.get("routes", [])
+        if not games or not routes:
+            break
+        app.state["solved"].pop(games[0]["id"], None)
+        t0 = time.perf_counter()
+        app.award_game(games[0]["id"])
+        unlock_times.append((time.perf_counter() - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        app.router.run(f"travel {routes[0]}")
+        travel_times.append((time.perf_counter() - t0) * 1000.0)
+
+    persist_times = []
+    for _ in range(max(1, repeat // 5)):
+        t0 = time.perf_counter()
+        app._persist()
+        persist_times.append((time.perf_counter() - t0) * 1000.0)
+    save_bytes = os.path.getsize(app.save_path) if os.path.exists(app.save_path) else 0
+
+    return {
+        "startup_ms": round(startup_ms, 3),
+        "commands": per_command,
+        "award_game": _summary(unlock_times),
+        "travel": _summary(travel_times),
+        "persist": _summary(persist_times),
+        "save_bytes": save_bytes,
+        "unlocked_nodes": len(app.state.get("unlocked_nodes", [])),
+        "output_lines": output_lines,
+    }
+
+
+def print_report(report: dict) -> None:
+    spec = report["spec"]
+    print(f"=== WORLD: {spec['nodes']} nodes, fanout {spec['fanout']}, "
+          f"{spec['dialogue']} lines, {spec['games_per_node']} games, {spec['hints_per_node']} hints/node ===")
+    print(f"nodes.json: {report['config_bytes'] / 1e6:.2f} MB")
+    cl = report["config_load"]
+    print(f"config load: median {cl['median_ms']} ms | retained {cl['retained_mb']} MB | peak {cl['peak_mb']} MB")
+
+    app = report.get("app")
+    if not app:
+        return
+    print(f"app startup: {app['startup_ms']} ms")
+    print(f"{'command':<12} {'median':>10} {'p95':>10} {'max':>10}")
+    rows = list(app["commands"].items()) + [
+        ("award_game", app["award_game"]),
+        ("travel", app["travel"]),
+        ("persist", app["persist"]),
+    ]
+    for name, s in rows:
+        if not s.get("n"):
+            continue
+        print(f"{name:<12} {s['median_ms']:>10} {s['p95_ms']:>10} {s['max_ms']:>10}")
+    print(f"save size: {app['save_bytes']} bytes | unlocked nodes: {app['unlocked_nodes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load time, memory and command latency on synthetic worlds.")
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--dialogue", type=int, default=6)
+    parser.add_argument("--games", type=int, default=1, help="games per node")
+    parser.add_argument("--hints", type=int, default=10, help="hints per node")
+    parser.add_argument("--seed", type=int, default=1970)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--unlock-steps", type=int, default=200)
+    parser.add_argument("--no-app", action="store_true", help="only benchmark config loading")
+    parser.add_argument("--json", default="", help="write the report to this path")
+    args = parser.parse_args()
+
+    spec = WorldSpec(
+        nodes=args.nodes,
+        fanout=args.fanout,
+        dialogue=args.dialogue,
+        games_per_node=args.games,
+        hints_per_node=args.hints,
+        seed=args.seed,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="tt_bench_") as tmp:
+        world_dir = os.path.join(tmp, "world")
+        save_dir = os.path.join(tmp, "save")
+        path = write_world(spec, world_dir)
+
+        report = {
+            "spec": spec.__dict__,
+            "config_bytes": os.path.getsize(path),
+            "config_load": bench_config_load(world_dir, args.repeat),
+        }
+        if not args.no_app:
+            report["app"] = bench_app(world_dir, save_dir, args.repeat, args.unlock_steps)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
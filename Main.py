@@ -1,19 +1,36 @@
+import time
+_T0 = time.perf_counter()
+
+import argparse
 import os
 import tkinter as tk
-from ui.app import TimeTerminalApp
+
+from core.startup import StartupProfiler
+
 
 def main():
-    root = tk.Tk()
-    try:
-        import tkinter.ttk as ttk
-        style = ttk.Style()
-        if "clam" in style.theme_names():
-            style.theme_use("clam")
-    except Exception:
-        pass
+    parser = argparse.ArgumentParser(description="Jack's Time Terminal")
+    parser.add_argument("--profile-startup", nargs="?", const="", default=None, metavar="FILE",
+                        help="print startup phase timings and write them as JSON (default: startup.json in the save folder)")
+    args = parser.parse_args()
+
+    prof = StartupProfiler(enabled=args.profile_startup is not None, t0=_T0, path=args.profile_startup or None)
+
+    with prof.phase("import.ui"):
+        from ui.app import TimeTerminalApp
+
+    with prof.phase("tk"):
+        root = tk.Tk()
+        try:
+            import tkinter.ttk as ttk
+            style = ttk.Style()
+            if "clam" in style.theme_names():
+                style.theme_use("clam")
+        except Exception:
+            pass
 
     base_dir = os.path.dirname(__file__)
-    app = TimeTerminalApp(root, base_dir)
+    app = TimeTerminalApp(root, base_dir, profiler=prof)
     root.mainloop()
 
 if __name__ == "__main__":
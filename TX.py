@@ -1,6 +1,7 @@
 
 
 from pathlib import Path
+import argparse
 import json
 
 PROJECT_TREE = {
@@ -83,7 +84,7 @@ def touch_stub(path: Path, overwrite: bool = False) -> None:
     else:
         path.write_text("# stub\n", encoding="utf-8")
 
-def main() -> None:
+def scaffold() -> None:
     root = Path.cwd()
 
     write_file(root / "main.py", MAIN_PY_STUB, overwrite=False)
@@ -102,5 +103,39 @@ def main() -> None:
     print(f"Root: {root}")
     print("Created: main.py, Config.json, .gitignore, core/, ui/, games/")
 
+def generate(args) -> None:
+    from core.worldgen import WorldSpec, write_world
+
+    spec = WorldSpec(
+        nodes=args.nodes,
+        fanout=args.fanout,
+        dialogue=args.dialogue,
+        games_per_node=args.games,
+        hints_per_node=args.hints,
+        seed=args.seed,
+    )
+    path = write_world(spec, args.out)
+    print(f"OK: synthetic world written ({spec.nodes} nodes, {spec.nodes * spec.hints_per_node} hints).")
+    print(f"Config: {path}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Project scaffold and synthetic world generator.")
+    sub = parser.add_subparsers(dest="mode")
+
+    world = sub.add_parser("world", help="Emit a synthetic nodes.json for scale testing.")
+    world.add_argument("--nodes", type=int, default=1000)
+    world.add_argument("--fanout", type=int, default=3)
+    world.add_argument("--dialogue", type=int, default=6)
+    world.add_argument("--games", type=int, default=1, help="games per node")
+    world.add_argument("--hints", type=int, default=10, help="hints per node")
+    world.add_argument("--seed", type=int, default=1970)
+    world.add_argument("--out", default="synthetic_world", help="output directory")
+
+    args = parser.parse_args()
+    if args.mode == "world":
+        generate(args)
+    else:
+        scaffold()
+
 if __name__ == "__main__":
     main()
@@ -1,10 +1,21 @@
 
 from __future__ import annotations
 
+import contextlib
+import difflib
+import os
 import shlex
 import time
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.history import CommandHistory
+from core.perf import PerfRecorder
+from core.trie import Trie
+
+
+# Their arguments are answers, codes or passwords: history.txt keeps only the command name.
+SECRET_COMMANDS = frozenset({"solve", "travelgod", "godskip", "selftest"})
 
 
 @dataclass(frozen=True)
@@ -29,8 +40,36 @@ class CommandRouter:
             "sove": "solve",
         }
 
-        self.history: List[str] = []
+        self.history = CommandHistory(redact=self._history_line)
+        self.perf: PerfRecorder = getattr(app, "perf", None) or PerfRecorder()
         self.cmds: Dict[str, CommandSpec] = {}
+        self._script_depth = 0
+        # alias name -> fully expanded token list; cleared on every alias edit
+        self._alias_cache: Dict[str, List[str]] = {}
+
+        # Command + alias names for prefix dispatch and Tab completion.
+        self.index = Trie(self.aliases.keys())
+        # Argument sources, kept up to date as content and vars change.
+        self.completions: Dict[str, Trie] = {
+            "nodes": Trie(fold=True),
+            "games": Trie(fold=True),
+            "vars": Trie(),
+            "solve": Trie(["colors", "chess", "code", "regex", "tictactoe", "dilemma"]),
+        }
+        self._hint_tries: Dict[str, Trie] = {}
+        self.arg_sources: Dict[str, str] = {
+            "help": "commands",
+            "man": "commands",
+            "travel": "nodes",
+            "travelgod": "nodes",
+            "play": "games",
+            "solvelose": "games",
+            "solve": "solve",
+            "hint": "hints",
+            "get": "vars",
+            "set": "vars",
+            "del": "vars",
+        }
 
         self._register_builtin()
         self._register_app_hooks()
@@ -38,6 +77,7 @@ class CommandRouter:
 
     def _register(self, spec: CommandSpec) -> None:
         self.cmds[spec.name] = spec
+        self.index.add(spec.name)
 
     def _register_builtin(self) -> None:
         self._register(CommandSpec(
@@ -79,9 +119,30 @@ class CommandRouter:
             name="sleep",
             usage="sleep <seconds>",
             short="Pause briefly (dramatic effect).",
-            long="Caps at 5 seconds.",
+            long="Caps at 5 seconds. Runs as a job, so input stays live.",
             fn=self._sleep
         ))
+        self._register(CommandSpec(
+            name="jobs",
+            usage="jobs",
+            short="List running background jobs.",
+            long="Long commands (sleep, scans) run as jobs so input never blocks.",
+            fn=self._jobs
+        ))
+        self._register(CommandSpec(
+            name="fg",
+            usage="fg [job_id]",
+            short="Finish a job now, skipping its waits.",
+            long="Without an id, the newest job.\nExample:\n  fg 2",
+            fn=self._fg
+        ))
+        self._register(CommandSpec(
+            name="kill",
+            usage="kill <job_id|all>",
+            short="Cancel a running job.",
+            long="Examples:\n  kill 2\n  kill all",
+            fn=self._kill
+        ))
         self._register(CommandSpec(
             name="echo",
             usage="echo <text...>",
@@ -124,6 +185,24 @@ class CommandRouter:
             long="Example:\n  del key",
             fn=self._del
         ))
+        self._register(CommandSpec(
+            name="source",
+            usage="source [-q] <file>",
+            short="Run a script of commands (one per line).",
+            long="Blank lines and lines starting with # are skipped.\n"
+                 "Saving is deferred to one persist after the last line.\n"
+                 "-q hides the '> command' echo.\n"
+                 "Example:\n  source walkthrough.txt",
+            fn=self._source
+        ))
+        self._register(CommandSpec(
+            name="perf",
+            usage="perf [on|off|reset|dump [file]]",
+            short="Per-command latency histograms (p50/p95/p99).",
+            long="Records dispatch, handler, persist and UI-update times while on.\n"
+                 "Examples:\n  perf on\n  perf\n  perf dump perf.json",
+            fn=self._perf
+        ))
         self._register(CommandSpec(
             name="quit",
             usage="quit",
@@ -150,6 +229,9 @@ class CommandRouter:
             ("games",    "games",                  "List games in current node.",               lambda a, x: a.cmd_games()),
             ("play",     "play <game_id>",         "Mount a game (if allowed in node).",        lambda a, x: a.cmd_play(x)),
             ("story",    "story | story all",      "Advance dialogue.",                         lambda a, x: a.cmd_story(x)),
+            ("skip",     "skip | skip all",        "Finish the typed line (all: the whole queue).", lambda a, x: a.cmd_skip(x)),
+            ("mute",     "mute [on|off]",          "Mute or unmute narration speech.",          lambda a, x: a.cmd_mute(x)),
+            ("voicecache","voicecache [build [all]|clear]", "Pre-rendered narration audio.",      lambda a, x: a.cmd_voicecache(x)),
             ("hint",     "hint | hint h1",         "Use a hint (cooldown + score cost).",       lambda a, x: a.cmd_hint(x)),
             ("showcode", "showcode <A|B|C>",     "Show a code snippet (N3).",                 lambda a, x: a.cmd_showcode(x)),
             ("solve",    "solve ...",              "Solve puzzles.",                            lambda a, x: a.cmd_solve(x)),
@@ -178,7 +260,13 @@ class CommandRouter:
         if not raw:
             return
 
-        self.history.append(raw)
+        perf = self.perf
+        # Sampled once: `perf on` enables recording mid-command, with no start time taken.
+        timed = perf.enabled
+        t0 = time.perf_counter() if timed else 0.0
+
+        if not self._script_depth:
+            self.history.append(raw)
 
         try:
             parts = shlex.split(raw)
@@ -189,10 +277,20 @@ class CommandRouter:
         cmd = parts[0]
         args = parts[1:]
 
+        if cmd not in self.cmds and cmd not in self.aliases:
+            cmd = self.index.unique(cmd) or cmd
+
         if cmd in self.aliases:
-            expanded = self.aliases[cmd]
-            new_raw = (expanded + " " + " ".join(args)).strip()
-            return self.run(new_raw)
+            expanded = self.expand_alias(cmd)
+            if expanded is None:
+                self.app.print_line(f"[ERR] alias '{cmd}' is cyclic or unparsable.")
+                return
+            if not expanded:
+                return
+            cmd = expanded[0]
+            args = expanded[1:] + args
+            if cmd not in self.cmds:
+                cmd = self.index.unique(cmd) or cmd
 
         try:
             if getattr(self.app, "current_game", None) and self.app.current_game.on_command(cmd, args):
@@ -202,13 +300,186 @@ class CommandRouter:
 
         spec = self.cmds.get(cmd)
         if not spec:
-            self.app.print_line("Unknown command. Type `help`.")
+            self._unknown(cmd)
             return
 
+        if timed:
+            t0 = perf.since("dispatch", t0)
         try:
             spec.fn(self.app, args)
         except Exception as e:
             self.app.print_line(f"[ERR] command failed: {e}")
+        if timed and perf.enabled:
+            perf.since(f"cmd.{spec.name}", t0)
+
+    def _resolve(self, name: str) -> str:
+        """The command `name` runs: aliases expanded and unique prefixes completed, as in run()."""
+        if name not in self.cmds and name not in self.aliases:
+            name = self.index.unique(name) or name
+        if name in self.aliases:
+            expanded = self.expand_alias(name)
+            if not expanded:
+                return name
+            name = expanded[0]
+            if name not in self.cmds:
+                name = self.index.unique(name) or name
+        return name
+
+    def _history_line(self, raw: str) -> str:
+        """What history.txt records for `raw`: just the typed name for secret-bearing commands."""
+        head = raw.split(None, 1)[0]
+        try:
+            head = shlex.split(raw)[0]
+        except (ValueError, IndexError):
+            pass
+        return head if self._resolve(head) in SECRET_COMMANDS else raw
+
+    def _alias_chain(self, name: str, aliases: Dict[str, str]) -> Tuple[Optional[List[str]], List[str]]:
+        """
+        Resolves `name` through `aliases` iteratively.
+        Returns (tokens, chain); tokens is None when the chain loops or a value
+        cannot be parsed. An alias whose head names itself and is also a real
+        command (e.g. `alias help=help solve`) stops at the command.
+        """
+        chain = [name]
+        try:
+            tokens = shlex.split(aliases[name])
+        except ValueError:
+            return None, chain
+        seen = {name}
+        while tokens and tokens[0] in aliases:
+            head = tokens[0]
+            if head in seen:
+                if head in self.cmds:
+                    break
+                chain.append(head)
+                return None, chain
+            seen.add(head)
+            chain.append(head)
+            try:
+                tokens = shlex.split(aliases[head]) + tokens[1:]
+            except ValueError:
+                return None, chain
+        return tokens, chain
+
+    def expand_alias(self, name: str) -> Optional[List[str]]:
+        cached = self._alias_cache.get(name)
+        if cached is not None:
+            return cached
+        tokens, _ = self._alias_chain(name, self.aliases)
+        if tokens is not None:
+            self._alias_cache[name] = tokens
+        return tokens
+
+    def run_script(self, lines, echo: bool = True) -> int:
+        """
+        Runs each command line in order inside the app's batch context, so
+        autosaves and status updates collapse into one at the end.
+        Returns the number of commands executed.
+        """
+        if self._script_depth >= 8:
+            self.app.print_line("[ERR] source nested too deeply.")
+            return 0
+        batch = getattr(self.app, "batch", None)
+        ran = 0
+        self._script_depth += 1
+        try:
+            with (batch() if batch else contextlib.nullcontext()):
+                for line in lines:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    if echo:
+                        self.app.print_line(f"> {line}")
+                    self.run(line)
+                    ran += 1
+        finally:
+            self._script_depth -= 1
+        return ran
+
+    def _unknown(self, cmd: str) -> None:
+        matches = self.index.complete(cmd, limit=8)
+        if len(matches) > 1:
+            self.app.print_line(f"Ambiguous command '{cmd}': {', '.join(matches)}")
+            return
+        close = difflib.get_close_matches(cmd, list(self.cmds.keys()) + list(self.aliases.keys()), n=3, cutoff=0.6)
+        if close:
+            self.app.print_line(f"Unknown command. Did you mean: {', '.join(close)}?")
+            return
+        self.app.print_line("Unknown command. Type `help`.")
+
+
+    def refresh_completions(self) -> None:
+        """Rebuild argument tries from the loaded config, game registry and state vars."""
+        nodes = self.completions["nodes"]
+        games = self.completions["games"]
+        nodes.clear()
+        games.clear()
+        self._hint_tries.clear()
+
+        cfg_nodes = (getattr(self.app, "cfg", None) or {}).get("nodes", {})
+        for nid, ncfg in cfg_nodes.items():
+            nodes.add(nid)
+            for g in (ncfg or {}).get("games", []):
+                if g.get("id"):
+                    games.add(str(g["id"]))
+        for gid in getattr(self.app, "game_registry", {}) or {}:
+            games.add(gid)
+
+        self.refresh_vars()
+
+    def refresh_vars(self) -> None:
+        vars_trie = self.completions["vars"]
+        vars_trie.clear()
+        for k in ((getattr(self.app, "state", None) or {}).get("vars") or {}):
+            vars_trie.add(k)
+
+    def _hints_trie(self) -> Trie:
+        nid = (self.app.state or {}).get("current_node", "")
+        trie = self._hint_tries.get(nid)
+        if trie is None:
+            hints = self.app.node_cfg(nid).get("hints", []) if hasattr(self.app, "node_cfg") else []
+            trie = Trie((str(h.get("id", "")) for h in hints if h.get("id")), fold=True)
+            self._hint_tries[nid] = trie
+        return trie
+
+    def _arg_trie(self, cmd: str, arg_pos: int) -> Optional[Trie]:
+        if arg_pos != 0:
+            return None
+        source = self.arg_sources.get(cmd)
+        if source == "commands":
+            return self.index
+        if source == "hints":
+            return self._hints_trie()
+        return self.completions.get(source) if source else None
+
+    def complete(self, line: str) -> Tuple[str, List[str]]:
+        """
+        Tab completion for the input line.
+        Returns the (possibly extended) line and the candidate list for display.
+        """
+        line = line or ""
+        head, sep, rest = line.lstrip().partition(" ")
+        if not sep:
+            trie, word, before, arg_pos = self.index, head, "", 0
+        else:
+            # Alias chains resolve through expand_alias, the iterative, cycle-checked path run() uses.
+            cmd = self._resolve(head)
+            tokens = rest.lstrip().split(" ")
+            word = tokens[-1]
+            arg_pos = len(tokens) - 1
+            before = line[: len(line) - len(word)]
+            trie = self._arg_trie(cmd, arg_pos)
+            if trie is None:
+                return line, []
+
+        candidates = [str(c) for c in trie.complete(word, limit=50)]
+        if not candidates:
+            return line, []
+        if len(candidates) == 1:
+            return before + candidates[0] + " ", candidates
+        extended, _ = trie.extend(word)
+        return before + extended, candidates
 
 
     def _help(self, app, args) -> None:
@@ -241,7 +512,7 @@ class CommandRouter:
         app.print_line(f"INFO:  {spec.long}")
 
     def _clear(self, app, args) -> None:
-        app.ui.terminal.clear()
+        app.clear_terminal()
 
     def _history(self, app, args) -> None:
         n = 50
@@ -252,8 +523,7 @@ class CommandRouter:
                 app.print_line("[ERR] history n must be a number.")
                 return
 
-        start_idx = max(0, len(self.history) - n)
-        for i, h in enumerate(self.history[start_idx:], start=start_idx + 1):
+        for i, h in self.history.tail(n):
             app.print_line(f"{i:>3}: {h}")
 
     def _alias(self, app, args) -> None:
@@ -270,6 +540,9 @@ class CommandRouter:
             k = args[1].strip()
             if k in self.aliases:
                 del self.aliases[k]
+                self._alias_cache.clear()
+                if k not in self.cmds:
+                    self.index.discard(k)
                 app.print_line(f"[OK] alias deleted: {k}")
             else:
                 app.print_line("[ERR] alias not found.")
@@ -285,7 +558,16 @@ class CommandRouter:
         if not k or not v:
             app.print_line("[ERR] Bad alias.")
             return
+        tokens, chain = self._alias_chain(k, {**self.aliases, k: v})
+        if tokens is None:
+            if len(chain) > 1 and chain[-1] in chain[:-1]:
+                app.print_line(f"[ERR] alias cycle: {' -> '.join(chain)}")
+            else:
+                app.print_line("[ERR] Bad alias (bad quotes?).")
+            return
         self.aliases[k] = v
+        self._alias_cache.clear()
+        self.index.add(k)
         app.print_line(f"[OK] alias {k}={v}")
 
     def _sleep(self, app, args) -> None:
@@ -299,8 +581,137 @@ class CommandRouter:
             return
         sec = max(0.0, min(sec, 5.0))
         app.print_line(f"[...] sleeping {sec}s")
-        time.sleep(sec)
-        app.print_line("[OK] awake")
+        if self._script_depth:
+            app.print_line("[OK] awake")
+            return
+
+        def nap():
+            yield sec
+            app.print_line("[OK] awake")
+
+        job = app.jobs.spawn(f"sleep {sec}", nap())
+        if job.alive:
+            app.print_line(f"[JOB {job.id}] sleep {sec}")
+
+    def _job_id(self, app, args) -> Optional[int]:
+        if not args:
+            live = app.jobs.list()
+            if not live:
+                app.print_line("(no jobs)")
+                return None
+            return live[-1].id
+        try:
+            return int(str(args[0]).lstrip("%"))
+        except ValueError:
+            app.print_line("[ERR] job id must be a number.")
+            return None
+
+    def _jobs(self, app, args) -> None:
+        live = app.jobs.list()
+        if not live:
+            app.print_line("(no jobs)")
+            return
+        for job in live:
+            age = time.monotonic() - job.started
+            app.print_line(f"[{job.id}] {job.state:<8} {age:6.1f}s  {job.name}")
+
+    def _fg(self, app, args) -> None:
+        job_id = self._job_id(app, args)
+        if job_id is None:
+            return
+        if not app.jobs.fg(job_id):
+            app.print_line("[ERR] no such job.")
+
+    def _kill(self, app, args) -> None:
+        if not args:
+            app.print_line("Usage: kill <job_id|all>")
+            return
+        if str(args[0]).lower() == "all":
+            app.print_line(f"[OK] killed {app.jobs.kill_all()} job(s)")
+            return
+        job_id = self._job_id(app, args)
+        if job_id is None:
+            return
+        if app.jobs.kill(job_id):
+            app.print_line(f"[OK] killed job {job_id}")
+        else:
+            app.print_line("[ERR] no such job.")
+
+    def _source(self, app, args) -> None:
+        echo = True
+        if args and args[0] == "-q":
+            echo = False
+            args = args[1:]
+        if not args:
+            app.print_line("Usage: source [-q] <file>")
+            return
+        path = os.path.expanduser(args[0])
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            app.print_line(f"[ERR] cannot read script: {e}")
+            return
+        t0 = time.perf_counter()
+        ran = self.run_script(lines, echo=echo)
+        ms = (time.perf_counter() - t0) * 1000.0
+        app.print_line(f"[OK] source: {ran} command(s) in {ms:.1f} ms")
+
+    def _perf(self, app, args) -> None:
+        perf = self.perf
+        action = str(args[0]).lower() if args else ""
+        if action in ("on", "off"):
+            perf.enabled = action == "on"
+            app.print_line(f"[OK] perf {action}")
+            return
+        if action == "reset":
+            perf.reset()
+            app.print_line("[OK] perf counters reset")
+            return
+        if action == "dump":
+            path = args[1] if len(args) > 1 else os.path.join(getattr(app, "save_dir", "."), "perf.json")
+            try:
+                perf.dump(os.path.expanduser(path))
+            except OSError as e:
+                app.print_line(f"[ERR] cannot write perf dump: {e}")
+                return
+            app.print_line(f"[OK] perf written to {path}")
+            return
+        if action:
+            app.print_line("Usage: perf [on|off|reset|dump [file]]")
+            return
+
+        app.print_line(f"=== PERF ({'on' if perf.enabled else 'off'}) ===")
+        view = getattr(app, "view", None)
+        out = view.output_stats() if hasattr(view, "output_stats") else {}
+        if out.get("flushes"):
+            app.print_line(
+                f"output: {out['lines']} lines in {out['flushes']} flushes "
+                f"({out['coalesced']} coalesced, largest batch {out['max_batch']})"
+            )
+        idle = getattr(app, "idle", None)
+        if idle is not None and idle.realtime and idle.submitted:
+            st = idle.stats()
+            app.print_line(
+                f"idle: {st['queued']} queued, {st['finished']}/{st['submitted']} done, "
+                f"{st['slices']} slices ({st['deferred']} deferred for input), "
+                f"{st['busy_ms']:.1f} ms busy, max slice {st['max_slice_ms']:.1f} ms, {st['overruns']} over budget"
+            )
+        events = getattr(app, "events", None)
+        if events is not None and events.threaded:
+            app.print_line(f"event log: {events.written} written, {events.pending} pending (writer thread)")
+        prefetch = getattr(app, "prefetch", None)
+        if prefetch is not None and prefetch.enabled:
+            pf = prefetch.stats()
+            app.print_line(
+                f"prefetch: {pf['warmed']} nodes warmed, {pf['queued']} queued, "
+                f"{pf['hits']} hits / {pf['misses']} misses on enter"
+            )
+        if not perf.metrics:
+            app.print_line("(no samples yet; use `perf on`)")
+            return
+        for row in perf.table():
+            app.print_line(row)
 
     def _echo(self, app, args) -> None:
         app.print_line(" ".join(args))
@@ -324,6 +735,7 @@ class CommandRouter:
         k = args[0]
         v = " ".join(args[1:])
         app.state.setdefault("vars", {})[k] = v
+        self.completions["vars"].add(k)
         app.print_line(f"[OK] {k} set")
 
     def _get(self, app, args) -> None:
@@ -345,6 +757,7 @@ class CommandRouter:
         vars_ = app.state.setdefault("vars", {})
         if k in vars_:
             del vars_[k]
+            self.completions["vars"].discard(k)
             app.print_line(f"[OK] deleted {k}")
         else:
             app.print_line("[ERR] no such var")
@@ -355,6 +768,6 @@ class CommandRouter:
         except Exception:
             pass
         try:
-            app.root.destroy()
+            app.quit()
         except Exception:
             pass
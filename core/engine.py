@@ -0,0 +1,1033 @@
+import contextlib
+import hashlib
+import os
+import random
+import time
+from typing import Callable, Optional
+
+from core.commands import CommandRouter
+from core.config import ConfigLoader
+from core.encryption import Encryption
+from core.idle import IdleScheduler
+from core.jobs import JobScheduler
+from core.perf import PerfRecorder
+from core.prefetch import NodePrefetcher
+from core.startup import StartupProfiler
+from core.eventdb import EncryptedEventDB, EventWriter
+from core.storage import SaveManager, SavePaths
+from games.registry import GameRegistry
+
+
+APP_SAVE_KEY = "Test"
+FUNNY_NAMES = ["CaptainPickle", "BinaryBanana", "SirLagALot", "NullNoodle", "PixelPenguin", "KernelPanicAtDisco", "404NotFoundGuy", "QuantumPotato", "TurboToaster", "BugMagnet"]
+
+
+class NullView:
+    """
+    View hooks the engine calls. This headless default draws nothing;
+    the Tk app implements the same methods on top of its widgets.
+    """
+
+    realtime = False
+
+    def set_status(self, text: str):
+        pass
+
+    def hide_namebar(self):
+        pass
+
+    def clear_terminal(self):
+        pass
+
+    def clear_panel(self):
+        pass
+
+    def mount_game(self, game_id: str):
+        pass
+
+    def prefetch_game(self, game_id: str) -> bool:
+        """Builds a game's panel ahead of its first mount, without showing it."""
+        return False
+
+    def reset_games(self):
+        """Discards any game state the view keeps between mounts."""
+        pass
+
+    def narrate(self, speaker: str, text: str, preempt: bool = False) -> Optional[int]:
+        """
+        Shows one dialogue line and returns how long it takes to appear, in ms.
+        None means the view does not render dialogue and the engine prints it.
+        preempt=True means older queued speech is stale and may be dropped.
+        """
+        return None
+
+    def skip_narration(self, all_lines: bool = False) -> int:
+        return 0
+
+    def prefetch_narration(self, lines) -> Optional[int]:
+        """Hands (speaker, text) lines to the view to pre-render audio; returns how many were queued."""
+        return None
+
+    def voice_cache(self, clear: bool = False) -> Optional[dict]:
+        """Narration audio cache stats (optionally after clearing it); None without audio."""
+        return None
+
+    def set_muted(self, muted: bool) -> Optional[bool]:
+        """Mutes or unmutes narration audio; None when the view has no audio."""
+        return None
+
+    def after(self, ms: int, fn: Callable):
+        fn()
+
+    def after_idle(self, fn: Callable):
+        fn()
+
+    def output_stats(self) -> dict:
+        """Counters from the view's output buffer (lines, flushes, coalesced, max_batch)."""
+        return {}
+
+    def quit(self):
+        pass
+
+
+class GameEngine:
+    """
+    Gameplay core: config, state, saving, event log and command routing.
+
+    Output goes to `sink` (one string per line); anything visual goes through
+    `view`. With the defaults it runs without a display, so sessions can be
+    simulated in tests or served from a process with no window.
+    Pass persist=False to skip the encrypted save and event log entirely.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        save_dir: Optional[str] = None,
+        sink: Optional[Callable[[str], None]] = None,
+        view=None,
+        persist: bool = True,
+        clock: Callable[[], float] = time.time,
+        profiler: Optional[StartupProfiler] = None,
+    ):
+        self.base_dir = base_dir
+        self.profiler = prof = profiler or StartupProfiler()
+        self.sink = sink or print
+        self.view = view or NullView()
+        self.clock = clock
+        self._batch_depth = 0
+        self._narrated_node: Optional[str] = None
+        self._persist_pending = False
+        self.perf = PerfRecorder(enabled=bool(os.environ.get("TT_PERF")))
+
+        with prof.phase("engine.config"):
+            self.cfg = ConfigLoader(base_dir).load()
+        self.hint_cooldown = int(self.cfg.get("meta", {}).get("hint_cooldown_seconds", 300))
+
+        self.save_dir = save_dir or os.path.join(os.path.expanduser("~"), ".time_terminal_game")
+        self.save_path = os.path.join(self.save_dir, "save.dat")
+        self.db_path = os.path.join(self.save_dir, "events.db")
+
+        self.crypto = Encryption(rounds=150_000)
+        self.saver = None
+        self.eventdb = None
+        if persist:
+            with prof.phase("engine.storage"):
+                self.saver = SaveManager(
+                    SavePaths(self.save_dir, self.save_path),
+                    encryption=self.crypto,
+                    password_getter=lambda: APP_SAVE_KEY
+                )
+                self.eventdb = EncryptedEventDB(
+                    self.db_path,
+                    encryption=self.crypto,
+                    password_getter=lambda: APP_SAVE_KEY,
+                    save_dir=self.save_dir
+                )
+
+        self._reset_state_fresh()
+
+        # Game classes are imported on first mount; plugins/ next to the config adds third-party games.
+        self.game_registry = GameRegistry(plugin_dirs=[os.path.join(base_dir, "plugins")])
+        self.current_game = None
+        self._story_cache = {}
+        # Jobs ride the view's event loop; headless they finish as soon as they are spawned.
+        self.jobs = JobScheduler(
+            schedule=self.view.after if getattr(self.view, "realtime", False) else None,
+            on_event=self.print_line,
+        )
+        # Maintenance (prefetch) waits for the view to go idle.
+        self.idle = IdleScheduler(
+            after_idle=self.view.after_idle if getattr(self.view, "realtime", False) else None,
+            after=self.view.after,
+            on_event=self.print_line,
+        )
+        # Encrypted writes are slow (a key derivation each), so a realtime view gets a writer thread.
+        self.events = (
+            EventWriter(self.eventdb, threaded=bool(getattr(self.view, "realtime", False)))
+            if self.eventdb is not None else None
+        )
+        with prof.phase("engine.router"):
+            self.router = CommandRouter(self)
+            self.router.refresh_completions()
+        self.prefetch = NodePrefetcher(self)
+        if persist:
+            with prof.phase("engine.history"):
+                self.router.history.attach(os.path.join(self.save_dir, "history.txt"))
+
+    def print_line(self, s: str):
+        self.sink(s)
+
+    def log_event(self, kind: str, obj: dict):
+        if self.events is None:
+            return
+        self.events.put(kind, obj)
+
+    def flush_events(self) -> None:
+        if self.events is not None:
+            self.events.flush()
+
+    def status_text(self) -> str:
+        return f"{self.state.get('player_name','?')} | Node {self.state['current_node']} ({self.node_time(self.state['current_node'])}) | Score {self.state['score']}"
+
+    def execute(self, line: str):
+        """One interactive command: route it, then autosave and refresh the status bar."""
+        if not self.state.get("player_name"):
+            self.assign_funny_name()
+
+        perf = self.perf
+        self.router.run(line)
+        t0 = time.perf_counter() if perf.enabled else 0.0
+        self._persist()
+        if perf.enabled:
+            t0 = perf.since("persist", t0)
+        self.update_status()
+        if perf.enabled:
+            perf.since("ui.status", t0)
+
+    def clear_terminal(self):
+        self.view.clear_terminal()
+
+    def narrate_line(self, speaker: str, text: str, preempt: bool = False) -> int:
+        shown = self.view.narrate(speaker, text, preempt)
+        if shown is None:
+            self.print_line(f"{speaker}: {text}")
+            return 0
+        return shown
+
+    def quit(self):
+        self.flush_events()
+        self.view.quit()
+
+    def _reset_state_fresh(self):
+        self.state = {
+            "player_name": None,
+            "score": 0,
+            "current_node": "N1",
+            "unlocked_nodes": ["N1"],
+            "solved": {},
+            "tokens": [],
+            "story_index": {},
+            "last_hint_ts": 0,
+            "answers": {},
+            "vars": {}
+        }
+
+    def node_cfg(self, node_id: str) -> dict:
+        return self.cfg.get("nodes", {}).get(node_id, {})
+
+    def node_time(self, node_id: str) -> str:
+        return self.node_cfg(node_id).get("time", "??:??")
+
+    def node_year(self, node_id: str) -> int:
+        try:
+            return int(self.node_cfg(node_id).get("year", 0))
+        except Exception:
+            return 0
+
+    def format_story_text(self, text: str) -> str:
+        player = self.state.get("player_name") or "Traveler"
+        try:
+            return str(text).replace("{player}", player)
+        except Exception:
+            return str(text)
+
+    def assign_funny_name(self) -> str:
+        name = random.choice(FUNNY_NAMES)
+        self.state["player_name"] = name
+        return name
+
+    def update_status(self):
+        if self._batch_depth:
+            return
+        self.view.set_status(self.status_text())
+
+    def _persist_with_repair(self) -> bool:
+        if self.saver is None:
+            return True
+        try:
+            self.saver.save(self.state)
+            return True
+        except Exception:
+            pass
+
+        try:
+            os.makedirs(self.save_dir, exist_ok=True)
+            try:
+                if os.path.exists(self.save_path):
+                    os.remove(self.save_path)
+            except Exception:
+                pass
+            self.saver.save(self.state)
+            return True
+        except Exception:
+            return False
+
+    def _persist(self):
+        if self._batch_depth:
+            self._persist_pending = True
+            return
+        self._persist_pending = False
+        self._persist_with_repair()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Defers autosaves and status-bar refreshes while scripted commands run;
+        one persist and one status update happen when the outermost batch ends.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                if self._persist_pending:
+                    self._persist()
+                self.update_status()
+
+    def safe_autosave(self):
+        try:
+            self._persist()
+        except Exception:
+            pass
+
+    def boot(self):
+        self.print_line("Welcome to Jack’s Time Terminal, a story-driven puzzle chronicle.")
+        self.print_line("The narrator speaks first… because the world is frozen.\n")
+
+        loaded = None
+        try:
+            if self.saver is not None:
+                with self.profiler.phase("boot.load_save"):
+                    loaded = self.saver.load()
+        except Exception:
+            loaded = None
+
+        if isinstance(loaded, dict) and loaded.get("player_name"):
+            self.state.update(loaded)
+            self.router.refresh_vars()
+            self.print_line(f"[SAVE] Loaded. Welcome back, {self.state['player_name']}.")
+            self.view.hide_namebar()
+            with self.profiler.phase("boot.enter_node"):
+                self.enter_node(self.state.get("current_node", "N1"))
+            return
+
+        self._reset_state_fresh()
+        name = self.assign_funny_name()
+        self._persist_with_repair()
+        self.view.hide_namebar()
+        self.print_line(f"[PROFILE] Assigned fun name: {name}")
+        with self.profiler.phase("boot.enter_node"):
+            self.enter_node(self.state.get("current_node", "N1"))
+
+    def enter_node(self, node_id: str):
+        if node_id not in self.cfg.get("nodes", {}):
+            self.print_line(f"[ERR] Unknown node {node_id}")
+            return
+
+        self.state["current_node"] = node_id
+        self.prefetch.note_enter(node_id)
+        self._persist()
+
+        ncfg = self.node_cfg(node_id)
+        self.print_line(f"\n=== {node_id}: {ncfg.get('title','(untitled)')} ===")
+        self.print_line(f"[TIME] {self.node_time(node_id)} (fixed)")
+        self.print_line("Type: story   |  story all")
+
+        self.view.clear_panel()
+
+        games = ncfg.get("games", [])
+        if games:
+            self.mount_game(games[0]["id"])
+
+        self.update_status()
+        self.view.prefetch_narration(self.narration_lines([node_id]))
+        unlocked = self.state.get("unlocked_nodes", [])
+        self.prefetch.request([r for r in ncfg.get("routes", []) if r in unlocked])
+        self.log_event("enter_node", {"node": node_id, "score": self.state["score"]})
+
+    def story_lines(self, node_id: str) -> list:
+        """(speaker, text) for every intro line of a node, formatted for the current player (cached)."""
+        key = (node_id, self.state.get("player_name"))
+        lines = self._story_cache.get(key)
+        if lines is None:
+            lines = []
+            for line in self.node_cfg(node_id).get("intro", []) or []:
+                line = line or {}
+                lines.append((line.get("speaker", "NARRATOR"), self.format_story_text(line.get("text", ""))))
+            self._story_cache[key] = lines
+        return lines
+
+    def narration_lines(self, node_ids) -> list:
+        """(speaker, text) for each non-empty intro line of the given nodes, exactly as `story` would speak it."""
+        return [(sp, tx) for nid in node_ids for sp, tx in self.story_lines(nid) if tx]
+
+    def mount_game(self, game_id: str):
+        """Game panels are widgets, so mounting is the view's job; it sets current_game."""
+        self.view.mount_game(game_id)
+
+    def cmd_status(self):
+        self.update_status()
+        self.print_line(self.status_text())
+
+    def cmd_time(self):
+        nid = self.state["current_node"]
+        year = self.node_year(nid)
+        extra = f" | Year {year}" if year else ""
+        self.print_line(f"[TIME] Node {nid}: {self.node_time(nid)} (fixed){extra}")
+
+    def cmd_isgoal(self, args):
+        cur = self.state["current_node"]
+        goal = str(self.cfg.get("meta", {}).get("goal_node", "N7")).upper()
+        if goal not in self.cfg.get("nodes", {}):
+            self.print_line("[ERR] Goal node is not configured.")
+            return
+
+        cur_time = self.node_time(cur)
+        goal_time = self.node_time(goal)
+
+        def to_minutes(hhmm: str) -> int:
+            parts = str(hhmm).split(":", 1)
+            if len(parts) != 2:
+                return 0
+            return int(parts[0]) * 60 + int(parts[1])
+
+        try:
+            diff_min = abs(to_minutes(cur_time) - to_minutes(goal_time))
+        except Exception:
+            diff_min = 0
+
+        cur_year = self.node_year(cur)
+        goal_year = self.node_year(goal)
+        year_delta = abs(goal_year - cur_year)
+
+        self.print_line(f"[GOAL] Current node: {cur}  ->  Goal node: {goal}")
+        self.print_line(f"[GOAL] Time difference: {diff_min} minute(s).")
+        self.print_line(f"[GOAL] Timeline difference: {year_delta} year(s).")
+
+        era_story = self.node_cfg(cur).get("era_story")
+        if era_story:
+            self.print_line(f"[TIMELINE] {era_story}")
+        if cur == goal:
+            self.print_line("[GOAL] You are at the goal node.")
+
+    def cmd_nodes(self):
+        nodes = sorted(self.cfg.get("nodes", {}).keys())
+        self.print_line("Nodes: " + ", ".join(nodes))
+        self.print_line("Unlocked: " + ", ".join(self.state.get("unlocked_nodes", [])))
+
+    def cmd_routes(self):
+        cur = self.state["current_node"]
+        routes = self.node_cfg(cur).get("routes", [])
+        self.print_line("=== CHRONO ROUTES ===")
+        if not routes:
+            self.print_line("  (none)")
+            return
+        for n in routes:
+            open_ = "YES" if n in self.state.get("unlocked_nodes", []) else "NO"
+            self.print_line(f"  -> {n}   OPEN: {open_}")
+
+    def cmd_travel(self, args):
+        if not args:
+            self.print_line("Usage: travel N2")
+            return
+        node_id = args[0].upper()
+        cur = self.state["current_node"]
+        routes = self.node_cfg(cur).get("routes", [])
+
+        if node_id not in self.cfg.get("nodes", {}):
+            self.print_line("[ERR] Unknown node.")
+            return
+        if node_id != cur and node_id not in routes:
+            self.print_line("[LOCKED] No direct route. Use: routes")
+            return
+        if node_id not in self.state.get("unlocked_nodes", []):
+            self.print_line("[LOCKED] Node not unlocked yet.")
+            return
+
+        self.enter_node(node_id)
+
+    def cmd_games(self):
+        nid = self.state["current_node"]
+        games = self.node_cfg(nid).get("games", [])
+        self.print_line(f"Games in {nid}:")
+        if not games:
+            self.print_line("  (none)")
+            return
+        for g in games:
+            self.print_line(f"  - {g['id']}: {g.get('title', '')}")
+
+    def cmd_play(self, args):
+        if not args:
+            self.print_line("Usage: play <game_id>")
+            return
+        self.mount_game(args[0].lower())
+
+    def cmd_story(self, args):
+        """
+        story      -> next dialogue line (loops forever)
+        story all  -> replay full dialogue from start (queued, typed in order)
+        """
+        nid = self.state["current_node"]
+        lines = self.story_lines(nid)
+        if not lines:
+            self.print_line("[STORY] No dialogue here.")
+            return
+
+        if "story_index" not in self.state or not isinstance(self.state["story_index"], dict):
+            self.state["story_index"] = {}
+
+        # The first line from a node other than the last one narrated preempts the old node's speech.
+        preempt = self._narrated_node != nid
+        self._narrated_node = nid
+
+        if args and str(args[0]).lower() == "all":
+            # The view queues narration in order, so the whole dialogue is handed over at once.
+            for i, (sp, tx) in enumerate(lines):
+                self.narrate_line(sp, tx, preempt=preempt and i == 0)
+            self.state["story_index"][nid] = 0
+            self.log_event("story_all", {"node": nid})
+            return
+
+        idx = int(self.state["story_index"].get(nid, 0))
+        if idx >= len(lines):
+            idx = 0
+
+        sp, tx = lines[idx]
+        self.narrate_line(sp, tx, preempt=preempt)
+
+        idx += 1
+        if idx >= len(lines):
+            idx = 0
+        self.state["story_index"][nid] = idx
+
+        self.log_event("story_next", {"node": nid, "to": idx})
+
+    def cmd_skip(self, args):
+        all_lines = bool(args) and str(args[0]).lower() == "all"
+        if not self.view.skip_narration(all_lines):
+            self.print_line("(nothing to skip)")
+
+    def cmd_mute(self, args):
+        action = str(args[0]).lower() if args else "on"
+        if action not in ("on", "off"):
+            self.print_line("Usage: mute [on|off]")
+            return
+        muted = self.view.set_muted(action == "on")
+        if muted is None:
+            self.print_line("[TTS] Speech is not available.")
+            return
+        self.print_line(f"[TTS] {'muted' if muted else 'unmuted'}")
+
+    def cmd_voicecache(self, args):
+        action = str(args[0]).lower() if args else ""
+        if action == "build":
+            nodes = [self.state["current_node"]]
+            if len(args) > 1 and str(args[1]).lower() == "all":
+                nodes = list(self.cfg.get("nodes", {}).keys())
+            queued = self.view.prefetch_narration(self.narration_lines(nodes))
+            if queued is None:
+                self.print_line("[TTS] Speech is not available.")
+                return
+            self.print_line(f"[TTS] rendering {queued} line(s) in the background")
+            return
+        if action not in ("", "clear"):
+            self.print_line("Usage: voicecache [build [all]|clear]")
+            return
+        st = self.view.voice_cache(clear=action == "clear")
+        if st is None:
+            self.print_line("[TTS] Speech is not available.")
+            return
+        self.print_line(
+            f"[TTS] cache: {st['entries']} file(s), {st['bytes'] / 1e6:.1f}/{st['max_bytes'] / 1e6:.0f} MB, "
+            f"{st['hits']} hit(s), {st['misses']} miss(es), {st['rendered']} rendered this session"
+        )
+
+    def cmd_selftest(self, args):
+        """
+        selftest <PASSWORD>
+        Runs a smoke-test for major commands and prints PASS/FAIL.
+        Password = APP_SAVE_KEY (same key used for encrypted saves).
+        """
+        if not args:
+            self.print_line("Usage: selftest <PASSWORD>")
+            return
+
+        pw = " ".join(args).strip()
+        if pw != APP_SAVE_KEY:
+            self.print_line("[NO] Bad password.")
+            return
+
+        self.print_line("=== SELFTEST ===")
+
+        tests = [
+            ("status", lambda: self.cmd_status()),
+            ("time", lambda: self.cmd_time()),
+            ("nodes", lambda: self.cmd_nodes()),
+            ("routes", lambda: self.cmd_routes()),
+            ("games", lambda: self.cmd_games()),
+            ("story", lambda: self.cmd_story([])),
+            ("story all", lambda: self.cmd_story(["all"])),
+            ("hint(list)", lambda: self.cmd_hint([]) if hasattr(self, "cmd_hint") else None),
+            ("help(router)", lambda: self.router.run("help")),
+            ("man story", lambda: self.router.run("man story")),
+        ]
+
+        passed = 0
+        failed = 0
+
+        for name, fn in tests:
+            try:
+                fn()
+                self.print_line(f"[PASS] {name}")
+                passed += 1
+            except Exception as e:
+                self.print_line(f"[FAIL] {name}: {e}")
+                failed += 1
+
+        self.print_line(f"=== RESULT: {passed} passed, {failed} failed ===")
+
+    def unlock_node(self, node_id: str, reason: str):
+        if node_id not in self.state["unlocked_nodes"]:
+            self.state["unlocked_nodes"].append(node_id)
+        self.print_line(f"[UNLOCK] {node_id} unlocked ({reason}).")
+        self.log_event("unlock", {"node": node_id, "reason": reason})
+        self.prefetch.request([node_id])
+
+    def award_game(self, game_id: str):
+        nid = self.state["current_node"]
+        games = self.node_cfg(nid).get("games", [])
+        meta = next((g for g in games if g.get("id") == game_id), None)
+        if not meta:
+            return
+
+        if self.state["solved"].get(game_id):
+            self.print_line("[INFO] Already solved.")
+            return
+
+        pts = int(meta.get("solve_points", 0))
+        token = meta.get("token")
+
+        self.state["score"] = int(self.state.get("score", 0)) + pts
+        self.state["solved"][game_id] = True
+
+        if token and token not in self.state["tokens"]:
+            self.state["tokens"].append(token)
+
+        self.print_line(f"[OK] Solved {game_id}. +{pts} pts.")
+        if token:
+            self.print_line("[FRAGMENT] You gained a fragment (not shown plainly).")
+
+        self.log_event("solve", {"node": nid, "game": game_id, "points": pts, "score": self.state["score"]})
+
+        for nxt in self.node_cfg(nid).get("routes", []):
+            self.unlock_node(nxt, f"{game_id} solved")
+
+    def cmd_hint(self, args):
+        nid = self.state["current_node"]
+        hints = self.node_cfg(nid).get("hints", [])
+        if not hints:
+            self.print_line("[HINT] No hints here.")
+            return
+
+        if not args:
+            self.print_line(f"Hints in {nid}:")
+            for h in hints:
+                self.print_line(f"  - {h.get('id','?')}: cost {int(h.get('cost',0))}")
+            self.print_line("Use: hint <id>")
+            return
+
+        wanted = str(args[0]).lower()
+        hint = next((h for h in hints if str(h.get("id", "")).lower() == wanted), None)
+        if not hint:
+            self.print_line("[ERR] Unknown hint id.")
+            return
+
+        now = self.clock()
+        last = float(self.state.get("last_hint_ts", 0) or 0)
+        wait_left = int(self.hint_cooldown - (now - last))
+        if wait_left > 0:
+            self.print_line(f"[COOLDOWN] Hint available in {wait_left}s.")
+            return
+
+        cost = int(hint.get("cost", 0))
+        cur_score = int(self.state.get("score", 0))
+        if cur_score < cost:
+            self.print_line(f"[LOCKED] Need {cost} score for this hint.")
+            return
+
+        self.state["score"] = cur_score - cost
+        self.state["last_hint_ts"] = now
+        self.print_line(f"[HINT:{hint.get('id', '?')}] {hint.get('text', '')} (-{cost} score)")
+
+    def cmd_showcode(self, args):
+        if self.state["current_node"] != "N3":
+            self.print_line("[LOCKED] showcode is available in N3.")
+            return
+        if not args:
+            self.print_line("Usage: showcode <A|B|C>")
+            return
+
+        key = str(args[0]).upper()
+        if key not in {"A", "B", "C"}:
+            self.print_line("Usage: showcode <A|B|C>")
+            return
+
+        if self.current_game and hasattr(self.current_game, "show"):
+            self.current_game.show(key)
+        self.state.setdefault("answers", {})["N3_last_code"] = key
+        self.print_line(f"[N3] Current code snippet: {key}")
+
+    def game_meta(self, node_id: str, game_id: str) -> dict:
+        games = self.node_cfg(node_id).get("games", [])
+        return next((g for g in games if g.get("id") == game_id), {})
+
+    def cmd_solve(self, args):
+        if not args:
+            self.print_line("Usage: solve <colors|chess|code|regex|tictactoe|dilemma> ...")
+            return
+
+        kind = str(args[0]).lower()
+        rest = args[1:]
+
+        if kind == "colors":
+            if self.state["current_node"] != "N1":
+                self.print_line("[LOCKED] colors belongs to N1.")
+                return
+            if not rest:
+                self.print_line("Usage: solve colors <COMBINATIONS>")
+                return
+
+            meta = self.game_meta("N1", "colors")
+            configured = meta.get("answer")
+            if isinstance(configured, int):
+                expected = configured
+            else:
+                minutes = int(self.node_time("N1").split(":")[-1])
+                triangle_choices = minutes
+                rectangle_choices = 3
+
+                rectangle_combos = rectangle_choices ** 3
+                triangle_combos = (
+                    triangle_choices
+                    * max(0, triangle_choices - 1)
+                    * max(0, triangle_choices - 2)
+                )
+                expected = rectangle_combos * triangle_combos
+
+            try:
+                guess = int(str(rest[0]).strip())
+            except Exception:
+                self.print_line("Usage: solve colors <COMBINATIONS>")
+                return
+
+            if guess == expected:
+                self.award_game("colors")
+            else:
+                self.print_line("[NO] Incorrect combinations count.")
+            return
+
+        if kind == "chess":
+            if self.state["current_node"] != "N2":
+                self.print_line("[LOCKED] chess belongs to N2.")
+                return
+            if not rest:
+                self.print_line("Usage: solve chess <MOVE>")
+                return
+            mv = str(rest[0]).replace("+", "").replace("#", "").strip().lower()
+            configured = str(self.game_meta("N2", "chess").get("answer", "Ne7")).strip().lower()
+            accepted = {configured, configured.replace("n", "", 1), "n" + configured, "n" + configured.lstrip("n")}
+            accepted |= {"ne7", "nxe7", "e7"}
+            if mv in accepted:
+                self.award_game("chess")
+            else:
+                self.print_line("[NO] Not the best fork.")
+            return
+
+        if kind == "code":
+            if self.state["current_node"] != "N3":
+                self.print_line("[LOCKED] code belongs to N3.")
+                return
+            if len(rest) < 2:
+                self.print_line("Usage: solve code <A|B|C> <N#>")
+                return
+
+            key = str(rest[0]).upper()
+            node = str(rest[1]).upper()
+            cfg_ans = self.game_meta("N3", "codes").get("answer", [])
+            if isinstance(cfg_ans, dict):
+                cfg_ans = [cfg_ans]
+            if not isinstance(cfg_ans, list):
+                cfg_ans = [{"snippet": "A", "node": "N4"}]
+
+            expected_map = {
+                str(q.get("snippet", "")).upper(): str(q.get("node", "")).upper()
+                for q in cfg_ans
+                if isinstance(q, dict)
+            }
+            if key not in expected_map:
+                self.print_line("[NO] Unknown question id. Use A/B/C.")
+                return
+
+            answers = self.state.setdefault("answers", {})
+            solved = set(answers.get("N3_code_solved", []))
+            penalized = set(answers.get("N3_code_penalized", []))
+
+            if key in solved:
+                self.print_line(f"[INFO] Question {key} already solved.")
+                return
+
+            if node == expected_map[key]:
+                solved.add(key)
+                answers["N3_code_solved"] = sorted(solved)
+                remaining = [k for k in sorted(expected_map.keys()) if k not in solved]
+                if not remaining:
+                    self.award_game("codes")
+                else:
+                    self.print_line(f"[OK] {key} correct. Remaining: {', '.join(remaining)}")
+            else:
+                if key not in penalized:
+                    self.state["score"] = int(self.state.get("score", 0)) - 2
+                    penalized.add(key)
+                    answers["N3_code_penalized"] = sorted(penalized)
+                    self.print_line("[NO] Incorrect. First miss on this question: -2 score.")
+                else:
+                    self.print_line("[NO] Incorrect.")
+            return
+
+        if kind == "regex":
+            if self.state["current_node"] != "N4":
+                self.print_line("[LOCKED] regex belongs to N4.")
+                return
+            if not rest:
+                self.print_line("Usage: solve regex <1|2|3|4|5>")
+                return
+
+            answers = self.state.setdefault("answers", {})
+            if self.state.get("solved", {}).get("regex"):
+                self.print_line("[INFO] Regex already completed.")
+                return
+
+            pick = str(rest[0])
+            chosen = answers.get("N4_regex_map", {}).get(pick)
+            correct = answers.get("N4_regex_correct")
+            rounds = int(answers.get("N4_regex_rounds", 0))
+            delta = 2 if chosen and correct and chosen == correct else -2
+            self.state["score"] = int(self.state.get("score", 0)) + delta
+            answers["N4_regex_rounds"] = rounds + 1
+
+            if delta > 0:
+                self.print_line("[OK] Correct regex. +2 score.")
+            else:
+                self.print_line("[NO] Pattern mismatch. -2 score.")
+
+            remaining = 4 - (rounds + 1)
+            if remaining <= 0:
+                self.print_line("[INFO] Regex 4-riddle trial complete. Moving on.")
+                self.award_game("regex")
+            else:
+                self.print_line(f"[INFO] {remaining} regex rounds remaining.")
+            return
+
+        if kind == "tictactoe":
+            if self.state["current_node"] != "N5":
+                self.print_line("[LOCKED] tictactoe belongs to N5.")
+                return
+            g = self.current_game
+            if g and getattr(g, "game_id", "") == "tictactoe" and hasattr(g, "sequence_ok") and g.sequence_ok():
+                self.award_game("tictactoe")
+            else:
+                self.print_line("[NO] Complete all 4 rounds in the grid trial first.")
+            return
+
+        if kind == "dilemma":
+            if self.state["current_node"] != "N6":
+                self.print_line("[LOCKED] dilemma belongs to N6.")
+                return
+            g = self.current_game
+            if g and getattr(g, "game_id", "") == "dilemma" and hasattr(g, "success") and g.success():
+                self.award_game("dilemma")
+            else:
+                self.print_line("[NO] Win Nim gauntlet first (3 runs). Think about first-vs-second and modulo-4 control.")
+            return
+
+        self.print_line("[ERR] Unknown solve target.")
+
+    def cmd_solvelose(self, args):
+        if not args:
+            self.print_line("Usage: solvelose <game_id>")
+            return
+
+        game_id = str(args[0]).lower()
+        nid = self.state.get("current_node", "N1")
+        meta = self.game_meta(nid, game_id)
+        if not meta:
+            self.print_line("[ERR] Game not in current node.")
+            return
+
+        answers = self.state.setdefault("answers", {})
+        key = f"solvelose_{nid}_{game_id}"
+        now = self.clock()
+        started = float(answers.get(key, 0) or 0)
+        wait_s = 300
+
+        if not started:
+            answers[key] = now
+            self.print_line("[INFO] SolveLose started. Wait 5 minutes, then run the same command again to reveal answer.")
+            return
+
+        elapsed = int(now - started)
+        if elapsed < wait_s:
+            self.print_line(f"[WAIT] SolveLose unlocks in {wait_s - elapsed}s.")
+            return
+
+        answer = meta.get("answer", "(no answer configured)")
+        self.print_line(f"[REVEAL:{game_id}] {answer}")
+
+    def cmd_resetuser(self, args):
+        if not args or str(args[0]) != "Ifuckedup":
+            self.print_line("Usage: resetuser Ifuckedup")
+            return
+
+        try:
+            if os.path.exists(self.save_path):
+                os.remove(self.save_path)
+        except Exception:
+            pass
+
+        self._reset_state_fresh()
+        self.view.reset_games()
+        self.prefetch.reset()
+        self.router.refresh_vars()
+        name = self.assign_funny_name()
+        self._persist_with_repair()
+        self.view.hide_namebar()
+        self.print_line(f"[OK] User save reset. New fun name: {name}")
+        self.enter_node(self.state["current_node"])
+
+    def cmd_travelgod(self, args):
+        if len(args) < 2:
+            self.print_line("Usage: travelgod <N#> <CODE>")
+            return
+        node_id = str(args[0]).upper()
+        code = " ".join(args[1:]).strip()
+        if node_id not in self.cfg.get("nodes", {}):
+            self.print_line("[ERR] Unknown node.")
+            return
+        expected = str(self.node_cfg(node_id).get("godskip", "")).strip()
+        if code != expected:
+            self.print_line("[NO] Invalid travelGod code.")
+            self.print_line(f"[HINT] For {node_id}, use: {expected}")
+            return
+        self.unlock_node(node_id, "travelgod")
+        self.enter_node(node_id)
+
+    def cmd_train(self, args):
+        if not args:
+            self.print_line("Usage: train dilemma")
+            return
+        target = str(args[0]).lower()
+        if target != "dilemma":
+            self.print_line("[ERR] Unknown training module.")
+            return
+        self.mount_game("dilemma")
+
+    def cmd_ttt(self, args):
+        if self.state["current_node"] != "N5":
+            self.print_line("[LOCKED] ttt tools are for N5.")
+            return
+        if not args:
+            self.print_line("Usage: ttt status|reset")
+            return
+        g = self.current_game
+        if not g or getattr(g, "game_id", "") != "tictactoe":
+            self.mount_game("tictactoe")
+            g = self.current_game
+        action = str(args[0]).lower()
+        if action == "status":
+            if hasattr(g, "round_index") and hasattr(g, "results"):
+                self.print_line(f"[TTT] Round {g.round_index + 1}/{g.rounds} Results: {''.join(g.results) or '(none)'}")
+            else:
+                self.print_line("[TTT] status unavailable")
+        elif action == "reset":
+            if hasattr(g, "_reset_round"):
+                g._reset_round()
+                self.print_line("[TTT] Round reset.")
+            else:
+                self.print_line("[TTT] reset unavailable")
+        else:
+            self.print_line("Usage: ttt status|reset")
+
+    def cmd_unlock(self, args):
+        if self.state["current_node"] != "N7":
+            self.print_line("[LOCKED] unlock is only available in N7 (Goal).")
+            return
+        if not args:
+            self.print_line("Usage: unlock <anything>")
+            return
+        provided = " ".join(args).strip()
+        self.print_line(f"[N7] You answered: {provided}")
+        self.print_line("[N7] Celebration mode: any answer completes the game.")
+        self.award_game("final")
+        self.print_line("[END] Timeline restored. Everything is dancing.")
+
+    def cmd_godskip(self, args):
+        nid = self.state["current_node"]
+        expected = str(self.node_cfg(nid).get("godskip", "")).strip()
+        if not args:
+            self.print_line("Usage: godskip <CODE>")
+            self.print_line(f"[HINT] Format example: GOD-{nid}-XXXX")
+            return
+
+        raw = " ".join(args).strip()
+
+        variants = {raw}
+        compact = raw.replace(" ", "")
+        variants.add(compact)
+        variants.add(compact.upper())
+
+        digits = "".join(ch for ch in raw if ch.isdigit())
+        if digits:
+            variants.add(f"{nid}-{digits}")
+            variants.add(f"GOD-{nid}-{digits}")
+
+        matched = any(v == expected for v in variants)
+        if not matched:
+            self.print_line("[NO] Invalid godskip code.")
+            self.print_line(f"[HINT] For {nid}, try: {expected}")
+            return
+
+        routes = self.node_cfg(nid).get("routes", [])
+        if not routes:
+            self.print_line("[INFO] No further route from this node.")
+            return
+        nxt = routes[0]
+        self.unlock_node(nxt, "godskip")
+        self.enter_node(nxt)
+
+    def _final_password(self) -> str:
+        tokens = sorted(self.state.get("tokens", []))
+        seed = (self.state.get("player_name", "") + "|" + "|".join(tokens)).encode("utf-8")
+        digest = hashlib.sha256(seed).hexdigest()
+        return "axis-" + digest[:10]
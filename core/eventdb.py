@@ -1,6 +1,8 @@
 import json
 import os
+import queue
 import sqlite3
+import threading
 import time
 
 class EncryptedEventDB:
@@ -27,13 +29,20 @@ class EncryptedEventDB:
         finally:
             con.close()
 
-    def log(self, kind: str, obj: dict):
+    def log(self, kind: str, obj: dict, ts=None):
+        try:
+            raw = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        except Exception:
+            return
+        self.write(kind, raw, ts)
+
+    def write(self, kind: str, raw: bytes, ts=None):
+        """Encrypts and stores an already serialised payload."""
         pw = self.password_getter()
         if not pw:
             return
         try:
-            ts = int(time.time())
-            raw = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            ts = int(time.time() if ts is None else ts)
             enc = self.encryption.encrypt_bytes(raw, pw)
             con = sqlite3.connect(self.db_path)
             try:
@@ -47,3 +56,66 @@ class EncryptedEventDB:
                 con.close()
         except Exception:
             pass
+
+
+class EventWriter:
+    """
+    Event-log writes on a background thread.
+
+    Every encrypted write pays a full PBKDF2 key derivation (tens of ms), far
+    more than a UI slice can absorb, so the caller only serialises and stamps
+    the event; the thread encrypts and inserts. flush() waits for the queue
+    to drain (on quit). With threaded=False (headless) writes happen inline.
+    """
+
+    def __init__(self, db: EncryptedEventDB, threaded: bool = True):
+        self.db = db
+        self.threaded = threaded
+        self.written = 0
+        self._q: "queue.Queue" = queue.Queue()
+        self._thread = None
+
+    def put(self, kind: str, obj: dict, ts=None) -> None:
+        try:
+            # Serialised now: the caller may keep mutating obj after this returns.
+            raw = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        except Exception:
+            return
+        ts = time.time() if ts is None else ts
+        if not self.threaded:
+            self._write(kind, raw, ts)
+            return
+        self._q.put((kind, raw, ts))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="eventdb", daemon=True)
+            self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._q.unfinished_tasks
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits up to `timeout` seconds for queued writes; False if some are still pending."""
+        deadline = time.monotonic() + timeout
+        with self._q.all_tasks_done:
+            while self._q.unfinished_tasks:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._q.all_tasks_done.wait(left)
+        return True
+
+    def _write(self, kind: str, raw: bytes, ts) -> None:
+        try:
+            self.db.write(kind, raw, ts)
+            self.written += 1
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            kind, raw, ts = self._q.get()
+            try:
+                self._write(kind, raw, ts)
+            finally:
+                self._q.task_done()
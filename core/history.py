@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+def _trigrams(text: str):
+    t = text.lower()
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+class CommandHistory:
+    """
+    Capped ring buffer of command lines with an append-only backing file.
+
+    Every entry gets a monotonically increasing sequence number; the buffer
+    keeps the last `capacity` of them. A trigram index (trigram -> ascending
+    deque of seqs) backs reverse substring search, so a lookup only verifies
+    entries that share the rarest trigram of the query instead of scanning
+    the whole buffer.
+
+    `redact(line)` (optional) gives the text written to the backing file, so
+    secrets typed as command arguments stay in memory only.
+    """
+
+    def __init__(self, capacity: int = 10_000, path: Optional[str] = None,
+                 redact: Optional[Callable[[str], str]] = None):
+        self.capacity = max(1, int(capacity))
+        self.redact = redact
+        self._buf: List[Optional[str]] = [None] * self.capacity
+        self._next = 0
+        self._grams: Dict[str, Deque[int]] = {}
+        self.path: Optional[str] = None
+        if path:
+            self.attach(path)
+
+    # --- buffer ---
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    @property
+    def first_seq(self) -> int:
+        return max(0, self._next - self.capacity)
+
+    @property
+    def last_seq(self) -> int:
+        """Seq of the newest entry, or -1 when empty."""
+        return self._next - 1
+
+    def get(self, seq: int) -> Optional[str]:
+        if seq < self.first_seq or seq >= self._next:
+            return None
+        return self._buf[seq % self.capacity]
+
+    def __iter__(self) -> Iterator[str]:
+        for seq in range(self.first_seq, self._next):
+            yield self._buf[seq % self.capacity]
+
+    def tail(self, n: int) -> List[Tuple[int, str]]:
+        """The newest `n` entries as (1-based number, line), oldest first."""
+        start = max(self.first_seq, self._next - max(0, n))
+        return [(seq + 1, self._buf[seq % self.capacity]) for seq in range(start, self._next)]
+
+    def append(self, line: str, persist: bool = True) -> None:
+        line = (line or "").replace("\n", " ").strip()
+        if not line:
+            return
+        if self._next and self.get(self.last_seq) == line:
+            return
+
+        if self._next >= self.capacity:
+            self._evict(self._next - self.capacity)
+
+        seq = self._next
+        self._buf[seq % self.capacity] = line
+        self._next += 1
+        for g in _trigrams(line):
+            self._grams.setdefault(g, deque()).append(seq)
+
+        if persist and self.path:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(self._disk_line(line) + "\n")
+            except OSError:
+                pass
+
+    def _evict(self, seq: int) -> None:
+        old = self._buf[seq % self.capacity]
+        if old is None:
+            return
+        # The evicted entry is the oldest, so its seq sits at the front of each posting list.
+        for g in _trigrams(old):
+            postings = self._grams.get(g)
+            if not postings:
+                continue
+            while postings and postings[0] <= seq:
+                postings.popleft()
+            if not postings:
+                del self._grams[g]
+
+    # --- search ---
+
+    def search(self, query: str, before: Optional[int] = None) -> Optional[Tuple[int, str]]:
+        """Newest entry older than `before` containing `query` (case-insensitive)."""
+        limit = self._next if before is None else min(before, self._next)
+        lo = self.first_seq
+        if limit <= lo:
+            return None
+        q = (query or "").lower()
+        if not q:
+            return (limit - 1, self.get(limit - 1))
+
+        grams = _trigrams(q)
+        if not grams:
+            for seq in range(limit - 1, lo - 1, -1):
+                line = self._buf[seq % self.capacity]
+                if q in line.lower():
+                    return seq, line
+            return None
+
+        postings = []
+        for g in grams:
+            p = self._grams.get(g)
+            if not p:
+                return None
+            postings.append(p)
+        rarest = min(postings, key=len)
+        # reversed() walks the deque from the right; indexing its middle is O(n) per step.
+        for seq in reversed(rarest):
+            if seq >= limit:
+                continue
+            if seq < lo:
+                break
+            line = self._buf[seq % self.capacity]
+            if q in line.lower():
+                return seq, line
+        return None
+
+    # --- persistence ---
+
+    def _disk_line(self, line: str) -> str:
+        if self.redact is None:
+            return line
+        try:
+            return self.redact(line) or line
+        except Exception:
+            return line
+
+    def attach(self, path: str) -> None:
+        """Loads the newest entries from `path` and appends new lines to it from now on."""
+        self.path = path
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                lines = [ln.rstrip("\n") for ln in f]
+        except OSError:
+            return
+
+        for line in lines[-self.capacity:]:
+            self.append(line, persist=False)
+
+        # Keep the append-only file from growing without bound.
+        if len(lines) > 2 * self.capacity:
+            tmp = path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for line in self:
+                        f.write(self._disk_line(line) + "\n")
+                os.replace(tmp, path)
+            except OSError:
+                pass
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class IdleTask:
+    def __init__(self, task_id: int, name: str, task, priority: int, quiet_ms: float):
+        self.id = task_id
+        self.name = name
+        self.task = task
+        self.priority = priority
+        self.quiet_ms = quiet_ms
+        self.state = "ready"
+        self.steps = 0
+        self.busy_ms = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return self.state == "ready"
+
+
+class IdleScheduler:
+    """
+    Low-priority work that only runs while the UI has nothing else to do.
+
+    A task is a generator; each `next()` is one step. Slices start from the
+    toolkit's idle queue (`after_idle`, which only fires once pending input
+    and redraws are handled) and run steps, highest priority first, until
+    `budget_ms` is spent; a task whose average step would not fit in what is
+    left waits for the next slice. A step is never interrupted, so tasks
+    keep their steps short.
+
+    Input (`note_input`) holds off the next slice for `quiet_ms`, so typing
+    never queues behind idle work. A task with its own, longer `quiet_ms`
+    only steps after that long a pause; that is for steps that cannot fit in
+    a slice, such as one encrypted write.
+
+    With after_idle=None (headless) tasks run to completion when submitted.
+    """
+
+    def __init__(
+        self,
+        after_idle: Optional[Callable[[Callable], Any]] = None,
+        after: Optional[Callable[[int, Callable], Any]] = None,
+        budget_ms: float = 4.0,
+        quiet_ms: float = 60.0,
+        on_event: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.after_idle = after_idle
+        self.after = after
+        self.budget_ms = budget_ms
+        self.quiet_ms = quiet_ms
+        self.on_event = on_event or (lambda msg: None)
+        self.clock = clock
+        self.tasks: Dict[int, IdleTask] = {}
+        self._next_id = 1
+        self._pending = False
+        self._last_input = float("-inf")
+
+        self.submitted = 0
+        self.finished = 0
+        self.failed = 0
+        self.slices = 0
+        self.steps = 0
+        self.deferred = 0
+        self.overruns = 0
+        self.busy_ms = 0.0
+        self.max_slice_ms = 0.0
+
+    @property
+    def realtime(self) -> bool:
+        return self.after_idle is not None
+
+    def submit(self, name: str, task, priority: int = 0, quiet_ms: float = 0.0) -> IdleTask:
+        t = IdleTask(self._next_id, name, task, priority, quiet_ms)
+        self._next_id += 1
+        self.tasks[t.id] = t
+        self.submitted += 1
+        if self.after_idle is None:
+            self._finish(t)
+        else:
+            self._wake()
+        return t
+
+    def list(self) -> List[IdleTask]:
+        return sorted(self.tasks.values(), key=lambda t: (-t.priority, t.id))
+
+    def cancel(self, task: Optional[IdleTask]) -> bool:
+        if task is None or not task.alive:
+            return False
+        task.state = "cancelled"
+        try:
+            task.task.close()
+        except Exception:
+            pass
+        self.tasks.pop(task.id, None)
+        return True
+
+    def flush(self, name: Optional[str] = None) -> int:
+        """Runs queued tasks (all, or those called `name`) to completion now."""
+        n = 0
+        for t in self.list():
+            if name is None or t.name == name:
+                self._finish(t)
+                n += 1
+        return n
+
+    def note_input(self, event=None) -> None:
+        self._last_input = self.clock()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self.tasks),
+            "submitted": self.submitted,
+            "finished": self.finished,
+            "failed": self.failed,
+            "slices": self.slices,
+            "steps": self.steps,
+            "deferred": self.deferred,
+            "overruns": self.overruns,
+            "busy_ms": round(self.busy_ms, 3),
+            "max_slice_ms": round(self.max_slice_ms, 3),
+        }
+
+    # --- running ---
+
+    def _finish(self, t: IdleTask) -> None:
+        while t.alive:
+            self._step(t)
+
+    def _step(self, t: IdleTask) -> None:
+        t0 = self.clock()
+        try:
+            next(t.task)
+        except StopIteration:
+            t.state = "done"
+            self.finished += 1
+            self.tasks.pop(t.id, None)
+        except Exception as e:
+            t.state = "failed"
+            self.failed += 1
+            self.tasks.pop(t.id, None)
+            self.on_event(f"[IDLE] {t.name} failed: {e}")
+        ms = (self.clock() - t0) * 1000.0
+        t.steps += 1
+        t.busy_ms += ms
+        self.steps += 1
+
+    def _quiet_left_ms(self, now: float, quiet_ms: float) -> float:
+        return quiet_ms - (now - self._last_input) * 1000.0
+
+    def _ready(self, now: float) -> Optional[IdleTask]:
+        for t in self.list():
+            if self._quiet_left_ms(now, t.quiet_ms) <= 0:
+                return t
+        return None
+
+    def _wake(self, delay_ms: float = 0.0) -> None:
+        if self._pending or self.after_idle is None:
+            return
+        self._pending = True
+        if delay_ms > 0 and self.after is not None:
+            self.after(int(delay_ms) + 1, lambda: self.after_idle(self._slice))
+        else:
+            self.after_idle(self._slice)
+
+    def _slice(self) -> None:
+        self._pending = False
+        if not self.tasks:
+            return
+        start = self.clock()
+        wait = self._quiet_left_ms(start, self.quiet_ms)
+        if wait > 0:
+            self.deferred += 1
+            self._wake(wait)
+            return
+
+        deadline = start + self.budget_ms / 1000.0
+        now = start
+        ran = 0
+        while True:
+            t = self._ready(now)
+            if t is None:
+                break
+            # After the first step, only start one that typically fits in what is left.
+            if ran and t.steps and t.busy_ms / t.steps > (deadline - now) * 1000.0:
+                break
+            self._step(t)
+            ran += 1
+            now = self.clock()
+            if now >= deadline:
+                break
+
+        ms = (now - start) * 1000.0
+        self.slices += 1
+        self.busy_ms += ms
+        self.max_slice_ms = max(self.max_slice_ms, ms)
+        if ms > self.budget_ms:
+            self.overruns += 1
+
+        if not self.tasks:
+            return
+        if self._ready(now) is not None:
+            self._wake()
+        else:
+            self._wake(min(self._quiet_left_ms(now, t.quiet_ms) for t in self.tasks.values()))
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Sleep:
+    """`await Sleep(s)` inside a coroutine job; generator jobs just `yield s`."""
+
+    def __init__(self, seconds: float):
+        self.seconds = max(0.0, float(seconds))
+
+    def __await__(self):
+        yield self.seconds
+
+
+class Job:
+    def __init__(self, job_id: int, name: str, task):
+        self.id = job_id
+        self.name = name
+        self.task = task
+        self.state = "ready"
+        self.wake_at = 0.0
+        self.steps = 0
+        self.started = time.monotonic()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.state in ("ready", "sleeping")
+
+
+class JobScheduler:
+    """
+    Cooperative time-sliced jobs on the UI event loop.
+
+    A job is a generator or coroutine. `yield` (or `yield None`) offers to give
+    up the thread; `yield 0.5` / `await Sleep(0.5)` sleeps without blocking.
+    Each tick runs ready jobs round-robin until `slice_ms` is spent, then
+    reschedules itself through `schedule(delay_ms, fn)` (e.g. Tk `after`).
+
+    With schedule=None (headless) jobs run to completion as soon as they are
+    spawned and sleeps are skipped.
+    """
+
+    def __init__(
+        self,
+        schedule: Optional[Callable[[int, Callable], Any]] = None,
+        on_event: Optional[Callable[[str], None]] = None,
+        slice_ms: float = 8.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.schedule = schedule
+        self.on_event = on_event or (lambda msg: None)
+        self.slice_ms = slice_ms
+        self.clock = clock
+        self.jobs: Dict[int, Job] = {}
+        self._next_id = 1
+        self._tick_pending = False
+
+    def spawn(self, name: str, task) -> Job:
+        job = Job(self._next_id, name, task)
+        self._next_id += 1
+        self.jobs[job.id] = job
+        if self.schedule is None:
+            self._finish(job)
+        else:
+            self._wake()
+        return job
+
+    def list(self) -> List[Job]:
+        return [j for j in self.jobs.values() if j.alive]
+
+    def get(self, job_id: int) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        return job if job is not None and job.alive else None
+
+    def kill(self, job_id: int) -> bool:
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.state = "killed"
+        try:
+            job.task.close()
+        except Exception:
+            pass
+        self.jobs.pop(job.id, None)
+        return True
+
+    def kill_all(self) -> int:
+        return sum(1 for j in list(self.jobs.values()) if self.kill(j.id))
+
+    def fg(self, job_id: int) -> bool:
+        """Runs a job to completion right now, skipping its remaining sleeps."""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        self._finish(job)
+        return True
+
+    def drain(self) -> None:
+        for job in list(self.jobs.values()):
+            if job.alive:
+                self._finish(job)
+
+    def _finish(self, job: Job) -> None:
+        while job.alive:
+            self._step(job)
+
+    def _step(self, job: Job) -> None:
+        job.steps += 1
+        try:
+            out = job.task.send(None)
+        except StopIteration as stop:
+            job.state = "done"
+            job.result = stop.value
+            self.jobs.pop(job.id, None)
+            return
+        except Exception as e:
+            job.state = "failed"
+            job.error = e
+            self.jobs.pop(job.id, None)
+            self.on_event(f"[JOB {job.id}] {job.name} failed: {e}")
+            return
+        if isinstance(out, (int, float)) and out > 0:
+            job.state = "sleeping"
+            job.wake_at = self.clock() + float(out)
+        else:
+            job.state = "ready"
+
+    def _wake(self, delay_ms: int = 0) -> None:
+        if self._tick_pending or self.schedule is None:
+            return
+        self._tick_pending = True
+        self.schedule(max(0, int(delay_ms)), self._tick)
+
+    def _tick(self) -> None:
+        self._tick_pending = False
+        deadline = self.clock() + self.slice_ms / 1000.0
+
+        while True:
+            now = self.clock()
+            ready = []
+            for job in list(self.jobs.values()):
+                if job.state == "sleeping" and job.wake_at <= now:
+                    job.state = "ready"
+                if job.state == "ready":
+                    ready.append(job)
+            if not ready:
+                break
+            for job in ready:
+                if job.alive:
+                    self._step(job)
+            if self.clock() >= deadline:
+                break
+
+        if not self.jobs:
+            return
+        if any(j.state == "ready" for j in self.jobs.values()):
+            self._wake(1)
+            return
+        soonest = min(j.wake_at for j in self.jobs.values())
+        self._wake((soonest - self.clock()) * 1000.0)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from typing import Dict, Optional
+
+# Buckets grow by 2**(1/8) (~9%), starting at 1 microsecond.
+_BUCKETS_PER_DOUBLING = 8
+_MIN_MS = 0.001
+
+
+class StreamingHistogram:
+    """Log-bucketed latency histogram: constant memory, ~9% percentile error."""
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total += ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+        b = 0 if ms <= _MIN_MS else int(math.log2(ms / _MIN_MS) * _BUCKETS_PER_DOUBLING) + 1
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                upper = _MIN_MS if b == 0 else _MIN_MS * 2 ** (b / _BUCKETS_PER_DOUBLING)
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 4),
+            "p95_ms": round(self.percentile(0.95), 4),
+            "p99_ms": round(self.percentile(0.99), 4),
+            "max_ms": round(self.max, 4),
+        }
+
+
+class PerfRecorder:
+    """
+    Named latency histograms for the command hot path.
+    Call sites check `enabled` before reading the clock, so a disabled
+    recorder costs one attribute lookup per measurement point.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.metrics: Dict[str, StreamingHistogram] = {}
+        self.started = time.time()
+
+    def record(self, name: str, ms: float) -> None:
+        h = self.metrics.get(name)
+        if h is None:
+            h = self.metrics[name] = StreamingHistogram()
+        h.add(ms)
+
+    def since(self, name: str, t0: float) -> float:
+        """Records perf_counter() - t0 under `name`; returns now for chaining."""
+        now = time.perf_counter()
+        self.record(name, (now - t0) * 1000.0)
+        return now
+
+    def reset(self) -> None:
+        self.metrics.clear()
+        self.started = time.time()
+
+    def report(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "since": self.started,
+            "metrics": {k: self.metrics[k].summary() for k in sorted(self.metrics)},
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def table(self, prefix: Optional[str] = None):
+        rows = [f"{'metric':<22} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        for name in sorted(self.metrics):
+            if prefix and not name.startswith(prefix):
+                continue
+            s = self.metrics[name].summary()
+            rows.append(
+                f"{name:<22} {s['count']:>7} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}"
+            )
+        return rows
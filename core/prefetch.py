@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Iterable, Set
+
+
+class NodePrefetcher:
+    """
+    Warms nodes the player is likely to enter next.
+
+    After an unlock, each new node is warmed in small steps on the idle
+    scheduler: its story is formatted, its game modules imported, its game
+    panels built (hidden) by the view, and its narration queued for
+    pre-rendering. `travel` then finds everything ready.
+
+    Only runs with a realtime view; headless sessions have nothing to warm.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queue: Deque[str] = deque()
+        self.warmed: Set[str] = set()
+        self.task = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(getattr(self.engine.view, "realtime", False))
+
+    def request(self, node_ids: Iterable[str]) -> int:
+        if not self.enabled:
+            return 0
+        n = 0
+        for nid in node_ids:
+            if nid in self.warmed or nid in self.queue or nid not in self.engine.cfg.get("nodes", {}):
+                continue
+            self.queue.append(nid)
+            n += 1
+        if self.queue and (self.task is None or not self.task.alive):
+            self.task = self.engine.idle.submit("prefetch", self._run())
+        return n
+
+    def reset(self) -> None:
+        """Forgets everything warmed (the view's panels are gone), keeping the hit counters."""
+        self.queue.clear()
+        self.warmed.clear()
+        if self.task is not None:
+            self.engine.idle.cancel(self.task)
+            self.task = None
+
+    def forget_game(self, game_id: str) -> None:
+        """A prefetched panel was evicted: nodes that open with it are no longer warm."""
+        self.warmed = {nid for nid in self.warmed if self._first_game(nid) != game_id}
+
+    def _first_game(self, nid: str):
+        games = [g.get("id") for g in self.engine.node_cfg(nid).get("games", []) if g.get("id")]
+        return games[0] if games else None
+
+    def note_enter(self, node_id: str) -> None:
+        if not self.enabled:
+            return
+        if node_id in self.warmed:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def _run(self):
+        while self.queue:
+            nid = self.queue.popleft()
+            yield from self._warm(nid)
+            self.warmed.add(nid)
+
+    def _warm(self, nid: str):
+        engine = self.engine
+        lines = engine.narration_lines([nid])
+        yield
+        games = [g.get("id") for g in engine.node_cfg(nid).get("games", []) if g.get("id")]
+        for gid in games:
+            engine.game_registry.preload(gid)
+            yield
+        if games:
+            # enter_node mounts the first game, so that panel is the one worth building.
+            # The view may decline (no room without evicting a game in progress).
+            engine.view.prefetch_game(games[0])
+            yield
+        engine.view.prefetch_narration(lines)
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self.queue),
+            "warmed": len(self.warmed),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import time
+from typing import List, Optional, Tuple
+
+
+class StartupProfiler:
+    """
+    Timeline of startup phases, measured from process start (or construction).
+
+    `phase(name)` records a span, `mark(name)` a milestone such as the first
+    drawn frame. Recording is always on and costs two clock reads per phase;
+    only `--profile-startup` prints or writes it.
+    """
+
+    def __init__(self, enabled: bool = False, t0: Optional[float] = None, path: Optional[str] = None):
+        self.enabled = enabled
+        self.path = path
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.phases: List[Tuple[str, float, float]] = []
+        self.marks: List[Tuple[str, float]] = []
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start, self._now_ms() - start))
+
+    def mark(self, name: str) -> float:
+        at = self._now_ms()
+        self.marks.append((name, at))
+        return at
+
+    def get_mark(self, name: str) -> Optional[float]:
+        for n, at in self.marks:
+            if n == name:
+                return at
+        return None
+
+    def report(self) -> dict:
+        return {
+            "phases": [{"name": n, "start_ms": round(s, 3), "ms": round(d, 3)} for n, s, d in self.phases],
+            "marks": {n: round(at, 3) for n, at in self.marks},
+        }
+
+    def lines(self) -> List[str]:
+        rows = [f"{'phase':<24} {'start':>9} {'ms':>9}"]
+        for n, s, d in sorted(self.phases, key=lambda p: p[1]):
+            rows.append(f"{n:<24} {s:>9.1f} {d:>9.1f}")
+        for n, at in self.marks:
+            rows.append(f"@ {n:<22} {at:>9.1f}")
+        return rows
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
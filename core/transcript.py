@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import os
+import time
+from array import array
+from typing import Optional
+
+
+class Transcript:
+    """
+    Append-only session transcript with a line index for paging.
+
+    Every line written this session is appended to `path`; `offsets[i]` is the
+    byte offset where line i starts, so any range of lines can be read back
+    with one seek instead of keeping them in memory. Older sessions stay in the
+    file (a header line marks each start) but are not indexed.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16_000_000):
+        self.path = path
+        self.offsets = array("q")
+        self.ok = True
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+                os.replace(path, path + ".1")
+            with open(path, "ab") as f:
+                f.write(f"=== session {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n".encode("utf-8"))
+                self.offsets.append(f.tell())
+        except OSError:
+            self.ok = False
+
+    @property
+    def line_count(self) -> int:
+        return max(0, len(self.offsets) - 1)
+
+    def append(self, text: str) -> None:
+        """Appends text that ends with a newline; each newline closes one indexed line."""
+        if not self.ok or not text:
+            return
+        data = text.encode("utf-8", "replace")
+        try:
+            with open(self.path, "ab") as f:
+                f.write(data)
+        except OSError:
+            self.ok = False
+            return
+        base = self.offsets[-1]
+        i = data.find(b"\n")
+        while i != -1:
+            self.offsets.append(base + i + 1)
+            i = data.find(b"\n", i + 1)
+
+    def read(self, start: int, end: int) -> Optional[str]:
+        """Lines [start, end) joined, each ending in a newline; None if unavailable."""
+        start = max(0, start)
+        end = min(end, self.line_count)
+        if start >= end:
+            return ""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offsets[start])
+                data = f.read(self.offsets[end] - self.offsets[start])
+        except OSError:
+            return None
+        return data.decode("utf-8", "replace")
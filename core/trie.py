@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "value", "count")
+
+    def __init__(self):
+        self.children: dict = {}
+        self.terminal = False
+        self.value: Any = None
+        self.count = 0
+
+
+class Trie:
+    """
+    Prefix tree with per-node word counts, so `unique()` and `complete()` cost
+    O(len(prefix) + results) no matter how many words are stored.
+
+    Keys are case-folded when `fold=True`; the original spelling is kept as the
+    stored value and returned by lookups.
+    """
+
+    def __init__(self, words: Iterable[str] = (), fold: bool = False):
+        self.fold = fold
+        self._root = _Node()
+        for w in words:
+            self.add(w)
+
+    def _key(self, word: str) -> str:
+        return word.lower() if self.fold else word
+
+    def __len__(self) -> int:
+        return self._root.count
+
+    def __contains__(self, word: str) -> bool:
+        node = self._find(self._key(word))
+        return node is not None and node.terminal
+
+    def _find(self, key: str) -> Optional[_Node]:
+        node = self._root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def add(self, word: str, value: Any = None) -> bool:
+        key = self._key(word)
+        if not key:
+            return False
+        existing = self._find(key)
+        if existing is not None and existing.terminal:
+            existing.value = word if value is None else value
+            return False
+        node = self._root
+        node.count += 1
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+            node.count += 1
+        node.terminal = True
+        node.value = word if value is None else value
+        return True
+
+    def discard(self, word: str) -> bool:
+        key = self._key(word)
+        target = self._find(key)
+        if target is None or not target.terminal:
+            return False
+        node = self._root
+        node.count -= 1
+        for ch in key:
+            child = node.children[ch]
+            child.count -= 1
+            if child.count == 0:
+                del node.children[ch]
+                return True
+            node = child
+        node.terminal = False
+        node.value = None
+        return True
+
+    def clear(self) -> None:
+        self._root = _Node()
+
+    def _walk(self, node: _Node) -> Iterator[Any]:
+        stack: List[_Node] = [node]
+        while stack:
+            cur = stack.pop()
+            if cur.terminal:
+                yield cur.value
+            for ch in sorted(cur.children.keys(), reverse=True):
+                stack.append(cur.children[ch])
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[Any]:
+        """Stored values starting with `prefix`, in key order."""
+        node = self._find(self._key(prefix))
+        if node is None:
+            return []
+        out = []
+        for v in self._walk(node):
+            out.append(v)
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+    def unique(self, prefix: str) -> Optional[Any]:
+        """The single value `prefix` identifies: an exact key, or the only key below it."""
+        node = self._find(self._key(prefix))
+        if node is None:
+            return None
+        if node.terminal:
+            return node.value
+        while node.count == 1 and not node.terminal:
+            (node,) = node.children.values()
+        return node.value if node.terminal and node.count == 1 else None
+
+    def extend(self, prefix: str) -> Tuple[str, int]:
+        """
+        Longest unambiguous extension of `prefix` (shell-style Tab) and the
+        number of keys below it.
+        """
+        key = self._key(prefix)
+        node = self._find(key)
+        if node is None:
+            return prefix, 0
+        total = node.count
+        tail = []
+        while not node.terminal and len(node.children) == 1:
+            ch, node = next(iter(node.children.items()))
+            tail.append(ch)
+        return prefix + "".join(tail), total
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import importlib.util
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+PRIORITY_ALERT = 0
+PRIORITY_NARRATION = 1
+PRIORITY_PRERENDER = 2
+
+
+class Utterance:
+    __slots__ = ("speaker", "text", "generation", "queued_at", "cancelled", "render_only")
+
+    def __init__(self, speaker: str, text: str, generation: int, render_only: bool = False):
+        self.speaker = speaker
+        self.text = text
+        self.generation = generation
+        self.queued_at = time.monotonic()
+        self.cancelled = False
+        self.render_only = render_only
+
+
+class SpeechWorker:
+    """
+    Text-to-speech on a dedicated thread.
+
+    pyttsx3 is imported, created and driven only on the worker thread, so the
+    Tk thread just puts lines on a priority queue. `preempt=True` (or `skip`)
+    moves to a new generation: queued lines from older generations are dropped
+    and the utterance in progress is stopped. Lines that waited longer than
+    `stale_after` seconds are dropped as well, since their text scrolled by.
+
+    Speaker -> voice id is resolved once per speaker and the voice property is
+    only set when it actually changes.
+
+    With a NarrationCache and a working AudioPlayer, lines are rendered to a
+    wav once (save_to_file) and played from disk afterwards; `prerender`
+    queues that rendering at the lowest priority so it only runs while
+    nothing is being spoken.
+    """
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[], object]] = None,
+        stale_after: float = 20.0,
+        voice_for: Optional[Callable[[str, list], Optional[str]]] = None,
+        cache=None,
+        player=None,
+    ):
+        if factory is None and importlib.util.find_spec("pyttsx3") is not None:
+            factory = _pyttsx3_init
+        self.factory = factory
+        self.stale_after = stale_after
+        self.voice_for = voice_for or _default_voice
+        self.muted = False
+        self.available = self.factory is not None
+        self.cache = cache
+        self.player = player
+        self.spoken = 0
+        self.dropped = 0
+        self.rendered = 0
+
+        self._q: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._generation = 0
+        self._thread: Optional[threading.Thread] = None
+        self._current: Optional[Utterance] = None
+        self._voices: Dict[str, Optional[str]] = {}
+
+    def start(self) -> bool:
+        if not self.available:
+            return False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+            self._thread.start()
+        return True
+
+    def say(self, speaker: str, text: str, priority: int = PRIORITY_NARRATION, preempt: bool = False) -> None:
+        if not self.available or self.muted or not text:
+            return
+        if preempt:
+            self._generation += 1
+        self._q.put((priority, next(self._seq), Utterance(speaker, text, self._generation)))
+
+    @property
+    def caching(self) -> bool:
+        """True when rendered wavs can be played back, so pre-rendering them is worth it."""
+        return self.available and self.cache is not None and self.player is not None and self.player.available
+
+    def prerender(self, lines) -> int:
+        """Queues (speaker, text) pairs for background rendering into the cache."""
+        if not self.caching:
+            return 0
+        n = 0
+        for speaker, text in lines:
+            if text:
+                self._q.put((PRIORITY_PRERENDER, next(self._seq), Utterance(speaker, text, 0, render_only=True)))
+                n += 1
+        return n
+
+    def skip(self, all_lines: bool = True) -> None:
+        """Stops the current utterance; with all_lines, drops everything queued too."""
+        if all_lines:
+            self._generation += 1
+        cur = self._current
+        if cur is not None:
+            cur.cancelled = True
+
+    def set_muted(self, muted: bool) -> None:
+        self.muted = bool(muted)
+        if self.muted:
+            self.skip()
+
+    def shutdown(self) -> None:
+        self.skip()
+        if self._thread is not None:
+            self._q.put((-1, next(self._seq), None))
+
+    # --- worker thread ---
+
+    def _run(self):
+        try:
+            # SAPI needs COM initialised on the thread that owns the engine.
+            import pythoncom
+            pythoncom.CoInitialize()
+        except Exception:
+            pass
+        try:
+            engine = self.factory()
+            voices = list(engine.getProperty("voices") or [])
+        except Exception:
+            self.available = False
+            return
+
+        # The external loop lets the worker poll for preemption between chunks;
+        # drivers without it fall back to a blocking runAndWait per line.
+        try:
+            engine.startLoop(False)
+            looped = True
+        except Exception:
+            looped = False
+
+        self._engine = engine
+        self._looped = looped
+        self._voice_set = None
+        while True:
+            _, _, utt = self._q.get()
+            if utt is None:
+                break
+            if self.muted:
+                self.dropped += 1
+                continue
+            voice = self._voice(utt.speaker, voices)
+
+            if utt.render_only:
+                key = self.cache.key(voice, utt.text)
+                if key not in self.cache:
+                    self._render(key, voice, utt.text)
+                continue
+
+            if utt.generation < self._generation or time.monotonic() - utt.queued_at > self.stale_after:
+                self.dropped += 1
+                continue
+
+            self._current = utt
+            try:
+                if not self._play_cached(voice, utt):
+                    self._set_voice(voice)
+                    engine.say(utt.text)
+                    self._run_engine(lambda: self.muted or utt.cancelled or utt.generation < self._generation)
+                self.spoken += 1
+            except Exception:
+                pass
+            self._current = None
+
+        try:
+            if looped:
+                engine.endLoop()
+        except Exception:
+            pass
+
+    def _play_cached(self, voice: Optional[str], utt: Utterance) -> bool:
+        if not self.caching:
+            return False
+        key = self.cache.key(voice, utt.text)
+        path = self.cache.get(key) or self._render(key, voice, utt.text)
+        if path is None:
+            return False
+        return self.player.play(path, lambda: self.muted or utt.cancelled or utt.generation < self._generation)
+
+    def _render(self, key: str, voice: Optional[str], text: str) -> Optional[str]:
+        path = self.cache.path_for(key)
+        try:
+            self._set_voice(voice)
+            self._engine.save_to_file(text, path)
+            self._run_engine(lambda: False)
+        except Exception:
+            return None
+        if not self.cache.add(key):
+            return None
+        self.rendered += 1
+        return path
+
+    def _set_voice(self, voice: Optional[str]):
+        if voice and voice != self._voice_set:
+            self._engine.setProperty("voice", voice)
+            self._voice_set = voice
+
+    def _run_engine(self, should_stop):
+        engine = self._engine
+        if not self._looped:
+            engine.runAndWait()
+            return
+        engine.iterate()
+        while engine.isBusy():
+            if should_stop():
+                engine.stop()
+                engine.iterate()
+                return
+            time.sleep(0.01)
+            engine.iterate()
+
+    def _voice(self, speaker: str, voices: list) -> Optional[str]:
+        if speaker not in self._voices:
+            try:
+                self._voices[speaker] = self.voice_for(speaker, voices)
+            except Exception:
+                self._voices[speaker] = None
+        return self._voices[speaker]
+
+
+def _pyttsx3_init():
+    import pyttsx3
+    return pyttsx3.init()
+
+
+def _default_voice(speaker: str, voices: list) -> Optional[str]:
+    if not voices:
+        return None
+    if speaker == "JESSICA" and len(voices) >= 2:
+        return voices[1].id
+    return voices[0].id
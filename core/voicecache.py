@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import threading
+import time
+import wave
+from typing import Dict, Optional, Tuple
+
+try:
+    import simpleaudio
+except Exception:
+    simpleaudio = None
+
+try:
+    import winsound
+except Exception:
+    winsound = None
+
+
+class NarrationCache:
+    """
+    Rendered narration audio on disk, keyed by sha1(voice, text).
+
+    Entries are evicted least-recently-played first once the directory passes
+    `max_bytes`. Recency is the file mtime (touched on every hit), so the
+    order survives restarts without a separate index file.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64_000_000):
+        self.dir = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._total = 0
+        try:
+            os.makedirs(directory, exist_ok=True)
+            for e in os.scandir(directory):
+                if e.is_file() and e.name.endswith(".wav"):
+                    st = e.stat()
+                    self._entries[e.name[:-4]] = (st.st_size, st.st_mtime)
+                    self._total += st.st_size
+        except OSError:
+            pass
+
+    @staticmethod
+    def key(voice: Optional[str], text: str) -> str:
+        return hashlib.sha1(f"{voice or ''}\0{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.dir, key + ".wav")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = time.time()
+            self._entries[key] = (entry[0], now)
+        path = self.path_for(key)
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            self.forget(key)
+            return None
+        return path
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def add(self, key: str) -> bool:
+        """Registers a file just rendered to path_for(key); evicts if over budget."""
+        try:
+            size = os.path.getsize(self.path_for(key))
+        except OSError:
+            return False
+        if size <= 0:
+            self.forget(key)
+            return False
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                self._total -= old[0]
+            self._entries[key] = (size, time.time())
+            self._total += size
+        self.evict(keep=key)
+        return True
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total -= entry[0]
+        try:
+            os.remove(self.path_for(key))
+        except OSError:
+            pass
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return 0
+            order = sorted(self._entries.items(), key=lambda kv: kv[1][1])
+        removed = 0
+        for key, (size, _) in order:
+            if self._total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.forget(key)
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        keys = list(self._entries)
+        for key in keys:
+            self.forget(key)
+        return len(keys)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class AudioPlayer:
+    """Plays a wav file and can be stopped; simpleaudio if installed, else winsound on Windows."""
+
+    def __init__(self):
+        self.available = simpleaudio is not None or (winsound is not None and sys.platform == "win32")
+
+    def play(self, path: str, should_stop) -> bool:
+        """Blocks until playback ends or should_stop() is true. False if it could not play."""
+        if simpleaudio is not None:
+            try:
+                obj = simpleaudio.WaveObject.from_wave_file(path).play()
+            except Exception:
+                return False
+            while obj.is_playing():
+                if should_stop():
+                    obj.stop()
+                    break
+                time.sleep(0.02)
+            return True
+
+        if winsound is not None:
+            try:
+                with wave.open(path, "rb") as w:
+                    seconds = w.getnframes() / float(w.getframerate() or 1)
+                winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            except Exception:
+                return False
+            end = time.monotonic() + seconds
+            while time.monotonic() < end:
+                if should_stop():
+                    winsound.PlaySound(None, winsound.SND_PURGE)
+                    break
+                time.sleep(0.02)
+            return True
+
+        return False
+
@@ -0,0 +1,103 @@
+import json
+import os
+import random
+from dataclasses import dataclass
+
+GAME_CATALOG = ["colors", "chess", "codes", "regex", "tictactoe", "dilemma", "final"]
+SPEAKERS = ["NARRATOR", "JESSICA", "ARIA"]
+WORDS = [
+    "clock", "signal", "node", "timeline", "relay", "echo", "cipher", "lattice",
+    "vault", "pulse", "drift", "anchor", "glyph", "static", "orbit", "trace",
+]
+
+
+@dataclass
+class WorldSpec:
+    nodes: int = 1000
+    fanout: int = 3
+    dialogue: int = 6
+    games_per_node: int = 1
+    hints_per_node: int = 10
+    words_per_line: int = 18
+    seed: int = 1970
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(max(1, n_words))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def generate_world(spec: WorldSpec) -> dict:
+    """
+    Builds a synthetic config with the same shape as nodes.json.
+    Node N(i) always routes to N(i+1) so the whole world is reachable;
+    the remaining fan-out picks random later nodes.
+    """
+    rng = random.Random(spec.seed)
+    count = max(1, int(spec.nodes))
+    ids = [f"N{i}" for i in range(1, count + 1)]
+
+    nodes = {}
+    for i, nid in enumerate(ids):
+        routes = []
+        if i + 1 < count:
+            routes.append(ids[i + 1])
+            later = ids[i + 2:]
+            extra = min(max(0, spec.fanout - 1), len(later))
+            if extra:
+                routes.extend(rng.sample(later, extra))
+
+        intro = []
+        for j in range(spec.dialogue):
+            text = _sentence(rng, spec.words_per_line)
+            if j == 0:
+                text = "Steady, {player}. " + text
+            intro.append({"speaker": rng.choice(SPEAKERS), "text": text})
+
+        hints = [
+            {"id": f"h{k}", "text": _sentence(rng, spec.words_per_line), "cost": rng.randint(1, 8)}
+            for k in range(1, spec.hints_per_node + 1)
+        ]
+
+        games = []
+        for k in range(spec.games_per_node):
+            gid = GAME_CATALOG[(i + k) % len(GAME_CATALOG)]
+            games.append({
+                "id": gid,
+                "title": f"Synthetic {gid} {nid}",
+                "solve_points": rng.randint(4, 16),
+                "token": f"TOK-{nid}-{k}",
+                "answer": rng.randint(100, 99999),
+            })
+
+        minute = i % (24 * 60)
+        nodes[nid] = {
+            "title": f"Synthetic Node {nid}",
+            "time": f"{minute // 60:02d}:{minute % 60:02d}",
+            "godskip": f"GOD-{nid}-{rng.randint(1000, 9999)}",
+            "routes": routes,
+            "intro": intro,
+            "hints": hints,
+            "games": games,
+            "year": 1970 + (i % 60),
+            "era_story": _sentence(rng, spec.words_per_line),
+        }
+
+    return {
+        "meta": {
+            "title": f"Synthetic World ({count} nodes)",
+            "hint_cooldown_seconds": 0,
+            "goal_node": ids[-1],
+            "timeline_anchor_year": 1970,
+        },
+        "nodes": nodes,
+    }
+
+
+def write_world(spec: WorldSpec, out_dir: str, filename: str = "nodes.json") -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(generate_world(spec), f, ensure_ascii=False)
+    return path
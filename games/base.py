@@ -14,8 +14,9 @@ class GameBase:
 
     Methods:
       - mount(parent): build right-panel UI
-      - start(): optional hook
-      - stop(): optional hook
+      - start(): optional hook, after the first mount
+      - stop(): optional hook, when the panel is hidden or discarded
+      - resume(): optional hook, when a cached panel is shown again
       - on_command(cmd, args): return True if the game consumed the command
     """
 
@@ -54,5 +55,8 @@ class GameBase:
     def stop(self):
         pass
 
+    def resume(self):
+        pass
+
     def on_command(self, cmd: str, args: list[str]) -> bool:
         return False
@@ -16,7 +16,7 @@ class ChromaticDrift(GameBase):
         super().__init__(app)
         self.canvas = None
         self.running = False
-        self.after_id = None
+        self.anim = None
         self.cool_palette = [
             "#89ddff",
             "#4fc3f7",
@@ -67,20 +67,20 @@ class ChromaticDrift(GameBase):
     def stop(self):
         self.stop_anim()
 
+    def resume(self):
+        self.start_anim()
+
     def start_anim(self):
         if self.running:
             return
         self.running = True
+        self.anim = self.app.clock.every(1200, self._tick)
         self._tick()
 
     def stop_anim(self):
         self.running = False
-        if self.after_id and getattr(self.app, "root", None):
-            try:
-                self.app.root.after_cancel(self.after_id)
-            except Exception:
-                pass
-        self.after_id = None
+        self.app.clock.cancel(self.anim)
+        self.anim = None
 
     def _draw_scene(self):
         if not self.canvas:
@@ -111,6 +111,7 @@ class ChromaticDrift(GameBase):
 
     def _tick(self):
         if not self.running or not self.canvas:
+            self.stop_anim()
             return
         try:
             if not int(self.canvas.winfo_exists()):
@@ -145,8 +146,3 @@ class ChromaticDrift(GameBase):
                     self.canvas.itemconfig(tris[2], fill=c3)
             except Exception:
                 pass
-
-        try:
-            self.after_id = self.app.root.after(1200, self._tick)
-        except Exception:
-            self.running = False
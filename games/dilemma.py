@@ -149,7 +149,7 @@ class IteratedDilemma(GameBase):
         self.turn = "bot"
         self.lbl.config(text=self._status())
         self._persist()
-        self.app.root.after(220, self._bot_move)
+        self.app.clock.once(220, self._bot_move, background=True)
 
     def success(self):
         return self.wins >= self.wins_needed
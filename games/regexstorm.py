@@ -2,67 +2,18 @@ from __future__ import annotations
 
 import csv
 import os
+import queue
 import random
 import re
 import statistics
-from dataclasses import dataclass
 from tkinter import StringVar, Text, filedialog, ttk
 
 from games.base import GameBase
-
-
-@dataclass
-class ScanStudentResult:
-    student_id: str
-    file_count: int
-    match_count: int
-
-
-class BaseStudentScanner:
-    def __init__(self, root_path: str):
-        self.root_path = root_path
-
-    def iter_student_dirs(self):
-        if not os.path.isdir(self.root_path):
-            return []
-        dirs = []
-        for name in sorted(os.listdir(self.root_path)):
-            full = os.path.join(self.root_path, name)
-            if os.path.isdir(full):
-                dirs.append((name, full))
-        return dirs
-
-
-class RegexStudentScanner(BaseStudentScanner):
-    def scan(self, pattern: str):
-        regex = re.compile(pattern)
-        results: list[ScanStudentResult] = []
-        blank_students: list[str] = []
-
-        for student_id, folder in self.iter_student_dirs():
-            file_count = 0
-            match_count = 0
-            for dirpath, _, filenames in os.walk(folder):
-                for fname in filenames:
-                    file_count += 1
-                    fpath = os.path.join(dirpath, fname)
-                    if regex.search(fname):
-                        match_count += 1
-                        continue
-                    try:
-                        with open(fpath, "r", encoding="utf-8", errors="ignore") as fh:
-                            text = fh.read()
-                        if regex.search(text):
-                            match_count += 1
-                    except OSError:
-                        continue
-            if file_count == 0:
-                blank_students.append(student_id)
-            results.append(
-                ScanStudentResult(student_id=student_id, file_count=file_count, match_count=match_count)
-            )
-
-        return results, blank_students
+from games.scancache import ScanCache
+from games.scanindex import ScanIndex
+from games.scanner import IndexThread, ParallelRegexScanner, ScanLimits, ScanThread
+# The scanner moved to games/scanner.py; these names stay importable from here.
+from games.scanner import BaseStudentScanner, RegexStudentScanner, ScanStudentResult  # noqa: F401
 
 
 class RegexStorm(GameBase):
@@ -72,7 +23,7 @@ class RegexStorm(GameBase):
     def __init__(self, app):
         super().__init__(app)
         self.running = False
-        self.after_id = None
+        self.anim = None
         self.samples_lbl = None
         self.opts = []
 
@@ -83,9 +34,21 @@ class RegexStorm(GameBase):
 
         self.scheme_rows: list[dict[str, str]] = []
         self.scheme_targets: list[str] = ["All scheme rows"]
+        # question label ("Q1" or "Q1:a") -> regex, for scheme rows that carry a pattern column
+        self.scheme_patterns: dict[str, str] = {}
+        self.scheme_target_keys: dict[str, str] = {}
+        self.scan_results: list = []
         self.stats_out: Text | None = None
         self.hist_canvas = None
         self.target_combo = None
+        self.scan = None
+        self.scan_poll = None
+        self.scan_root = ""
+        self.scan_pattern = ""
+        self.scan_partial: list = []
+        self.progress_var = StringVar(value="")
+        self.progress_bar = None
+        self.cancel_btn = None
 
     def mount(self, parent):
         super().mount(parent)
@@ -119,8 +82,9 @@ class RegexStorm(GameBase):
         ttk.Separator(parent, orient="horizontal").pack(fill="x", padx=12, pady=8)
         self._build_scanner_ui(parent)
 
-        self.running = True
-        self._tick()
+    def start(self):
+        super().start()
+        self.resume()
 
     def _build_scanner_ui(self, parent):
         ttk.Label(parent, text="Regex Student Scanner", font=("Segoe UI", 10, "bold")).pack(
@@ -154,6 +118,13 @@ class RegexStorm(GameBase):
         action_row = ttk.Frame(parent)
         action_row.pack(fill="x", padx=12, pady=(4, 6))
         ttk.Button(action_row, text="Run Scan", command=self._run_scan).pack(side="left")
+        ttk.Button(action_row, text="Export Matrix", command=self._export_matrix).pack(side="left", padx=(6, 0))
+        ttk.Button(action_row, text="Build Index", command=self._build_index).pack(side="left", padx=(6, 0))
+        self.cancel_btn = ttk.Button(action_row, text="Cancel", command=self._cancel_scan, state="disabled")
+        self.cancel_btn.pack(side="left", padx=(6, 0))
+        self.progress_bar = ttk.Progressbar(action_row, mode="determinate", maximum=1)
+        self.progress_bar.pack(side="left", fill="x", expand=True, padx=8)
+        ttk.Label(parent, textvariable=self.progress_var).pack(padx=12, anchor="nw")
 
         self.hist_canvas = Text(parent, height=8, width=72)
         self.hist_canvas.pack(fill="x", padx=12, pady=(2, 4))
@@ -188,36 +159,44 @@ class RegexStorm(GameBase):
 
         self.scheme_rows = loaded_rows
         name = os.path.basename(path)
-        self.scheme_var.set(f"Loaded: {name} ({len(loaded_rows)} rows)")
         self._refresh_scheme_targets()
+        with_patterns = f", {len(self.scheme_patterns)} with patterns" if self.scheme_patterns else ""
+        self.scheme_var.set(f"Loaded: {name} ({len(loaded_rows)} rows{with_patterns})")
 
     def _refresh_scheme_targets(self):
         targets = ["All scheme rows"]
+        patterns: dict[str, str] = {}
+        target_keys: dict[str, str] = {}
         for row in self.scheme_rows:
             qid = row.get("question_id", "")
             sub_id = row.get("sub_id", "")
             title = row.get("question_title", "")
             group = row.get("group", "")
             if qid:
-                label = f"{qid}"
-                if sub_id:
-                    label += f":{sub_id}"
+                key = f"{qid}:{sub_id}" if sub_id else qid
+                label = key
                 if title:
                     label += f" {title}"
                 if group:
                     label += f" [{group}]"
                 targets.append(label)
+                target_keys[label] = key
+                pattern = row.get("pattern") or row.get("regex") or ""
+                if pattern:
+                    patterns[key] = pattern
 
         self.scheme_targets = targets
+        self.scheme_patterns = patterns
+        self.scheme_target_keys = target_keys
         if self.target_combo is not None:
             self.target_combo["values"] = targets
         self.grading_target_var.set(targets[0])
 
-    def _build_histogram(self, values: list[int]) -> str:
+    def _build_histogram(self, values: list[int], title: str = "matches per student") -> str:
         if not values:
             return "No histogram data."
         max_value = max(values)
-        lines = ["Histogram (matches per student):"]
+        lines = [f"Histogram ({title}):"]
         for bucket in range(max_value + 1):
             count = sum(1 for v in values if v == bucket)
             if count == 0:
@@ -226,9 +205,19 @@ class RegexStorm(GameBase):
             lines.append(f"{bucket:>3}: {bar} ({count})")
         return "\n".join(lines)
 
+    def _scan_target_patterns(self) -> dict[str, str]:
+        """Scheme patterns to grade in one pass: all of them, or the chosen row's; empty to use the regex box."""
+        target = self.grading_target_var.get().strip()
+        if target == "All scheme rows":
+            return dict(self.scheme_patterns)
+        key = self.scheme_target_keys.get(target)
+        if key in self.scheme_patterns:
+            return {key: self.scheme_patterns[key]}
+        return {}
+
     def _run_scan(self):
         scan_root = self.path_var.get().strip()
-        pattern = self.regex_var.get().strip()
+        pattern = self._scan_target_patterns() or self.regex_var.get().strip()
 
         if not scan_root:
             self.safe_print("[ERR] Set a scan path first.")
@@ -237,17 +226,158 @@ class RegexStorm(GameBase):
             self.safe_print("[ERR] Set a regex pattern first.")
             return
 
+        for label, regex in (pattern.items() if isinstance(pattern, dict) else [("", pattern)]):
+            try:
+                re.compile(regex)
+            except re.error as exc:
+                where = f" for {label}" if label else ""
+                self.safe_print(f"[ERR] Invalid regex{where}: {exc}")
+                return
+
+        self._cancel_scan(quiet=True)
+
+        limits = ScanLimits.from_meta(self.app.cfg.get("meta", {}))
+        scanner = ParallelRegexScanner(scan_root, limits=limits)
+        self.scan_root = scan_root
+        self.scan_pattern = pattern
+        self.scan_partial = []
+        self.scan = ScanThread(
+            scanner,
+            pattern,
+            open_cache=lambda: self._open_scan_cache(scan_root),
+            open_index=lambda: self._open_scan_index(scan_root),
+        ).start()
+        # Background: a scan keeps reporting while the window is unfocused.
+        self.scan_poll = self.app.clock.every(100, self._poll_scan, background=True)
+        if self.cancel_btn is not None:
+            self.cancel_btn.config(state="normal")
+        self.safe_print(f"[SCAN] Scanning {scan_root} in the background (Cancel stops it)")
+
+    def _poll_scan(self):
+        scan = self.scan
+        if scan is None:
+            return
+        fresh = False
+        outcome = None
+        while outcome is None:
+            try:
+                kind, payload = scan.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "student":
+                self.scan_partial.append(payload)
+                fresh = True
+            else:
+                outcome = (kind, payload)
+
+        self._show_progress(scan.progress)
+        if outcome is None:
+            if fresh:
+                blanks = [r.student_id for r in self.scan_partial if r.file_count == 0]
+                self._render_scan(self.scan_partial, blanks, partial=True)
+            return
+
+        self._end_scan()
+        kind, payload = outcome
+        if kind == "done":
+            results, blank_students = payload
+            self._show_scan(self.scan_root, self.scan_pattern, results, blank_students)
+        elif kind == "indexed":
+            self.safe_print(
+                f"[SCAN] Index ready: {payload['files']} files, {payload['indexed']} (re)indexed, "
+                f"{payload['removed']} removed in {payload['seconds']:.1f}s"
+            )
+        elif kind == "error":
+            self.safe_print(f"[ERR] Scan failed: {payload}")
+
+    def _show_progress(self, progress):
+        if self.progress_bar is not None:
+            self.progress_bar.config(maximum=max(1, progress.students_total), value=progress.students_done)
+        self.progress_var.set(
+            f"Students {progress.students_done}/{progress.students_total} | "
+            f"files {progress.files_done} | {progress.rate() / 1e6:.1f} MB/s"
+        )
+
+    def _cancel_scan(self, quiet: bool = False):
+        if self.scan is None:
+            return
+        self.scan.cancel()
+        self._end_scan()
+        if not quiet:
+            self.progress_var.set(self.progress_var.get() + " | cancelled")
+            self.safe_print(f"[SCAN] Cancelled after {len(self.scan_partial)} students.")
+
+    def _end_scan(self):
+        self.scan = None
+        self.app.clock.cancel(self.scan_poll)
+        self.scan_poll = None
+        if self.cancel_btn is not None:
+            self.cancel_btn.config(state="disabled")
+
+    def _open_scan_cache(self, scan_root: str):
+        """Per-root result cache under the save directory; None for sessions that do not persist."""
+        engine = getattr(self.app, "engine", None)
+        if engine is None or engine.saver is None:
+            return None
+        try:
+            return ScanCache.for_root(os.path.join(engine.save_dir, "scancache"), scan_root)
+        except Exception:
+            return None
+
+    def _scan_index_dir(self):
+        engine = getattr(self.app, "engine", None)
+        if engine is None or engine.saver is None:
+            return None
+        return os.path.join(engine.save_dir, "scanindex")
+
+    def _open_scan_index(self, scan_root: str, create: bool = False):
+        """Trigram index for this root if one has been built (or `create`); None otherwise."""
+        index_dir = self._scan_index_dir()
+        if index_dir is None:
+            return None
+        if not create and not os.path.exists(ScanIndex.path_for(index_dir, scan_root)):
+            return None
         try:
-            scanner = RegexStudentScanner(scan_root)
-            results, blank_students = scanner.scan(pattern)
-        except re.error as exc:
-            self.safe_print(f"[ERR] Invalid regex: {exc}")
+            return ScanIndex.for_root(index_dir, scan_root)
+        except Exception:
+            return None
+
+    def _build_index(self):
+        scan_root = self.path_var.get().strip()
+        if not scan_root:
+            self.safe_print("[ERR] Set a scan path first.")
+            return
+        if self._scan_index_dir() is None:
+            self.safe_print("[ERR] The scan index needs a saved session.")
             return
 
+        self._cancel_scan(quiet=True)
+        self.scan_root = scan_root
+        self.scan_partial = []
+        self.scan = IndexThread(lambda: self._open_scan_index(scan_root, create=True)).start()
+        self.scan_poll = self.app.clock.every(100, self._poll_scan, background=True)
+        if self.cancel_btn is not None:
+            self.cancel_btn.config(state="normal")
+        self.safe_print(f"[SCAN] Indexing {scan_root} in the background; later scans of it read fewer files")
+
+    def _show_scan(self, scan_root: str, pattern, results, blank_students):
+        self.scan_results = results
+        self._render_scan(results, blank_students)
+        found_students = sum(1 for r in results if r.match_count > 0)
+        self.safe_print(
+            f"[SCAN] Completed. Students={len(results)}, matches={found_students}, blanks={len(blank_students)}"
+        )
+
+    def _render_scan(self, results, blank_students, partial: bool = False):
+        scan_root, pattern = self.scan_root, self.scan_pattern
+        labels = list(pattern) if isinstance(pattern, dict) else []
         student_count = len(results)
         found_students = sum(1 for r in results if r.match_count > 0)
         missing_students = student_count - found_students
-        values = [r.match_count for r in results]
+        if labels:
+            values = [sum(1 for q in labels if r.question_matches.get(q)) for r in results]
+        else:
+            values = [r.match_count for r in results]
         mean_val = statistics.mean(values) if values else 0.0
         median_val = statistics.median(values) if values else 0.0
         stdev_val = statistics.pstdev(values) if len(values) > 1 else 0.0
@@ -258,14 +388,17 @@ class RegexStorm(GameBase):
             scheme_note = f"Scheme rows: {len(self.scheme_rows)} | Target: {chosen_target}"
 
         stats_lines = [
-            f"Scan root: {scan_root}",
-            f"Regex pattern: {pattern}",
+            f"Scan root: {scan_root}" + ("  (scanning...)" if partial else ""),
+            f"Scheme patterns: {len(labels)} questions, one pass" if labels else f"Regex pattern: {pattern}",
             scheme_note,
             "",
             f"Students scanned: {student_count}",
             f"Students with matches: {found_students}",
             f"Students without matches: {missing_students}",
             f"Blank student folders (no files): {len(blank_students)}",
+            f"Files matched by name only (over size cap): {sum(r.skipped_files for r in results)}",
+            f"Files reused from scan cache: {sum(r.cached_files for r in results)}",
+            f"Files skipped by index: {sum(r.pruned_files for r in results)}",
             "",
             f"Mean matches: {mean_val:.2f}",
             f"Median matches: {median_val:.2f}",
@@ -278,6 +411,9 @@ class RegexStorm(GameBase):
             stats_lines.append("")
             stats_lines.append("Blank folders:")
             stats_lines.extend([f"- {sid}" for sid in blank_students[:40]])
+        if labels:
+            stats_lines.append("")
+            stats_lines.extend(self._build_matrix(results, labels))
 
         if self.stats_out is not None:
             self.stats_out.delete("1.0", "end")
@@ -285,20 +421,62 @@ class RegexStorm(GameBase):
 
         if self.hist_canvas is not None:
             self.hist_canvas.delete("1.0", "end")
-            self.hist_canvas.insert("1.0", self._build_histogram(values))
-
-        self.safe_print(
-            f"[SCAN] Completed. Students={student_count}, matches={found_students}, blanks={len(blank_students)}"
+            title = "questions matched per student" if labels else "matches per student"
+            self.hist_canvas.insert("1.0", self._build_histogram(values, title))
+
+    def _build_matrix(self, results, labels: list[str]) -> list[str]:
+        """Student x question grid of matching file counts ("." for none), plus per-question totals."""
+        widths = [min(10, max(3, len(q))) for q in labels]
+        sid_w = min(16, max([7] + [len(r.student_id) for r in results]))
+        lines = ["Match matrix (files matching each question):"]
+        lines.append(f"{'student':<{sid_w}} " + " ".join(f"{q[:w]:>{w}}" for q, w in zip(labels, widths)))
+        for r in results:
+            cells = []
+            for q, w in zip(labels, widths):
+                n = r.question_matches.get(q, 0)
+                cells.append(f"{n if n else '.':>{w}}")
+            lines.append(f"{r.student_id[:sid_w]:<{sid_w}} " + " ".join(cells))
+        totals = [sum(1 for r in results if r.question_matches.get(q)) for q in labels]
+        lines.append(f"{'students':<{sid_w}} " + " ".join(f"{t:>{w}}" for t, w in zip(totals, widths)))
+        return lines
+
+    def _export_matrix(self):
+        labels = list(self.scan_pattern) if isinstance(self.scan_pattern, dict) else []
+        if not self.scan_results or not labels:
+            self.safe_print("[ERR] Run a scan with scheme patterns first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save match matrix",
+            defaultextension=".csv",
+            filetypes=(("CSV files", "*.csv"), ("All files", "*.*")),
         )
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(["student_id"] + labels + ["questions_matched"])
+                for r in self.scan_results:
+                    counts = [r.question_matches.get(q, 0) for q in labels]
+                    writer.writerow([r.student_id] + counts + [sum(1 for n in counts if n)])
+        except OSError as exc:
+            self.safe_print(f"[ERR] Cannot write matrix: {exc}")
+            return
+        self.safe_print(f"[SCAN] Matrix written to {path}")
+
+    def resume(self):
+        if self.running:
+            return
+        self.running = True
+        self.anim = self.app.clock.every(5500, self._tick)
+        # Fill samples and N4_regex_map now; `solve regex` is scored against them straight away.
+        self._tick()
 
     def stop(self):
+        self._cancel_scan(quiet=True)
         self.running = False
-        if self.after_id and getattr(self.app, "root", None):
-            try:
-                self.app.root.after_cancel(self.after_id)
-            except Exception:
-                pass
-        self.after_id = None
+        self.app.clock.cancel(self.anim)
+        self.anim = None
 
     def _new_samples(self):
         prefix = random.choice(["TIME", "NODE", "JACK", "ECHO", "TRACE"])
@@ -337,8 +515,3 @@ class RegexStorm(GameBase):
             self.app.state["answers"]["N4_regex_map"] = {str(i + 1): choices[i] for i in range(5)}
         except Exception:
             pass
-
-        try:
-            self.after_id = self.app.root.after(5500, self._tick)
-        except Exception:
-            self.running = False
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import os
+import sys
+from typing import Dict, Iterator, List, Optional
+
+ENTRY_POINT_GROUP = "time_terminal.games"
+
+# game id -> "module:Class"; nothing is imported until a game is first mounted.
+BUILTIN_GAMES = {
+    "colors": "games.chromatic:ChromaticDrift",
+    "chess": "games.chessfork:ChessFork",
+    "codes": "games.codeobs:CodeObservatory",
+    "regex": "games.regexstorm:RegexStorm",
+    "tictactoe": "games.tictactoe:TicTacToeSequence",
+    "dilemma": "games.dilemma:IteratedDilemma",
+    "final": "games.axislock:AxisLock",
+}
+
+
+class GameRegistry:
+    """
+    Lazy game id -> class mapping.
+
+    Built-in games are listed by module path. Third-party games come from
+    plugin directories (one `<game_id>.py` per game, exposing a GameBase
+    subclass as `GAME` or as its only subclass) and from the
+    `time_terminal.games` entry point group (name = game id). Discovery only
+    lists ids; a module is imported the first time its class is requested.
+
+    Scanning installed distributions for entry points costs tens of ms, so it
+    happens on the first lookup of an id that is not otherwise known, or on
+    an explicit discover(); listing ids before that skips entry-point games.
+    """
+
+    def __init__(self, builtins: Optional[Dict[str, str]] = None, plugin_dirs: Optional[List[str]] = None,
+                 entry_points: bool = True):
+        self._targets: Dict[str, object] = dict(BUILTIN_GAMES if builtins is None else builtins)
+        self._classes: Dict[str, type] = {}
+        self._plugin_dirs = [d for d in (plugin_dirs or []) if d]
+        self._discovered = False
+        self._scanned_eps = not entry_points
+        self.errors: Dict[str, str] = {}
+
+    # --- mapping interface used by the app and the command router ---
+
+    def __contains__(self, game_id) -> bool:
+        self._discover()
+        if game_id not in self._targets:
+            self._scan_entry_points()
+        return game_id in self._targets
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(list(self._targets))
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._targets)
+
+    def __getitem__(self, game_id: str) -> type:
+        cls = self._classes.get(game_id)
+        if cls is not None:
+            return cls
+        if game_id not in self:
+            raise KeyError(game_id)
+        cls = self._load(game_id, self._targets[game_id])
+        self._classes[game_id] = cls
+        return cls
+
+    def register(self, game_id: str, target) -> None:
+        """Adds a game by class or "module:Class" path (replacing any existing id)."""
+        self._targets[game_id] = target
+        self._classes.pop(game_id, None)
+
+    def discover(self) -> List[str]:
+        """Full discovery, entry points included; returns every known id."""
+        self._discover()
+        self._scan_entry_points()
+        return list(self._targets)
+
+    def loaded(self) -> List[str]:
+        return sorted(self._classes)
+
+    def preload(self, game_id: str) -> bool:
+        """Imports a game's module ahead of its first mount; False if it cannot be loaded."""
+        try:
+            self[game_id]
+            return True
+        except Exception as e:
+            self.errors[game_id] = str(e)
+            return False
+
+    # --- discovery and loading ---
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        self._discovered = True
+
+        for d in self._plugin_dirs:
+            try:
+                names = sorted(os.listdir(d))
+            except OSError:
+                continue
+            for name in names:
+                if name.endswith(".py") and not name.startswith("_"):
+                    self._targets.setdefault(name[:-3], ("file", os.path.join(d, name)))
+
+    def _scan_entry_points(self) -> None:
+        if self._scanned_eps:
+            return
+        self._scanned_eps = True
+        try:
+            from importlib.metadata import entry_points
+            eps = entry_points()
+            group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, [])
+        except Exception:
+            return
+        for ep in group:
+            self._targets.setdefault(ep.name, ep)
+
+    def _load(self, game_id: str, target) -> type:
+        if isinstance(target, type):
+            return target
+        if isinstance(target, str):
+            mod_name, _, attr = target.partition(":")
+            return getattr(importlib.import_module(mod_name), attr)
+        if isinstance(target, tuple) and target[0] == "file":
+            return _class_from_file(game_id, target[1])
+        return target.load()
+
+
+def _class_from_file(game_id: str, path: str) -> type:
+    from games.base import GameBase
+
+    mod_name = f"tt_plugin_{game_id}"
+    spec = importlib.util.spec_from_file_location(mod_name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"cannot load plugin {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[mod_name] = module
+    spec.loader.exec_module(module)
+
+    cls = getattr(module, "GAME", None)
+    if cls is None:
+        found = [v for v in vars(module).values()
+                 if isinstance(v, type) and issubclass(v, GameBase) and v is not GameBase
+                 and v.__module__ == mod_name]
+        if len(found) != 1:
+            raise ImportError(f"plugin {path} must define GAME or exactly one GameBase subclass")
+        cls = found[0]
+    return cls
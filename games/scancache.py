@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Tuple
+
+# Bump when matching semantics change so old results are not reused.
+MATCHER_VERSION = 3
+
+
+def encode_result(mask: int, skipped: bool) -> int:
+    """
+    Result column: the bitmask of matched patterns (1 = match for a single
+    pattern), or -1 - mask when the contents were over the size cap and only
+    the name was matched.
+    """
+    return -1 - mask if skipped else mask
+
+
+def decode_result(code: int) -> Tuple[int, bool]:
+    return (-1 - code, True) if code < 0 else (code, False)
+
+
+class ScanCache:
+    """
+    Per-file scan results for one scan root, in one sqlite file.
+
+    Rows are keyed by (pattern key, path relative to the root) and hold the
+    file's size and mtime_ns when it was scanned; a file is only re-read when
+    either changed. The pattern key covers the pattern text and the scan
+    limits, so changing either starts from empty without touching results for
+    other patterns (handy when flipping between two regexes).
+
+    Rows unused for `max_age_days` are dropped on flush, and past `max_rows`
+    the least recently used go first.
+    """
+
+    def __init__(self, path: str, max_age_days: float = 30.0, max_rows: int = 500_000):
+        self.path = path
+        self.max_age = max_age_days * 86400.0
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._now = time.time()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.con = sqlite3.connect(path)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS files(
+                pkey TEXT NOT NULL,
+                relpath TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                result INTEGER NOT NULL,
+                used REAL NOT NULL,
+                PRIMARY KEY(pkey, relpath)
+            )
+        """)
+        self.con.execute("CREATE INDEX IF NOT EXISTS files_used ON files(used)")
+
+    @classmethod
+    def for_root(cls, cache_dir: str, scan_root: str, **kw) -> "ScanCache":
+        name = hashlib.sha1(os.path.abspath(scan_root).encode("utf-8")).hexdigest()[:16]
+        return cls(os.path.join(cache_dir, name + ".sqlite"), **kw)
+
+    @staticmethod
+    def pattern_key(pattern, limits=None) -> str:
+        """`pattern` is one regex or a {label: regex} dict (label order matters: it sets the bits)."""
+        if isinstance(pattern, dict):
+            pattern = "\0".join(f"{k}\1{v}" for k, v in pattern.items())
+        return hashlib.sha1(f"{MATCHER_VERSION}\0{pattern}\0{limits!r}".encode("utf-8")).hexdigest()
+
+    def lookup(self, pkey: str, prefix: str) -> Dict[str, Tuple[int, int, int]]:
+        """relpath -> (size, mtime_ns, result code) for every cached file under `prefix/`."""
+        rows = self.con.execute(
+            "SELECT relpath, size, mtime_ns, result FROM files WHERE pkey=? AND relpath>=? AND relpath<?",
+            # '0' sorts right after '/', so this range is exactly the paths under prefix/.
+            (pkey, prefix + "/", prefix + "0"),
+        ).fetchall()
+        return {rel: (size, mtime, res) for rel, size, mtime, res in rows}
+
+    def touch(self, pkey: str, prefix: str) -> None:
+        self.con.execute(
+            "UPDATE files SET used=? WHERE pkey=? AND relpath>=? AND relpath<?",
+            (self._now, pkey, prefix + "/", prefix + "0"),
+        )
+
+    def store(self, pkey: str, rows: Iterable[Tuple[str, int, int, int]]) -> None:
+        self.con.executemany(
+            "INSERT OR REPLACE INTO files(pkey, relpath, size, mtime_ns, result, used) VALUES(?,?,?,?,?,?)",
+            [(pkey, rel, size, mtime, res, self._now) for rel, size, mtime, res in rows],
+        )
+
+    def evict(self) -> int:
+        cur = self.con.execute("DELETE FROM files WHERE used<?", (self._now - self.max_age,))
+        removed = cur.rowcount
+        (count,) = self.con.execute("SELECT COUNT(*) FROM files").fetchone()
+        if count > self.max_rows:
+            cur = self.con.execute(
+                "DELETE FROM files WHERE rowid IN (SELECT rowid FROM files ORDER BY used LIMIT ?)",
+                (count - self.max_rows,),
+            )
+            removed += cur.rowcount
+        return removed
+
+    def clear(self) -> None:
+        self.con.execute("DELETE FROM files")
+        self.con.commit()
+
+    def flush(self) -> None:
+        self.evict()
+        self.con.commit()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.con.close()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
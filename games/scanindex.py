@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from re import _constants as sre_c, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants as sre_c
+    import sre_parse
+
+# ASCII letters that IGNORECASE also matches to non-ASCII characters (İ ı K ſ);
+# a case-insensitive literal run is cut at these since their bytes can differ.
+_FOLD_UNSAFE = set("iksIKS")
+
+_REPEATS = tuple(op for op in (getattr(sre_c, n, None) for n in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")) if op)
+_ATOMIC = getattr(sre_c, "ATOMIC_GROUP", None)
+
+
+def file_grams(data: bytes, name: str = "") -> Set[int]:
+    """Distinct trigrams (ASCII-lowercased) of the contents and, separately, the file name."""
+    triples = set()
+    for chunk in (data.lower(), name.encode("utf-8", "ignore").lower()):
+        # zip runs in C; only the distinct triples are turned into ints.
+        triples.update(zip(chunk, chunk[1:], chunk[2:]))
+    return {(a << 16) | (b << 8) | c for a, b, c in triples}
+
+
+# --- regex -> trigram query ---
+#
+# A query is None (no constraint: every file is a candidate), a set of
+# trigrams that must all be present, or ("and" | "or", [queries]).
+
+def regex_query(pattern: str):
+    """Trigrams any text matching `pattern` must contain; None when nothing can be required."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+    state = getattr(parsed, "state", None) or getattr(parsed, "pattern", None)
+    flags = getattr(state, "flags", 0)
+    return _seq(list(parsed), bool(flags & re.IGNORECASE))
+
+
+def _seq(items, icase: bool):
+    reqs = []
+    run: List[str] = []
+
+    def flush():
+        if run:
+            reqs.append(_literal("".join(run)))
+            run.clear()
+
+    for op, av in items:
+        if op is sre_c.LITERAL:
+            ch = chr(av)
+            if icase and (ord(ch) > 127 or ch in _FOLD_UNSAFE):
+                flush()
+            else:
+                run.append(ch)
+        elif op is sre_c.AT:
+            continue  # zero width: the run continues across ^, $, \b
+        elif op is sre_c.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            sub_icase = (icase or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            flush()
+            reqs.append(_seq(list(sub), sub_icase))
+        elif op in _REPEATS:
+            lo, _, sub = av
+            flush()
+            if lo >= 1:
+                reqs.append(_seq(list(sub), icase))
+        elif op is sre_c.BRANCH:
+            flush()
+            reqs.append(_any([_seq(list(alt), icase) for alt in av[1]]))
+        elif _ATOMIC is not None and op is _ATOMIC:
+            flush()
+            reqs.append(_seq(list(av), icase))
+        else:
+            # classes, ., backreferences, lookarounds: no literal text we can rely on
+            flush()
+    flush()
+    return _all(reqs)
+
+
+def _literal(text: str):
+    data = text.encode("utf-8").lower()
+    if len(data) < 3:
+        return None
+    return {int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2)}
+
+
+def _all(reqs):
+    reqs = [r for r in reqs if r is not None]
+    if not reqs:
+        return None
+    grams = set()
+    rest = []
+    for r in reqs:
+        if isinstance(r, set):
+            grams |= r
+        else:
+            rest.append(r)
+    if not rest:
+        return grams
+    if not grams and len(rest) == 1:
+        return rest[0]
+    return ("and", ([grams] if grams else []) + rest)
+
+
+def _any(alts):
+    if not alts or any(a is None for a in alts):
+        return None
+    return ("or", alts)
+
+
+class ScanIndex:
+    """
+    Persisted trigram inverted index over every file under one scan root.
+
+    `grams` maps each trigram to the files containing it (contents and file
+    name, ASCII-lowercased) and `gram_counts` keeps each posting list's
+    length. candidates() turns a regex into the trigrams any match must
+    contain and returns only the files that have them all, so a scan reads
+    just those. Lookups load the rarest trigram's postings and probe the
+    rest for just those files, so common trigrams ("the", "def") cost little. Files the index cannot speak for are always
+    candidates: too big to index, not valid UTF-8 (decoding for non-ASCII
+    patterns can splice text across dropped bytes), or changed since they
+    were indexed (the scanner checks size and mtime before trusting it).
+
+    update() is incremental: it re-reads only new or changed files and drops
+    deleted ones. It is a generator (one step per file) for background use.
+    """
+
+    def __init__(self, path: str, root_path: str, max_index_bytes: int = 1024 * 1024):
+        self.path = path
+        self.root_path = root_path
+        self.max_index_bytes = max_index_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.con = sqlite3.connect(path)
+        self.con.executescript("""
+            CREATE TABLE IF NOT EXISTS files(
+                id INTEGER PRIMARY KEY,
+                relpath TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                indexed INTEGER NOT NULL,
+                grams BLOB
+            );
+            CREATE TABLE IF NOT EXISTS grams(
+                gram INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                PRIMARY KEY(gram, file_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS gram_counts(
+                gram INTEGER PRIMARY KEY,
+                n INTEGER NOT NULL
+            );
+        """)
+        if (self.con.execute("SELECT 1 FROM grams LIMIT 1").fetchone() is not None
+                and self.con.execute("SELECT 1 FROM gram_counts LIMIT 1").fetchone() is None):
+            # An index built before posting counts were kept.
+            self.con.execute("INSERT INTO gram_counts(gram, n) SELECT gram, COUNT(*) FROM grams GROUP BY gram")
+            self.con.commit()
+
+    @classmethod
+    def for_root(cls, index_dir: str, scan_root: str, **kw) -> "ScanIndex":
+        return cls(cls.path_for(index_dir, scan_root), scan_root, **kw)
+
+    @staticmethod
+    def path_for(index_dir: str, scan_root: str) -> str:
+        name = hashlib.sha1(os.path.abspath(scan_root).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(index_dir, name + ".sqlite")
+
+    def close(self) -> None:
+        self.con.close()
+
+    # --- building ---
+
+    def update(self, progress=None):
+        """
+        Brings the index up to date with the tree; yields after every file and
+        returns {"files", "indexed", "removed", "seconds"}.
+        """
+        from games.scanner import BaseStudentScanner, iter_student_files
+
+        t0 = time.monotonic()
+        known = {rel: (fid, size, mtime) for fid, rel, size, mtime
+                 in self.con.execute("SELECT id, relpath, size, mtime_ns FROM files")}
+        seen = set()
+        changed = 0
+        dirs = BaseStudentScanner(self.root_path).iter_student_dirs()
+        if progress is not None:
+            progress.students_total = len(dirs)
+        for student_id, folder in dirs:
+            for fname, fpath in iter_student_files(folder):
+                rel = student_id + "/" + os.path.relpath(fpath, folder).replace(os.sep, "/")
+                seen.add(rel)
+                try:
+                    st = os.stat(fpath)
+                except OSError:
+                    continue
+                old = known.get(rel)
+                if old is None or old[1] != st.st_size or old[2] != st.st_mtime_ns:
+                    size = self._index_file(rel, fname, fpath, st, old[0] if old else None)
+                    changed += 1
+                    if progress is not None:
+                        progress.bytes_read += size
+                if progress is not None:
+                    progress.files_done += 1
+                yield
+            if progress is not None:
+                progress.students_done += 1
+            self.con.commit()
+
+        gone = [known[rel][0] for rel in known if rel not in seen]
+        for fid in gone:
+            self._drop(fid)
+        self.con.commit()
+        return {"files": len(seen), "indexed": changed, "removed": len(gone),
+                "seconds": round(time.monotonic() - t0, 3)}
+
+    def _index_file(self, rel: str, fname: str, fpath: str, st, old_id: Optional[int]) -> int:
+        """(Re)indexes one file; returns the bytes read."""
+        if old_id is not None:
+            self._drop(old_id)
+        grams: Optional[Set[int]] = None
+        read = 0
+        if st.st_size <= self.max_index_bytes:
+            try:
+                with open(fpath, "rb") as fh:
+                    data = fh.read()
+                read = len(data)
+                data.decode("utf-8")
+                grams = file_grams(data, fname)
+            except (OSError, UnicodeDecodeError):
+                grams = None
+        blob = b"".join(g.to_bytes(3, "big") for g in sorted(grams)) if grams is not None else None
+        cur = self.con.execute(
+            "INSERT INTO files(relpath, size, mtime_ns, indexed, grams) VALUES(?,?,?,?,?)",
+            (rel, st.st_size, st.st_mtime_ns, 1 if grams is not None else 0, blob),
+        )
+        if grams:
+            fid = cur.lastrowid
+            self.con.executemany("INSERT OR IGNORE INTO grams(gram, file_id) VALUES(?,?)", ((g, fid) for g in grams))
+            self.con.executemany(
+                "INSERT INTO gram_counts(gram, n) VALUES(?, 1) ON CONFLICT(gram) DO UPDATE SET n = n + 1",
+                ((g,) for g in grams),
+            )
+        return read
+
+    def _drop(self, fid: int) -> None:
+        row = self.con.execute("SELECT grams FROM files WHERE id=?", (fid,)).fetchone()
+        if row is not None and row[0]:
+            blob = row[0]
+            grams = [int.from_bytes(blob[i:i + 3], "big") for i in range(0, len(blob), 3)]
+            self.con.executemany("DELETE FROM grams WHERE gram=? AND file_id=?", ((g, fid) for g in grams))
+            self.con.executemany("UPDATE gram_counts SET n = n - 1 WHERE gram=?", ((g,) for g in grams))
+            self.con.executemany("DELETE FROM gram_counts WHERE gram=? AND n <= 0", ((g,) for g in grams))
+        self.con.execute("DELETE FROM files WHERE id=?", (fid,))
+
+    # --- querying ---
+
+    def candidates(self, pattern) -> Optional[Set[str]]:
+        """
+        Relative paths that may match `pattern` (one regex or a {label: regex}
+        dict, where a file is a candidate for any of them); None when the
+        pattern requires no trigrams and every file has to be read.
+        """
+        patterns = pattern.values() if isinstance(pattern, dict) else [pattern]
+        queries = [regex_query(p) for p in patterns]
+        if not queries or any(q is None for q in queries):
+            return None
+        ids: Set[int] = set()
+        for q in queries:
+            ids |= self._eval(q)
+        ids |= {fid for (fid,) in self.con.execute("SELECT id FROM files WHERE indexed=0")}
+        return self._paths(ids)
+
+    def _eval(self, q, within: Optional[Set[int]] = None) -> Set[int]:
+        """File ids satisfying query `q` (restricted to `within` when given)."""
+        if isinstance(q, set):
+            return self._all_grams(q, within)
+        kind, parts = q
+        if kind == "and":
+            out = within
+            # Plain gram sets first: they narrow `out` cheaply before the nested parts run.
+            for part in sorted(parts, key=lambda p: not isinstance(p, set)):
+                out = self._eval(part, out)
+                if not out:
+                    return set()
+            return out if out is not None else set()
+        out = set()
+        for part in parts:
+            out |= self._eval(part, within)
+        return out
+
+    def _all_grams(self, grams: Set[int], within: Optional[Set[int]]) -> Set[int]:
+        counts = self._counts(grams)
+        order = sorted(grams, key=lambda g: counts.get(g, 0))
+        if not order or not counts.get(order[0]):
+            return set()
+        out = within
+        for g in order:
+            if out is None or len(out) > counts[g]:
+                postings = {fid for (fid,) in self.con.execute("SELECT file_id FROM grams WHERE gram=?", (g,))}
+                out = postings if out is None else out & postings
+            else:
+                out = self._probe(g, out)
+            if not out:
+                return set()
+        return out
+
+    def _counts(self, grams: Iterable[int]) -> Dict[int, int]:
+        grams = list(grams)
+        counts: Dict[int, int] = {}
+        for i in range(0, len(grams), 500):
+            batch = grams[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            counts.update(self.con.execute(f"SELECT gram, n FROM gram_counts WHERE gram IN ({marks})", batch))
+        return counts
+
+    def _probe(self, gram: int, ids: Set[int]) -> Set[int]:
+        """The ids in `ids` whose files contain `gram`: primary-key lookups, not a posting-list scan."""
+        ids = list(ids)
+        hit: Set[int] = set()
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            hit.update(fid for (fid,) in self.con.execute(
+                f"SELECT file_id FROM grams WHERE gram=? AND file_id IN ({marks})", [gram] + batch))
+        return hit
+
+    def _paths(self, ids: Iterable[int]) -> Set[str]:
+        ids = list(ids)
+        paths: Set[str] = set()
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            paths.update(rel for (rel,) in self.con.execute(f"SELECT relpath FROM files WHERE id IN ({marks})", batch))
+        return paths
+
+    def pruned(self, student_id: str, candidates: Set[str]) -> Dict[str, Tuple[int, int]]:
+        """relpath -> (size, mtime_ns) of this student's indexed files that cannot match."""
+        rows = self.con.execute(
+            "SELECT relpath, size, mtime_ns FROM files WHERE indexed=1 AND relpath>=? AND relpath<?",
+            (student_id + "/", student_id + "0"),
+        )
+        return {rel: (size, mtime) for rel, size, mtime in rows if rel not in candidates}
+
+    def stats(self) -> dict:
+        (files,) = self.con.execute("SELECT COUNT(*) FROM files").fetchone()
+        (indexed,) = self.con.execute("SELECT COUNT(*) FROM files WHERE indexed=1").fetchone()
+        (postings,) = self.con.execute("SELECT COALESCE(SUM(n), 0) FROM gram_counts").fetchone()
+        return {"files": files, "indexed": indexed, "postings": postings}
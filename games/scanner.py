@@ -0,0 +1,655 @@
+from __future__ import annotations
+
+import atexit
+import codecs
+import mmap
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Tuple
+
+from games.scancache import ScanCache, decode_result, encode_result
+
+# Kept free of tkinter: process-pool workers import this module on their own.
+
+
+@dataclass
+class ScanStudentResult:
+    student_id: str
+    file_count: int
+    match_count: int
+    skipped_files: int = 0
+    cached_files: int = 0
+    pruned_files: int = 0
+    bytes_read: int = 0
+    # scheme scans: question label -> files matching that question's pattern
+    question_matches: dict = field(default_factory=dict)
+
+
+class BaseStudentScanner:
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+
+    def iter_student_dirs(self):
+        if not os.path.isdir(self.root_path):
+            return []
+        dirs = []
+        for name in sorted(os.listdir(self.root_path)):
+            full = os.path.join(self.root_path, name)
+            if os.path.isdir(full):
+                dirs.append((name, full))
+        return dirs
+
+
+def iter_student_files(folder: str):
+    """(file name, full path) for every file under one student folder, in walk order."""
+    for dirpath, _, filenames in os.walk(folder):
+        for fname in filenames:
+            yield fname, os.path.join(dirpath, fname)
+
+
+@dataclass(frozen=True)
+class ScanLimits:
+    """
+    Memory bounds for matching file contents.
+
+    Files over `max_file_bytes` are only matched by name. Otherwise an ASCII
+    pattern runs as a bytes regex: files from `mmap_bytes` up are searched
+    through a memory map (pages come from the OS cache, not the heap), smaller
+    ones are read whole. Patterns with non-ASCII characters need decoded text
+    and stream through `chunk_bytes` reads, each searched together with the
+    last `overlap_chars` characters of the previous window; a match longer
+    than that window can be missed.
+    """
+
+    max_file_bytes: int = 256 * 1024 * 1024
+    mmap_bytes: int = 4 * 1024 * 1024
+    chunk_bytes: int = 1024 * 1024
+    overlap_chars: int = 4096
+
+    @classmethod
+    def from_meta(cls, meta: dict) -> "ScanLimits":
+        """Reads optional `scan_max_file_mb` / `scan_chunk_kb` from the config's meta block."""
+        base = cls()
+        try:
+            max_mb = float(meta.get("scan_max_file_mb", base.max_file_bytes / (1024 * 1024)))
+            chunk_kb = float(meta.get("scan_chunk_kb", base.chunk_bytes / 1024))
+        except (TypeError, ValueError):
+            return base
+        return cls(
+            max_file_bytes=max(0, int(max_mb * 1024 * 1024)),
+            mmap_bytes=base.mmap_bytes,
+            chunk_bytes=max(4096, int(chunk_kb * 1024)),
+            overlap_chars=base.overlap_chars,
+        )
+
+
+class PatternSetMatcher:
+    """
+    Several labelled patterns (e.g. one per scheme question) matched in one
+    read of each file, within ScanLimits.
+
+    match_mask() returns a bitmask over `labels` (bit i set when labels[i]
+    matched) and whether the contents were skipped for being over the size
+    cap. A pattern that matches the file name needs no read; the rest share
+    one read: a single bytes read or memory map when every pattern is ASCII,
+    otherwise one pass of text windows. Patterns are searched one by one over
+    that read rather than merged into one alternation, because inline flags
+    and backreferences do not survive being combined.
+
+    Bytes matching sees raw bytes, so for non-ASCII content `\\w`, `\\d`, `\\s`
+    and `.` behave as in `re.ASCII` mode.
+    """
+
+    def __init__(self, patterns: dict, limits: Optional[ScanLimits] = None):
+        self.labels = list(patterns)
+        self.regexes = [re.compile(patterns[k]) for k in self.labels]
+        self.limits = limits or ScanLimits()
+        self.bytes_read = 0
+        self.bregexes = None
+        if all(patterns[k].isascii() for k in self.labels):
+            try:
+                self.bregexes = [re.compile(patterns[k].encode("ascii")) for k in self.labels]
+            except re.error:
+                # e.g. (?u), which bytes patterns reject; the text path still works.
+                self.bregexes = None
+        self.full_mask = (1 << len(self.labels)) - 1
+
+    def match_mask(self, fname: str, fpath: str) -> Tuple[int, bool]:
+        mask = 0
+        for i, regex in enumerate(self.regexes):
+            if regex.search(fname):
+                mask |= 1 << i
+        if mask == self.full_mask:
+            return mask, False
+        try:
+            size = os.path.getsize(fpath)
+            if size > self.limits.max_file_bytes:
+                return mask, True
+            self.bytes_read += size
+            if self.bregexes is not None:
+                return self._match_bytes(fpath, size, mask), False
+            return self._match_text(fpath, mask), False
+        except (OSError, ValueError):
+            return mask, False
+
+    def _match_bytes(self, fpath: str, size: int, mask: int) -> int:
+        with open(fpath, "rb") as fh:
+            if size < self.limits.mmap_bytes or size == 0:
+                return self._search_all(self.bregexes, fh.read(), mask)
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._search_all(self.bregexes, mm, mask)
+
+    @staticmethod
+    def _search_all(regexes, data, mask: int) -> int:
+        for i, regex in enumerate(regexes):
+            if not mask & (1 << i) and regex.search(data):
+                mask |= 1 << i
+        return mask
+
+    def _match_text(self, fpath: str, mask: int) -> int:
+        keep = self.limits.overlap_chars + 1
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        tail = ""
+        # 0 until characters have been dropped from the front of the window; from then on text[0]
+        # is old context, kept so lookbehind and \b see it, and searching starts at 1 so `^` cannot match there.
+        start = 0
+        with open(fpath, "rb") as fh:
+            while True:
+                chunk = fh.read(self.limits.chunk_bytes)
+                final = not chunk
+                text = tail + decoder.decode(chunk, final=final)
+                limit = len(text) if final else len(text) - 2
+                for i, regex in enumerate(self.regexes):
+                    if not mask & (1 << i) and self._window_has_match(regex, text, start, limit):
+                        mask |= 1 << i
+                if final or mask == self.full_mask:
+                    return mask
+                if len(text) > keep:
+                    tail = text[-keep:]
+                    start = 1
+                else:
+                    tail = text
+
+
+    @staticmethod
+    def _window_has_match(regex, text: str, start: int, limit: int) -> bool:
+        """
+        Whether `regex` matches in this window without relying on the window
+        ending where it does. A match running past `limit` may only exist
+        because the text stops there ($, \\b, a cut-off run); the next window
+        rescans that stretch from its overlap. At most three searches, so a
+        long greedy run costs linear time rather than one retry per position.
+        """
+        m = regex.search(text, start)
+        if m is None or m.end() <= limit:
+            return m is not None
+        # Nothing past `limit` is examined, so a greedy run stops there.
+        m = regex.search(text, start, limit)
+        if m is None or m.end() < limit:
+            return m is not None
+        # It ends at the cut: keep it only if the same start also matches within limit in the full window.
+        full = regex.match(text, m.start())
+        return full is not None and full.end() <= limit
+
+
+class FileMatcher(PatternSetMatcher):
+    """A single pattern; match() gives True/False, or None when the file was over the size cap."""
+
+    def __init__(self, pattern: str, limits: Optional[ScanLimits] = None):
+        super().__init__({"": pattern}, limits)
+
+    def match(self, fname: str, fpath: str) -> Optional[bool]:
+        mask, skipped = self.match_mask(fname, fpath)
+        if mask:
+            return True
+        return None if skipped else False
+
+
+def make_matcher(pattern, limits: Optional[ScanLimits] = None) -> PatternSetMatcher:
+    """A str is one unlabelled pattern; a dict maps question labels to patterns."""
+    if isinstance(pattern, dict):
+        return PatternSetMatcher(pattern, limits)
+    return FileMatcher(pattern, limits)
+
+
+class ScanProgress:
+    """Live counters for one scan; written by the scanning thread, read by the UI."""
+
+    def __init__(self, students_total: int = 0):
+        self.students_total = students_total
+        self.students_done = 0
+        self.files_done = 0
+        self.bytes_read = 0
+        self.started = time.monotonic()
+
+    def rate(self) -> float:
+        """Bytes read per second so far."""
+        elapsed = time.monotonic() - self.started
+        return self.bytes_read / elapsed if elapsed > 0 else 0.0
+
+
+def iter_scan_student(matcher: PatternSetMatcher, student_id: str, folder: str,
+                      cached: Optional[dict] = None, fresh: Optional[list] = None,
+                      progress: Optional[ScanProgress] = None, pruned: Optional[dict] = None):
+    """
+    Scans one student folder, yielding after every file; returns its ScanStudentResult.
+
+    With `cached` (relpath -> (size, mtime_ns, result code), see ScanCache) a
+    file whose size and mtime are unchanged is not read again; every file that
+    was read is appended to `fresh` as (relpath, size, mtime_ns, result code).
+    `pruned` (relpath -> (size, mtime_ns), see ScanIndex) lists files the
+    trigram index ruled out; they count as non-matching while unchanged.
+    """
+    result = ScanStudentResult(student_id=student_id, file_count=0, match_count=0)
+    labelled = matcher.labels != [""]
+    if labelled:
+        result.question_matches = dict.fromkeys(matcher.labels, 0)
+    for fname, fpath in iter_student_files(folder):
+        read_before = matcher.bytes_read
+        if cached is None and pruned is None:
+            mask, skipped = matcher.match_mask(fname, fpath)
+        else:
+            rel = student_id + "/" + os.path.relpath(fpath, folder).replace(os.sep, "/")
+            try:
+                st = os.stat(fpath)
+            except OSError:
+                st = None
+            hit = cached.get(rel) if cached is not None else None
+            ruled_out = pruned.get(rel) if pruned is not None else None
+            if st is not None and hit is not None and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+                mask, skipped = decode_result(hit[2])
+                result.cached_files += 1
+            elif st is not None and ruled_out is not None and ruled_out == (st.st_size, st.st_mtime_ns):
+                mask, skipped = 0, False
+                result.pruned_files += 1
+            else:
+                mask, skipped = matcher.match_mask(fname, fpath)
+                if st is not None and fresh is not None:
+                    fresh.append((rel, st.st_size, st.st_mtime_ns, encode_result(mask, skipped)))
+        result.file_count += 1
+        if mask:
+            result.match_count += 1
+        elif skipped:
+            result.skipped_files += 1
+        if labelled and mask:
+            for i, label in enumerate(matcher.labels):
+                if mask & (1 << i):
+                    result.question_matches[label] += 1
+        result.bytes_read += matcher.bytes_read - read_before
+        if progress is not None:
+            progress.files_done += 1
+            progress.bytes_read += matcher.bytes_read - read_before
+        yield
+    return result
+
+
+def scan_student(student_id: str, folder: str, pattern,
+                 limits: Optional[ScanLimits] = None, cached: Optional[dict] = None,
+                 pruned: Optional[dict] = None):
+    """One student folder; module level so a process pool can run it. Returns (result, fresh rows)."""
+    fresh: list = []
+    steps = iter_scan_student(make_matcher(pattern, limits), student_id, folder, cached, fresh, pruned=pruned)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value, fresh
+
+
+class RegexStudentScanner(BaseStudentScanner):
+    """
+    Walks student folders one at a time. With a ScanCache, files unchanged
+    since the last scan with the same pattern are not read again; with a
+    ScanIndex, files whose trigrams rule the pattern out are not read either.
+
+    `progress` is replaced at the start of every scan, and `on_result` (if
+    set) is called with each student's result as soon as it is complete.
+    """
+
+    def __init__(self, root_path: str, limits: Optional[ScanLimits] = None, cache: Optional[ScanCache] = None,
+                 index=None):
+        super().__init__(root_path)
+        self.limits = limits or ScanLimits()
+        self.cache = cache
+        self.index = index
+        self.progress = ScanProgress()
+        self.on_result: Optional[Callable[[ScanStudentResult], None]] = None
+
+    def scan(self, pattern: str):
+        steps = self.iter_scan(pattern)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def iter_scan(self, pattern: str):
+        """
+        Generator form of scan(): yields after every file so a job can
+        time-slice the walk, and returns (results, blank_students).
+        """
+        matcher = make_matcher(pattern, self.limits)
+        pkey = self._pattern_key(pattern)
+        results: list[ScanStudentResult] = []
+        blank_students: list[str] = []
+
+        candidates = self._candidates(pattern)
+        dirs = self.iter_student_dirs()
+        self.progress = ScanProgress(len(dirs))
+        for student_id, folder in dirs:
+            cached = self._cached(pkey, student_id)
+            pruned = self._pruned(student_id, candidates)
+            fresh: list = []
+            result = yield from iter_scan_student(matcher, student_id, folder, cached, fresh, self.progress, pruned)
+            self._finished(pkey, result, fresh)
+            if result.file_count == 0:
+                blank_students.append(student_id)
+            results.append(result)
+
+        self._save_cache()
+        return results, blank_students
+
+    # --- index and cache plumbing (no-ops without them) ---
+
+    def _candidates(self, pattern) -> Optional[set]:
+        return self.index.candidates(pattern) if self.index is not None else None
+
+    def _pruned(self, student_id: str, candidates: Optional[set]) -> Optional[dict]:
+        if candidates is None:
+            return None
+        return self.index.pruned(student_id, candidates)
+
+    def _pattern_key(self, pattern: str) -> Optional[str]:
+        return ScanCache.pattern_key(pattern, self.limits) if self.cache is not None else None
+
+    def _cached(self, pkey: Optional[str], student_id: str) -> Optional[dict]:
+        if self.cache is None:
+            return None
+        return self.cache.lookup(pkey, student_id)
+
+    def _finished(self, pkey: Optional[str], result: ScanStudentResult, fresh: list) -> None:
+        self.progress.students_done += 1
+        self._remember(pkey, result, fresh)
+        if self.on_result is not None:
+            self.on_result(result)
+
+    def _remember(self, pkey: Optional[str], result: ScanStudentResult, fresh: list) -> None:
+        if self.cache is None:
+            return
+        if result.cached_files:
+            self.cache.touch(pkey, result.student_id)
+        if fresh:
+            self.cache.store(pkey, fresh)
+        self.cache.hits += result.cached_files
+        self.cache.misses += len(fresh)
+
+    def _save_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.flush()
+
+
+class ScanPool:
+    """
+    A process pool started on first use and kept for the life of the process,
+    so only the first parallel scan pays for worker start-up.
+
+    Workers are spawned rather than forked: scans start from a worker thread
+    while Tk, speech and sqlite threads are running, and forking a threaded
+    process can copy locks in a held state. shared() hands out one pool per
+    worker count; all of them are shut down at exit.
+    """
+
+    _shared: "dict[int, ScanPool]" = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers: int | None = None):
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, workers: int | None = None) -> "ScanPool":
+        workers = max(1, int(workers or os.cpu_count() or 1))
+        with cls._shared_lock:
+            pool = cls._shared.get(workers)
+            if pool is None:
+                pool = cls._shared[workers] = cls(workers)
+                atexit.register(pool.shutdown)
+            return pool
+
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        """The running pool, started if needed; None where process pools do not work."""
+        with self._lock:
+            if self._pool is None:
+                try:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                except (OSError, NotImplementedError, ImportError, ValueError):
+                    return None
+            return self._pool
+
+    def discard(self) -> None:
+        """Drops a broken pool (a worker died); the next scan starts a fresh one."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+class ParallelRegexScanner(RegexStudentScanner):
+    """
+    Same results as RegexStudentScanner, with student folders sharded across
+    a process pool (by default the long-lived ScanPool.shared()).
+
+    At most `max_in_flight` students are queued on the pool at once, so a
+    huge cohort does not pile up pending work, and results are merged back
+    into folder order whatever order the workers finish in. Cohorts smaller
+    than `min_students` (not worth the hand-off) and platforms without
+    working process pools fall back to the serial walk.
+    """
+
+    def __init__(self, root_path: str, workers: int | None = None, max_in_flight: int | None = None,
+                 min_students: int = 8, limits: Optional[ScanLimits] = None, cache: Optional[ScanCache] = None,
+                 index=None, pool: Optional[ScanPool] = None):
+        super().__init__(root_path, limits, cache, index)
+        self.pool = pool or ScanPool.shared(workers)
+        self.workers = self.pool.workers
+        self.max_in_flight = max(1, int(max_in_flight or self.workers * 2))
+        self.min_students = min_students
+
+    def scan(self, pattern: str):
+        steps = self._iter_parallel(pattern, block=True)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def iter_scan(self, pattern: str):
+        """
+        Job form: yields a short sleep while every in-flight student is still
+        being scanned, so the UI loop stays free while the pool works.
+        """
+        return self._iter_parallel(pattern, block=False)
+
+    def _iter_parallel(self, pattern: str, block: bool):
+        # Compiled here only so a bad pattern raises before any work is handed to the pool.
+        make_matcher(pattern, self.limits)
+        dirs = self.iter_student_dirs()
+        if self.workers < 2 or len(dirs) < self.min_students:
+            return (yield from RegexStudentScanner.iter_scan(self, pattern))
+
+        pool = self.pool.executor()
+        if pool is None:
+            return (yield from RegexStudentScanner.iter_scan(self, pattern))
+
+        pkey = self._pattern_key(pattern)
+        candidates = self._candidates(pattern)
+        self.progress = ScanProgress(len(dirs))
+        slots: list[ScanStudentResult | None] = [None] * len(dirs)
+        pending = {}
+        next_dir = 0
+        try:
+            while next_dir < len(dirs) or pending:
+                while next_dir < len(dirs) and len(pending) < self.max_in_flight:
+                    student_id, folder = dirs[next_dir]
+                    cached = self._cached(pkey, student_id)
+                    pruned = self._pruned(student_id, candidates)
+                    fut = pool.submit(scan_student, student_id, folder, pattern, self.limits, cached, pruned)
+                    pending[fut] = next_dir
+                    next_dir += 1
+                done, _ = wait(list(pending), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+                if not done:
+                    yield 0.02
+                    continue
+                for fut in done:
+                    try:
+                        result, fresh = fut.result()
+                    except BrokenProcessPool:
+                        self.pool.discard()
+                        raise
+                    self.progress.files_done += result.file_count
+                    self.progress.bytes_read += result.bytes_read
+                    self._finished(pkey, result, fresh)
+                    slots[pending.pop(fut)] = result
+                yield
+        finally:
+            # Also runs when a scan is cancelled: drop its queued students; the pool itself stays up.
+            for fut in pending:
+                fut.cancel()
+
+        self._save_cache()
+        results = [r for r in slots if r is not None]
+        blank_students = [r.student_id for r in results if r.file_count == 0]
+        return results, blank_students
+
+
+class ScanThread:
+    """
+    Runs a scanner's iter_scan on a worker thread.
+
+    Everything the UI needs arrives on `events` as (kind, payload): "student"
+    with each ScanStudentResult as it completes, then exactly one of "done"
+    ((results, blank_students) in folder order), "cancelled" or "error".
+    cancel() is checked between files and during pool waits, so the thread
+    stops promptly; pool workers drop their queued students, and a student
+    already being scanned finishes in the background with its result ignored.
+
+    `open_cache` / `open_index` (optional) are called on the worker thread,
+    since a sqlite connection belongs to the thread that opened it.
+    """
+
+    done_kind = "done"
+
+    def __init__(self, scanner: Optional[RegexStudentScanner], pattern=None,
+                 open_cache: Optional[Callable[[], Optional[ScanCache]]] = None,
+                 open_index: Optional[Callable[[], object]] = None):
+        self.scanner = scanner
+        self.pattern = pattern
+        self.open_cache = open_cache
+        self.open_index = open_index
+        self.events: "queue.Queue[tuple]" = queue.Queue()
+        self._cancel = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="regex-scan", daemon=True)
+
+    @property
+    def progress(self) -> ScanProgress:
+        return self.scanner.progress
+
+    @property
+    def alive(self) -> bool:
+        return self.thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def start(self) -> "ScanThread":
+        self.thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _steps(self):
+        scanner = self.scanner
+        scanner.on_result = lambda r: self.events.put(("student", r))
+        if self.open_cache is not None:
+            scanner.cache = self.open_cache()
+        if self.open_index is not None:
+            scanner.index = self.open_index()
+        return scanner.iter_scan(self.pattern)
+
+    def _close(self) -> None:
+        for attr in ("cache", "index"):
+            res = getattr(self.scanner, attr, None)
+            if res is not None:
+                try:
+                    res.close()
+                except Exception:
+                    pass
+                setattr(self.scanner, attr, None)
+
+    def _run(self) -> None:
+        try:
+            steps = self._steps()
+            while True:
+                if self._cancel.is_set():
+                    steps.close()
+                    self.events.put(("cancelled", None))
+                    return
+                try:
+                    out = next(steps)
+                except StopIteration as done:
+                    self.events.put((self.done_kind, done.value))
+                    return
+                if isinstance(out, (int, float)) and out > 0:
+                    self._cancel.wait(out)
+        except Exception as e:
+            self.events.put(("error", e))
+        finally:
+            self._close()
+
+
+class IndexThread(ScanThread):
+    """
+    Builds or refreshes a ScanIndex on a worker thread; same events as
+    ScanThread, finishing with ("indexed", stats) instead of "done".
+    """
+
+    done_kind = "indexed"
+
+    def __init__(self, open_index: Callable[[], object]):
+        super().__init__(None, open_index=open_index)
+        self.index = None
+        self._progress = ScanProgress()
+
+    @property
+    def progress(self) -> ScanProgress:
+        return self._progress
+
+    def _steps(self):
+        self.index = self.open_index()
+        return self.index.update(self._progress)
+
+    def _close(self) -> None:
+        if self.index is not None:
+            try:
+                self.index.close()
+            except Exception:
+                pass
+            self.index = None
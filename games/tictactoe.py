@@ -99,7 +99,7 @@ class TicTacToeSequence(GameBase):
 
         self.turn = "O"
         try:
-            self.app.root.after(150, self._bot_move)
+            self.app.clock.once(150, self._bot_move, background=True)
         except Exception:
             self._bot_move()
 
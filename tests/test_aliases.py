@@ -0,0 +1,59 @@
+import os
+
+from core.engine import GameEngine
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _engine(tmp_path):
+    out = []
+    engine = GameEngine(BASE_DIR, save_dir=str(tmp_path), sink=out.append, persist=False)
+    return engine, out
+
+
+def test_cycles_are_rejected_with_the_chain(tmp_path):
+    engine, out = _engine(tmp_path)
+    engine.execute("alias a=b")
+    engine.execute("alias b=c")
+    engine.execute("alias c=a")
+    assert out[-1] == "[ERR] alias cycle: c -> a -> b -> c"
+    assert "c" not in engine.router.aliases
+
+    engine.execute("alias self=self")
+    assert out[-1].startswith("[ERR] alias cycle")
+
+
+def test_alias_over_a_real_command_stops_at_the_command(tmp_path):
+    engine, out = _engine(tmp_path)
+    engine.execute('alias "help=help solve"')
+    assert out[-1] == "[OK] alias help=help solve"
+    assert engine.router.expand_alias("help") == ["help", "solve"]
+
+
+def test_chained_expansion_and_cache_invalidation(tmp_path):
+    engine, out = _engine(tmp_path)
+    router = engine.router
+    engine.execute('alias "h2=history 2"')
+    engine.execute("alias hh=h2")
+    assert router.expand_alias("hh") == ["history", "2"]
+    engine.execute('alias "h2=history 1"')
+    assert router.expand_alias("hh") == ["history", "1"]
+    engine.execute("alias -d h2")
+    assert router.expand_alias("hh") == ["h2"]
+
+
+def test_bad_quotes_are_rejected(tmp_path):
+    engine, out = _engine(tmp_path)
+    engine.execute("alias 'q2=say \"oops'")
+    assert out[-1] == "[ERR] Bad alias (bad quotes?)."
+
+
+def test_argument_completion_follows_alias_chains(tmp_path):
+    engine, out = _engine(tmp_path)
+    router = engine.router
+    engine.execute("alias t=travel")
+    engine.execute("alias tt=t")
+    direct = router.complete("travel N")
+    assert direct[1]
+    assert router.complete("tt N")[1] == direct[1]
+    assert router.complete("t N")[1] == direct[1]
@@ -0,0 +1,44 @@
+import sqlite3
+
+from core.encryption import Encryption
+from core.eventdb import EncryptedEventDB, EventWriter
+
+
+def _db(tmp_path):
+    return EncryptedEventDB(
+        str(tmp_path / "events.db"), encryption=Encryption(rounds=1000),
+        password_getter=lambda: "pw", save_dir=str(tmp_path),
+    )
+
+
+def _kinds(db):
+    con = sqlite3.connect(db.db_path)
+    try:
+        return [k for (k,) in con.execute("SELECT kind FROM events ORDER BY id")]
+    finally:
+        con.close()
+
+
+def test_threaded_writer_flushes_in_order_and_snapshots_payload(tmp_path):
+    db = _db(tmp_path)
+    writer = EventWriter(db, threaded=True)
+    obj = {"n": 1}
+    for i in range(5):
+        writer.put(f"k{i}", obj)
+    obj["n"] = 2
+    assert writer.flush(timeout=10)
+    assert writer.pending == 0 and writer.written == 5
+    assert _kinds(db) == [f"k{i}" for i in range(5)]
+
+    con = sqlite3.connect(db.db_path)
+    blob = con.execute("SELECT payload FROM events LIMIT 1").fetchone()[0]
+    con.close()
+    assert Encryption(rounds=1000).decrypt_bytes(blob, "pw") == b'{"n": 1}'
+
+
+def test_inline_writer_writes_before_returning(tmp_path):
+    db = _db(tmp_path)
+    writer = EventWriter(db, threaded=False)
+    writer.put("a", {})
+    assert _kinds(db) == ["a"]
+    assert writer.flush(timeout=0)
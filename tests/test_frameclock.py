@@ -0,0 +1,67 @@
+import time
+
+from ui.frameclock import FrameClock
+
+
+class FakeRoot:
+    def __init__(self):
+        self.pending = {}
+        self._ids = 0
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def after(self, ms, fn):
+        self._ids += 1
+        self.pending[self._ids] = fn
+        return self._ids
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def after_idle(self, fn):
+        fn()
+
+    def fire(self):
+        for after_id, fn in list(self.pending.items()):
+            self.pending.pop(after_id, None)
+            fn()
+
+
+def test_unfocused_runs_only_background_subscribers():
+    root = FakeRoot()
+    clock = FrameClock(root)
+    ran = []
+    clock.once(0, lambda: ran.append("fg"))
+    clock.once(0, lambda: ran.append("bg"), background=True)
+    clock.unfocused = True
+    root.fire()
+    assert ran == ["bg"]
+
+    clock.unfocused = False
+    clock._schedule()
+    root.fire()
+    assert ran == ["bg", "fg"]
+
+
+def test_hidden_runs_nothing_and_cancel_removes():
+    root = FakeRoot()
+    clock = FrameClock(root)
+    ran = []
+    sub = clock.every(16, lambda: ran.append(1), background=True)
+    clock.hidden = True
+    clock._schedule()
+    assert not root.pending
+    clock.hidden = False
+    clock.cancel(sub)
+    clock._schedule()
+    assert not root.pending and not clock.subs
+
+
+def test_every_reschedules_from_now_after_falling_behind():
+    root = FakeRoot()
+    clock = FrameClock(root)
+    sub = clock.every(50, lambda: None)
+    sub.due = time.monotonic() - 10
+    root.fire()
+    assert sub.due > time.monotonic()
@@ -0,0 +1,66 @@
+import os
+
+from core.history import CommandHistory
+
+
+def test_search_newest_first():
+    h = CommandHistory(capacity=10)
+    for line in ["go north", "look", "go south", "inventory"]:
+        h.append(line)
+    assert h.search("go") == (2, "go south")
+    assert h.search("go", before=2) == (0, "go north")
+    assert h.search("GO SO") == (2, "go south")
+    assert h.search("nope") is None
+
+
+def test_search_short_query_without_trigrams():
+    h = CommandHistory(capacity=10)
+    h.append("ab cd")
+    h.append("xy")
+    assert h.search("b") == (0, "ab cd")
+    assert h.search("") == (1, "xy")
+
+
+def test_duplicate_consecutive_lines_collapse():
+    h = CommandHistory(capacity=10)
+    h.append("look")
+    h.append("look")
+    assert len(h) == 1
+
+
+def test_eviction_drops_postings():
+    h = CommandHistory(capacity=3)
+    for i in range(6):
+        h.append(f"cmd{i} run")
+    assert h.first_seq == 3
+    assert h.search("cmd1") is None
+    assert h.search("cmd4") == (4, "cmd4 run")
+    assert h.search("run") == (5, "cmd5 run")
+    assert h.search("run", before=4) == (3, "cmd3 run")
+    assert h.search("run", before=3) is None
+    assert all(min(p) >= h.first_seq for p in h._grams.values())
+
+
+def test_attach_loads_tail_and_compacts(tmp_path):
+    path = os.path.join(tmp_path, "history.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(25):
+            f.write(f"line {i}\n")
+    h = CommandHistory(capacity=10, path=path)
+    assert list(h)[0] == "line 15"
+    assert h.search("line 2") == (9, "line 24")
+    with open(path, encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"line {i}" for i in range(15, 25)]
+
+    h.append("new")
+    with open(path, encoding="utf-8") as f:
+        assert f.read().splitlines()[-1] == "new"
+
+
+def test_redact_applies_to_the_file_only(tmp_path):
+    path = os.path.join(tmp_path, "history.txt")
+    h = CommandHistory(capacity=10, path=path, redact=lambda line: line.split()[0])
+    h.append("solve code 1234")
+    assert h.search("1234") == (0, "solve code 1234")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "solve\n"
@@ -0,0 +1,26 @@
+import os
+
+from core.engine import GameEngine
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_secret_arguments_never_reach_history_file(tmp_path):
+    engine = GameEngine(BASE_DIR, save_dir=str(tmp_path), sink=lambda line: None, persist=False)
+    path = os.path.join(tmp_path, "history.txt")
+    engine.router.history.attach(path)
+    for line in [
+        "solve code 4412",
+        "sove regex 3",
+        "travelgod N3 GOD-N3-1111",
+        "godskip GOD-N1-4412",
+        "selftest hunter2",
+        "godsk GOD-N1-9999",
+        "help solve",
+        "selftest 'unbalanced",
+    ]:
+        engine.execute(line)
+    with open(path, encoding="utf-8") as f:
+        written = f.read().splitlines()
+    assert written == ["solve", "sove", "travelgod", "godskip", "selftest", "godsk", "help solve", "selftest"]
+    assert engine.router.history.search("4412") == (3, "godskip GOD-N1-4412")
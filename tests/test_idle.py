@@ -0,0 +1,87 @@
+from core.idle import IdleScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, ms):
+        self.t += ms / 1000.0
+
+
+def _sched(clock, **kw):
+    slices = []
+    sched = IdleScheduler(
+        after_idle=slices.append,
+        after=lambda ms, fn: slices.append(fn),
+        clock=clock,
+        **kw,
+    )
+    return sched, slices
+
+
+def _task(clock, log, name, steps, cost_ms):
+    for i in range(steps):
+        clock.advance(cost_ms)
+        log.append((name, i))
+        yield
+
+
+def _run_slice(slices):
+    fn = slices.pop(0)
+    fn()
+
+
+def test_slice_respects_budget_and_priority():
+    clock = FakeClock()
+    sched, slices = _sched(clock, budget_ms=4.0, quiet_ms=0.0)
+    log = []
+    sched.submit("low", _task(clock, log, "low", 10, 1.0))
+    sched.submit("high", _task(clock, log, "high", 2, 1.0), priority=5)
+    _run_slice(slices)
+    assert log == [("high", 0), ("high", 1), ("low", 0), ("low", 1)]
+    assert sched.overruns == 0
+    while slices:
+        _run_slice(slices)
+    assert len(log) == 12 and sched.finished == 2 and not sched.tasks
+
+
+def test_expensive_step_waits_for_a_fresh_slice():
+    clock = FakeClock()
+    sched, slices = _sched(clock, budget_ms=4.0, quiet_ms=0.0)
+    log = []
+    sched.submit("slow", _task(clock, log, "slow", 3, 3.0))
+    _run_slice(slices)
+    assert len(log) == 1
+    _run_slice(slices)
+    assert len(log) == 2
+
+
+def test_input_defers_slices():
+    clock = FakeClock()
+    sched, slices = _sched(clock, budget_ms=4.0, quiet_ms=60.0)
+    log = []
+    clock.advance(1000)
+    sched.note_input()
+    sched.submit("t", _task(clock, log, "t", 1, 0.1))
+    _run_slice(slices)
+    assert log == [] and sched.deferred == 1
+    clock.advance(61)
+    while slices:  # the delayed wake re-enters through after_idle
+        _run_slice(slices)
+    assert log == [("t", 0)]
+
+
+def test_headless_runs_on_submit_and_reports_failures():
+    events = []
+    sched = IdleScheduler(on_event=events.append)
+
+    def boom():
+        yield
+        raise RuntimeError("x")
+
+    sched.submit("boom", boom())
+    assert sched.failed == 1 and events and "boom failed" in events[0]
@@ -0,0 +1,99 @@
+from core.jobs import JobScheduler, Sleep
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _realtime(clock, **kw):
+    calls = []
+    sched = JobScheduler(schedule=lambda ms, fn: calls.append((ms, fn)), clock=clock, **kw)
+    return sched, calls
+
+
+def _tick(calls):
+    _, fn = calls.pop(0)
+    fn()
+
+
+def test_headless_runs_to_completion_and_keeps_result():
+    sched = JobScheduler()
+
+    def task():
+        yield 5.0
+        return "ok"
+
+    job = sched.spawn("t", task())
+    assert job.state == "done" and job.result == "ok"
+    assert sched.list() == []
+
+
+def test_round_robin_and_sleep():
+    clock = FakeClock()
+    sched, calls = _realtime(clock)
+    log = []
+
+    def worker(name, n):
+        for i in range(n):
+            log.append((name, i))
+            yield
+
+    async def sleeper():
+        log.append(("s", 0))
+        await Sleep(1.0)
+        log.append(("s", 1))
+
+    sched.spawn("a", worker("a", 2))
+    sched.spawn("b", worker("b", 2))
+    sched.spawn("s", sleeper())
+    assert len(calls) == 1
+    _tick(calls)
+    assert log[:3] == [("a", 0), ("b", 0), ("s", 0)]
+    assert ("s", 1) not in log
+    while calls and not [c for c in calls if c[0] >= 1000]:
+        _tick(calls)
+    assert calls and calls[0][0] == 1000
+    clock.t = 1.0
+    _tick(calls)
+    assert ("s", 1) in log and not sched.jobs
+
+
+def test_slice_budget_yields_back_to_the_loop():
+    clock = FakeClock()
+    sched, calls = _realtime(clock, slice_ms=8.0)
+
+    def busy():
+        while True:
+            clock.t += 0.005
+            yield
+
+    job = sched.spawn("busy", busy())
+    _tick(calls)
+    assert job.steps == 2 and calls == [(1, calls[0][1])]
+    assert sched.kill(job.id) and job.state == "killed"
+    assert not sched.kill(job.id)
+
+
+def test_failure_is_reported_and_fg_finishes():
+    events = []
+    clock = FakeClock()
+    sched, calls = _realtime(clock)
+    sched.on_event = events.append
+
+    def bad():
+        yield
+        raise ValueError("nope")
+
+    def slow():
+        yield 30.0
+        return 3
+
+    b = sched.spawn("bad", bad())
+    s = sched.spawn("slow", slow())
+    assert sched.fg(s.id) and s.result == 3
+    sched.drain()
+    assert b.state == "failed" and "nope" in events[0]
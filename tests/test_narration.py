@@ -0,0 +1,37 @@
+import os
+
+from core.engine import GameEngine, NullView
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RecordingView(NullView):
+    def __init__(self):
+        self.lines = []
+
+    def narrate(self, speaker, text, preempt=False):
+        self.lines.append((speaker, text, preempt))
+        return 0
+
+
+def _engine(tmp_path):
+    view = RecordingView()
+    engine = GameEngine(BASE_DIR, save_dir=str(tmp_path), sink=lambda line: None, view=view, persist=False)
+    return engine, view
+
+
+def test_first_line_of_a_node_preempts_older_speech(tmp_path):
+    engine, view = _engine(tmp_path)
+    lines = engine.story_lines(engine.state["current_node"])
+    assert len(lines) >= 2
+
+    engine.execute("story")
+    engine.execute("story")
+    assert [p for _, _, p in view.lines] == [True, False]
+
+
+def test_story_all_preempts_only_its_first_line(tmp_path):
+    engine, view = _engine(tmp_path)
+    n = len(engine.story_lines(engine.state["current_node"]))
+    engine.execute("story all")
+    assert [p for _, _, p in view.lines] == [True] + [False] * (n - 1)
@@ -0,0 +1,63 @@
+from ui.panelcache import GamePanelCache
+
+
+class FakeFrame:
+    def __init__(self, children=0):
+        self.children = [FakeFrame() for _ in range(children)]
+        self.destroyed = False
+
+    def winfo_children(self):
+        return self.children
+
+    def destroy(self):
+        self.destroyed = True
+
+
+class FakeGame:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+def _put(cache, game_id, started=True, children=0):
+    return cache.put(game_id, FakeGame(), FakeFrame(children), started=started)
+
+
+def test_lru_eviction_spares_current():
+    cache = GamePanelCache(max_panels=2)
+    _put(cache, "a")
+    _put(cache, "b")
+    cache.current = "a"
+    _put(cache, "c")
+    assert list(cache.panels) == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_prefetch_never_evicts_started_panels():
+    evicted = []
+    cache = GamePanelCache(max_panels=2, on_evict=lambda gid, entry: evicted.append(gid))
+    a = _put(cache, "a")
+    _put(cache, "b")
+    assert _put(cache, "guess", started=False) is None
+    assert list(cache.panels) == ["a", "b"]
+    assert not a.game.stopped
+    assert cache.declined == 1 and evicted == []
+
+
+def test_prefetch_displaces_older_prefetch_and_reports_it():
+    evicted = []
+    cache = GamePanelCache(max_panels=2, on_evict=lambda gid, entry: evicted.append((gid, entry.started)))
+    _put(cache, "a")
+    _put(cache, "p1", started=False)
+    assert _put(cache, "p2", started=False) is not None
+    assert list(cache.panels) == ["a", "p2"]
+    assert evicted == [("p1", False)]
+
+
+def test_widget_budget_counts_children():
+    cache = GamePanelCache(max_panels=10, max_widgets=10)
+    _put(cache, "a", children=5)
+    _put(cache, "b", children=5)
+    assert list(cache.panels) == ["b"]
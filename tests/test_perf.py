@@ -0,0 +1,60 @@
+import os
+
+from core.engine import GameEngine
+from core.perf import PerfRecorder, StreamingHistogram
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_histogram_percentiles_within_bucket_error():
+    h = StreamingHistogram()
+    for i in range(1, 1001):
+        h.add(i / 10.0)  # 0.1 .. 100 ms
+    s = h.summary()
+    assert s["count"] == 1000
+    assert abs(s["mean_ms"] - 50.05) < 1e-6
+    assert s["max_ms"] == 100.0
+    for q, exact in ((0.50, 50.0), (0.95, 95.0), (0.99, 99.0)):
+        assert exact <= h.percentile(q) <= exact * 1.1
+
+
+def test_histogram_empty_and_tiny_values():
+    h = StreamingHistogram()
+    assert h.percentile(0.5) == 0.0
+    h.add(0.0)
+    h.add(0.0005)
+    assert h.percentile(1.0) <= 0.001
+    assert h.summary()["count"] == 2
+
+
+def test_recorder_since_and_reset():
+    p = PerfRecorder(enabled=True)
+    p.record("x", 2.0)
+    p.record("x", 4.0)
+    assert p.report()["metrics"]["x"]["count"] == 2
+    assert any(row.startswith("x ") for row in p.table())
+    p.reset()
+    assert p.metrics == {}
+
+
+def _engine(tmp_path):
+    out = []
+    engine = GameEngine(BASE_DIR, save_dir=str(tmp_path), sink=out.append, persist=False)
+    engine.perf.enabled = False
+    return engine, out
+
+
+def test_perf_on_mid_command_records_no_bogus_sample(tmp_path):
+    engine, _ = _engine(tmp_path)
+    engine.execute("perf on")
+    assert "cmd.perf" not in engine.perf.metrics
+    engine.execute("help")
+    assert engine.perf.metrics["cmd.help"].count == 1
+    assert engine.perf.metrics["cmd.help"].max < 10_000
+
+
+def test_perf_off_mid_command_records_nothing(tmp_path):
+    engine, _ = _engine(tmp_path)
+    engine.execute("perf on")
+    engine.execute("perf off")
+    assert "cmd.perf" not in engine.perf.metrics
@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from core.idle import IdleScheduler
+from core.prefetch import NodePrefetcher
+
+
+def _engine():
+    nodes = {"n1": {"games": [{"id": "nim"}]}, "n2": {"games": [{"id": "ttt"}]}, "n3": {}}
+    return SimpleNamespace(
+        view=SimpleNamespace(realtime=True),
+        cfg={"nodes": nodes},
+        node_cfg=lambda nid: nodes.get(nid, {}),
+        idle=IdleScheduler(after_idle=lambda fn: None),
+    )
+
+
+def test_forget_game_and_reset():
+    p = NodePrefetcher(_engine())
+    p.warmed.update({"n1", "n2", "n3"})
+    p.forget_game("nim")
+    assert p.warmed == {"n2", "n3"}
+
+    p.request(["n1"])
+    assert list(p.queue) == ["n1"] and p.task.alive
+    p.reset()
+    assert not p.warmed and not p.queue and p.task is None
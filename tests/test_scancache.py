@@ -0,0 +1,79 @@
+import os
+
+from games.scancache import ScanCache, decode_result, encode_result
+from games.scanner import RegexStudentScanner, ScanLimits
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _cohort(tmp_path):
+    root = str(tmp_path / "cohort")
+    for s in range(4):
+        for f in range(3):
+            _write(os.path.join(root, f"s{s}", f"f{f}.py"), f"answer {s}{f}\n")
+    return root
+
+
+def _scan(root, cache_dir, pattern, limits=None):
+    cache = ScanCache.for_root(cache_dir, root)
+    try:
+        rows, _ = RegexStudentScanner(root, limits=limits, cache=cache).scan(pattern)
+        return rows, cache.stats()
+    finally:
+        cache.close()
+
+
+def _summary(rows):
+    return [(r.student_id, r.file_count, r.match_count, r.question_matches) for r in rows]
+
+
+def test_result_codes_round_trip():
+    for mask in (0, 1, 5):
+        for skipped in (False, True):
+            assert decode_result(encode_result(mask, skipped)) == (mask, skipped)
+
+
+def test_second_scan_hits_and_changes_invalidate(tmp_path):
+    root = _cohort(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    first, stats = _scan(root, cache_dir, r"answer 1\d")
+    assert stats == {"hits": 0, "misses": 12}
+    again, stats = _scan(root, cache_dir, r"answer 1\d")
+    assert stats == {"hits": 12, "misses": 0}
+    assert _summary(again) == _summary(first)
+    assert sum(r.cached_files for r in again) == 12
+
+    path = os.path.join(root, "s2", "f0.py")
+    _write(path, "answer 10 now\n")
+    os.utime(path, ns=(1, 1))
+    os.remove(os.path.join(root, "s3", "f2.py"))
+    rows, stats = _scan(root, cache_dir, r"answer 1\d")
+    assert stats == {"hits": 10, "misses": 1}
+    assert _summary(rows) == _summary(RegexStudentScanner(root).scan(r"answer 1\d")[0])
+
+
+def test_pattern_and_limits_are_part_of_the_key(tmp_path):
+    root = _cohort(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    _scan(root, cache_dir, "answer")
+    _, stats = _scan(root, cache_dir, "answer 0")
+    assert stats["hits"] == 0
+    _, stats = _scan(root, cache_dir, "answer", limits=ScanLimits(max_file_bytes=10))
+    assert stats["hits"] == 0
+    _, stats = _scan(root, cache_dir, "answer")
+    assert stats["hits"] == 12
+    label_order = {"a": "answer 0", "b": "answer 1"}
+    assert ScanCache.pattern_key(label_order) != ScanCache.pattern_key(dict(reversed(label_order.items())))
+
+
+def test_eviction_by_row_cap(tmp_path):
+    cache = ScanCache(str(tmp_path / "c.sqlite"), max_rows=5)
+    pkey = ScanCache.pattern_key("x")
+    cache.store(pkey, [(f"s/{i}", 1, 1, 0) for i in range(8)])
+    assert cache.evict() == 3
+    assert len(cache.lookup(pkey, "s")) == 5
+    cache.close()
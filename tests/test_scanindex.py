@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from games.scanindex import ScanIndex, file_grams, regex_query
+from games.scanner import RegexStudentScanner
+
+
+def _g(text):
+    data = text.encode("utf-8").lower()
+    return {int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2)}
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("hello", _g("hello")),
+    ("ab", None),
+    (r"\d+", None),
+    ("foo|ba", None),
+    ("foo|bar", ("or", [_g("foo"), _g("bar")])),
+    (r"(?:abc){0,2}xyz", _g("xyz")),
+    (r"(?:abc)+xyz", _g("abc") | _g("xyz")),
+    (r"^answer \d+$", _g("answer ")),
+    (r"ab\bcd", _g("abcd")),
+    (r"(?i)Hello", _g("hello")),
+    (r"(?i)kate", _g("ate")),  # k can fold to the Kelvin sign, so the run restarts after it
+    (r"(?i)kite", None),
+    ("a[bc]def", _g("def")),
+])
+def test_regex_query(pattern, expected):
+    assert regex_query(pattern) == expected
+
+
+def test_file_grams_cover_name_and_folded_content():
+    grams = file_grams(b"ABCd", "x.py")
+    assert grams == _g("abcd") | _g("x.py")
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def cohort(tmp_path):
+    root = tmp_path / "cohort"
+    for s in range(10):
+        for f in range(4):
+            _write(str(root / f"s{s}" / f"f{f}.py"), f"def solve():\n    return {s * 4 + f}  # answer {s}{f}\n")
+    with open(root / "s3" / "latin1.txt", "wb") as fh:
+        fh.write("caf\xe9 answer 99".encode("latin-1"))
+    _write(str(root / "s4" / "big.txt"), "answer 77\n" + "x" * 5000)
+    return str(root)
+
+
+def _build(tmp_path, cohort):
+    index = ScanIndex.for_root(str(tmp_path / "idx"), cohort, max_index_bytes=4096)
+    steps = index.update()
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return index, done.value
+
+
+def _summary(results):
+    rows, blanks = results
+    return [(r.student_id, r.file_count, r.match_count, r.question_matches) for r in rows], blanks
+
+
+PATTERNS = [
+    r"answer 1\d\b", r"answer 99", r"answer 77", r"return 3[0-9]", "(?i)DEF SOLVE", "zzz",
+    r"^def \w+", "f3.py|answer 42", {"q1": "answer 21", "q2": r"return \d7"}, r"\d+",
+]
+
+
+def _assert_same_as_full_scan(index, cohort):
+    for pattern in PATTERNS:
+        pruned = RegexStudentScanner(cohort, index=index).scan(pattern)
+        full = RegexStudentScanner(cohort).scan(pattern)
+        assert _summary(pruned) == _summary(full), pattern
+
+
+def test_pruned_scans_match_full_scans(tmp_path, cohort):
+    index, stats = _build(tmp_path, cohort)
+    assert stats["files"] == 42 and stats["indexed"] == 42
+    # Not UTF-8 / over the size cap: kept but never pruned.
+    assert index.stats()["indexed"] == 40
+    _assert_same_as_full_scan(index, cohort)
+    result = RegexStudentScanner(cohort, index=index).scan(r"answer 1\d\b")
+    assert sum(r.pruned_files for r in result[0]) > 30
+    index.close()
+
+
+def test_stale_and_deleted_files(tmp_path, cohort):
+    index, _ = _build(tmp_path, cohort)
+    path = os.path.join(cohort, "s7", "f0.py")
+    _write(path, "zzz and answer 10\n")
+    os.utime(path, ns=(1, 1))
+    os.remove(os.path.join(cohort, "s2", "f1.py"))
+    _assert_same_as_full_scan(index, cohort)
+
+    _, stats = _build(tmp_path, cohort)
+    index.close()
+    index, stats = _build(tmp_path, cohort)
+    assert stats["indexed"] == 0 and stats["removed"] == 0
+    _assert_same_as_full_scan(index, cohort)
+    counts = dict(index.con.execute("SELECT gram, COUNT(*) FROM grams GROUP BY gram"))
+    assert counts == dict(index.con.execute("SELECT gram, n FROM gram_counts"))
+    index.close()
+
+
+def test_candidates_only_touch_rare_postings(tmp_path, cohort):
+    index, _ = _build(tmp_path, cohort)
+    cands = index.candidates("def solve.*answer 21")
+    assert "s2/f1.py" in cands
+    assert {p for p in cands if not p.startswith(("s3/latin1", "s4/big"))} == {"s2/f1.py"}
+    index.close()
@@ -0,0 +1,56 @@
+import pytest
+
+from games.scanner import ParallelRegexScanner, RegexStudentScanner, ScanPool
+
+
+def _summary(results):
+    rows, blanks = results
+    return [(r.student_id, r.file_count, r.match_count, r.question_matches) for r in rows], blanks
+
+
+@pytest.fixture(scope="module")
+def cohort(tmp_path_factory):
+    root = tmp_path_factory.mktemp("cohort")
+    for s in range(12):
+        folder = root / f"s{s:02d}"
+        folder.mkdir()
+        if s == 5:
+            continue  # a blank student
+        for f in range(3):
+            (folder / f"f{f}.py").write_text(f"answer {s * 3 + f}\nx = {f}\n", encoding="utf-8")
+        (folder / "notes.txt").write_text("naïve text\n" * (s + 1), encoding="utf-8")
+    return str(root)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    p = ScanPool(workers=2)
+    yield p
+    p.shutdown()
+
+
+@pytest.mark.parametrize("pattern", [
+    r"answer 1\d\b",
+    r"(?m)^x = 1$",
+    "naïve",
+    "f2",
+    {"q1": r"answer \d*7\b", "q2": "x = 2", "q3": "nothing"},
+])
+def test_parallel_matches_serial(cohort, pool, pattern):
+    serial = RegexStudentScanner(cohort).scan(pattern)
+    parallel = ParallelRegexScanner(cohort, min_students=2, pool=pool).scan(pattern)
+    assert _summary(parallel) == _summary(serial)
+    assert _summary(serial)[1] == ["s05"]
+
+
+def test_pool_is_reused_across_scans(cohort, pool):
+    ParallelRegexScanner(cohort, min_students=2, pool=pool).scan("answer")
+    first = pool.executor()
+    ParallelRegexScanner(cohort, min_students=2, pool=pool).scan("x = 1")
+    assert pool.executor() is first
+    assert first._mp_context.get_start_method() == "spawn"
+
+
+def test_small_cohorts_scan_serially(cohort, pool):
+    scanner = ParallelRegexScanner(cohort, min_students=100, pool=pool)
+    assert _summary(scanner.scan("answer")) == _summary(RegexStudentScanner(cohort).scan("answer"))
@@ -0,0 +1,79 @@
+import re
+import time
+
+import pytest
+
+from games.scanner import FileMatcher, PatternSetMatcher, ScanLimits
+
+# Small windows so a few KB of text spans several of them. Every pattern
+# below has a non-ASCII alternative, which forces the decoded-text path.
+LIMITS = ScanLimits(chunk_bytes=4096, overlap_chars=256)
+
+
+def _write(tmp_path, data: str, name="f.txt"):
+    path = tmp_path / name
+    path.write_text(data, encoding="utf-8")
+    return str(path)
+
+
+def _match(tmp_path, pattern, data):
+    path = _write(tmp_path, data)
+    got = FileMatcher(pattern, LIMITS).match("f.txt", path)
+    assert got == bool(re.search(pattern, data)), pattern
+    return got
+
+
+def test_match_split_across_window_boundary(tmp_path):
+    for offset in range(4090, 4100):
+        data = "x" * offset + "needle" + "y" * 5000
+        assert _match(tmp_path, "needle|é", data)
+
+
+def test_dollar_at_window_end_is_not_a_match_when_the_line_goes_on(tmp_path):
+    for offset in range(4085, 4100):
+        pad = "z" * offset
+        assert not _match(tmp_path, r"(?m)^x = 1$|é", pad + "\nx = 1 + 2\n" + "w" * 5000)
+        assert _match(tmp_path, r"(?m)^x = 1$|é", pad + "\nx = 1\n" + "w" * 5000)
+
+
+def test_word_boundary_at_window_end(tmp_path):
+    for offset in range(4085, 4100):
+        assert not _match(tmp_path, r"\bcat\b|é", "." * offset + "cats" + "." * 5000)
+        assert _match(tmp_path, r"\bcat\b|é", "." * offset + "cat." + "." * 5000)
+
+
+def test_long_greedy_run_is_linear(tmp_path):
+    path = _write(tmp_path, "a" * 400_000)
+    matcher = FileMatcher("é?a+b|é?a+$", LIMITS)
+    t0 = time.perf_counter()
+    assert matcher.match("f.txt", path)
+    # One retry per position would take minutes here; the bounded search takes milliseconds.
+    assert time.perf_counter() - t0 < 2.0
+
+
+def test_pattern_set_masks_match_whole_file_search(tmp_path):
+    data = ("q" * 4000 + "\n") * 5 + "tail ünï\n"
+    path = _write(tmp_path, data)
+    patterns = {"a": "ünï$", "b": r"q\n", "c": "nope", "d": "(?m)^tail", "e": r"\Aq"}
+    mask, skipped = PatternSetMatcher(patterns, LIMITS).match_mask("f.txt", path)
+    assert not skipped
+    assert mask == sum(1 << i for i, p in enumerate(patterns.values()) if re.search(p, data))
+
+
+@pytest.mark.parametrize("pattern, data", [
+    ("é", "é"),
+    ("^é$", "é"),
+    ("^éa", "éa"),
+    (r"\Aé", "éb"),
+    ("ü$", "short ü"),
+    (r"(?m)^x = ü$", "x = ü"),
+    ("é", "a" * 300 + "é"),
+])
+def test_small_files_within_one_window(tmp_path, pattern, data):
+    assert _match(tmp_path, pattern, data)
+    assert _match(tmp_path, pattern, "x" * 5000 + "\n" + data) == bool(re.search(pattern, "x" * 5000 + "\n" + data))
+
+
+def test_start_anchor_only_matches_at_the_real_start(tmp_path):
+    assert not _match(tmp_path, r"\Aé", "x" * 5000 + "é")
+    assert not _match(tmp_path, r"^é", "a" * 10 + "é")
@@ -0,0 +1,44 @@
+from core.trie import Trie
+
+
+def test_complete_unique_and_extend():
+    t = Trie(["travel", "travelgod", "trace", "help", "history"])
+    assert len(t) == 5
+    assert t.complete("tra") == ["trace", "travel", "travelgod"]
+    assert t.complete("tra", limit=2) == ["trace", "travel"]
+    assert t.complete("x") == []
+    assert t.unique("he") == "help"
+    assert t.unique("travel") == "travel"
+    assert t.unique("tra") is None
+    assert t.unique("travelg") == "travelgod"
+    assert t.extend("tr") == ("tra", 3)
+    assert t.extend("trav") == ("travel", 2)
+    assert t.extend("zz") == ("zz", 0)
+
+
+def test_add_discard_keeps_counts():
+    t = Trie(["go", "goal"])
+    assert not t.add("go")
+    assert t.discard("go")
+    assert "go" not in t and "goal" in t
+    assert t.unique("g") == "goal"
+    assert not t.discard("go")
+    assert t.discard("goal")
+    assert len(t) == 0 and t.complete("") == []
+    assert not t.add("")
+
+
+def test_fold_keeps_original_spelling():
+    t = Trie(["Node_A", "node_b"], fold=True)
+    assert "NODE_A" in t
+    assert t.complete("NODE") == ["Node_A", "node_b"]
+    assert t.unique("node_a") == "Node_A"
+
+
+def test_values():
+    t = Trie()
+    t.add("x", value=42)
+    assert t.unique("x") == 42
+    t.add("x", value=7)
+    assert t.complete("") == [7]
+    assert len(t) == 1
@@ -0,0 +1,31 @@
+from core.tts import SpeechWorker
+
+
+class FakePlayer:
+    def __init__(self, available):
+        self.available = available
+
+
+class FakeCache:
+    pass
+
+
+def _worker(player):
+    return SpeechWorker(factory=lambda: None, cache=FakeCache(), player=player)
+
+
+def test_prerender_needs_a_player_that_can_play():
+    lines = [("A", "hello"), ("B", "")]
+    assert _worker(None).prerender(lines) == 0
+    assert _worker(FakePlayer(False)).prerender(lines) == 0
+    assert _worker(FakePlayer(True)).prerender(lines) == 1
+
+
+def test_preempt_and_skip_move_to_a_new_generation():
+    w = SpeechWorker(factory=lambda: None)
+    w.say("A", "one")
+    assert w._generation == 0
+    w.say("A", "two", preempt=True)
+    assert w._generation == 1
+    w.skip(all_lines=True)
+    assert w._generation == 2
@@ -0,0 +1,135 @@
+import time
+from typing import Callable, List, Optional
+
+
+class Subscription:
+    __slots__ = ("fn", "interval", "due", "background", "active")
+
+    def __init__(self, fn: Callable, interval: float, due: float, background: bool):
+        self.fn = fn
+        self.interval = interval
+        self.due = due
+        self.background = background
+        self.active = True
+
+
+class FrameClock:
+    """
+    One Tk `after` loop shared by every periodic UI callback.
+
+    Subscribers ask for a rate (`every`) or a single delayed call (`once`).
+    The clock keeps at most one pending `after`, set for the soonest due
+    subscriber, and runs everything due within the same frame together, so
+    with nothing due there are no wakeups at all.
+
+    While the window is minimized (<Unmap>) nothing runs. While the app has
+    lost focus only `background=True` subscribers run. Periodic subscribers
+    that fell behind run once and continue from now rather than catching up.
+    """
+
+    def __init__(self, root, frame_ms: int = 16):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.subs: List[Subscription] = []
+        self.hidden = False
+        self.unfocused = False
+        self.wakeups = 0
+        self._after = None
+        self._after_due = 0.0
+
+        root.bind("<Unmap>", self._on_unmap, add="+")
+        root.bind("<Map>", self._on_map, add="+")
+        root.bind("<FocusOut>", lambda e: self.root.after_idle(self._check_focus), add="+")
+        root.bind("<FocusIn>", lambda e: self.root.after_idle(self._check_focus), add="+")
+
+    @property
+    def paused(self) -> bool:
+        return self.hidden or self.unfocused
+
+    def every(self, interval_ms: int, fn: Callable, background: bool = False) -> Subscription:
+        interval = max(self.frame_ms, int(interval_ms)) / 1000.0
+        return self._add(Subscription(fn, interval, time.monotonic() + interval, background))
+
+    def once(self, delay_ms: int, fn: Callable, background: bool = False) -> Subscription:
+        return self._add(Subscription(fn, 0.0, time.monotonic() + max(0, int(delay_ms)) / 1000.0, background))
+
+    def cancel(self, sub: Optional[Subscription]) -> None:
+        if sub is None or not sub.active:
+            return
+        sub.active = False
+        try:
+            self.subs.remove(sub)
+        except ValueError:
+            pass
+
+    def _add(self, sub: Subscription) -> Subscription:
+        self.subs.append(sub)
+        self._schedule()
+        return sub
+
+    def _runnable(self, sub: Subscription) -> bool:
+        if self.hidden:
+            return False
+        return sub.background or not self.unfocused
+
+    def _schedule(self) -> None:
+        due = [s.due for s in self.subs if self._runnable(s)]
+        if not due:
+            self._cancel_after()
+            return
+        soonest = min(due)
+        if self._after is not None and self._after_due <= soonest:
+            return
+        self._cancel_after()
+        delay_ms = max(0, int((soonest - time.monotonic()) * 1000.0))
+        self._after_due = soonest
+        self._after = self.root.after(delay_ms, self._run)
+
+    def _cancel_after(self) -> None:
+        if self._after is not None:
+            try:
+                self.root.after_cancel(self._after)
+            except Exception:
+                pass
+        self._after = None
+
+    def _run(self) -> None:
+        self._after = None
+        self.wakeups += 1
+        now = time.monotonic()
+        horizon = now + self.frame_ms / 2000.0
+        for sub in list(self.subs):
+            if not sub.active or sub.due > horizon or not self._runnable(sub):
+                continue
+            if sub.interval:
+                sub.due += sub.interval
+                if sub.due <= now:
+                    sub.due = now + sub.interval
+            else:
+                self.cancel(sub)
+            try:
+                sub.fn()
+            except Exception:
+                pass
+        self._schedule()
+
+    # --- window state ---
+
+    def _on_unmap(self, e):
+        if e.widget is self.root:
+            self.hidden = True
+            self._schedule()
+
+    def _on_map(self, e):
+        if e.widget is self.root:
+            self.hidden = False
+            self._schedule()
+
+    def _check_focus(self):
+        try:
+            focused = self.root.focus_get()
+        except Exception:
+            # focus_get raises for some native dialogs; those belong to us.
+            focused = self.root
+        self.unfocused = focused is None
+        self._schedule()
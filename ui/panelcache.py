@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+def widget_count(w) -> int:
+    return 1 + sum(widget_count(c) for c in w.winfo_children())
+
+
+class CachedPanel:
+    __slots__ = ("game", "frame", "widgets", "started")
+
+    def __init__(self, game, frame, widgets: int, started: bool = True):
+        self.game = game
+        self.frame = frame
+        self.widgets = widgets
+        self.started = started
+
+
+class GamePanelCache:
+    """
+    Mounted game panels kept alive per game id, least recently shown first.
+
+    A hidden panel keeps its widgets and the game's in-progress state, so
+    showing it again is a `pack` instead of a rebuild. The cache is bounded
+    by panel count and by total widget count (a stand-in for memory); the
+    panel being shown (`current`) is never evicted.
+
+    Panels can also be built ahead of time (started=False) so their first
+    mount only has to call start(). Such a speculative panel only displaces
+    other unstarted panels; if the cache is full of started ones (games in
+    progress) it is dropped itself. `on_evict(game_id, entry)` hears about
+    every eviction.
+    """
+
+    def __init__(self, max_panels: int = 4, max_widgets: int = 1500,
+                 on_evict: Optional[Callable[[str, CachedPanel], None]] = None):
+        self.max_panels = max(1, int(max_panels))
+        self.max_widgets = max(1, int(max_widgets))
+        self.on_evict = on_evict
+        self.panels: "OrderedDict[str, CachedPanel]" = OrderedDict()
+        self.current: Optional[str] = None
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+        self.declined = 0
+
+    def get(self, game_id: str) -> Optional[CachedPanel]:
+        entry = self.panels.get(game_id)
+        if entry is None:
+            return None
+        self.panels.move_to_end(game_id)
+        self.hits += 1
+        return entry
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self.panels
+
+    def put(self, game_id: str, game, frame, started: bool = True) -> Optional[CachedPanel]:
+        """Caches a panel; returns None when an unstarted one found no room and was dropped."""
+        self.drop(game_id)
+        try:
+            n = widget_count(frame)
+        except Exception:
+            n = 1
+        entry = self.panels[game_id] = CachedPanel(game, frame, n, started)
+        self.builds += 1
+        if not self._evict(keep=game_id):
+            self.drop(game_id)
+            self.declined += 1
+            return None
+        return entry
+
+    def drop(self, game_id: str) -> None:
+        entry = self.panels.pop(game_id, None)
+        if entry is None:
+            return
+        try:
+            entry.game.stop()
+        except Exception:
+            pass
+        try:
+            entry.frame.destroy()
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        for game_id in list(self.panels):
+            self.drop(game_id)
+
+    def _evict(self, keep: str) -> bool:
+        """Evicts until within bounds; False if `keep` is unstarted and only started panels could go."""
+        speculative = not self.panels[keep].started
+        while (
+            len(self.panels) > self.max_panels
+            or sum(p.widgets for p in self.panels.values()) > self.max_widgets
+        ):
+            victim = next(
+                (k for k, p in self.panels.items()
+                 if k != keep and k != self.current and not (speculative and p.started)),
+                None,
+            )
+            if victim is None:
+                return not speculative
+            entry = self.panels[victim]
+            self.drop(victim)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(victim, entry)
+        return True
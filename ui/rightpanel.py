@@ -9,12 +9,18 @@ class RightPanel:
         self.game_panel = ttk.Frame(self.panel, style="App.TFrame")
         self.game_panel.pack(fill="both", expand=True, padx=10, pady=10)
 
+        self.placeholder = ttk.Label(self.game_panel, text="Right Panel: Node games appear here.", style="App.TLabel")
+
     def clear(self):
+        """Hides every game frame (cached panels stay alive) and shows the placeholder."""
         for w in self.game_panel.winfo_children():
-            w.destroy()
-        ttk.Label(self.game_panel, text="Right Panel: Node games appear here.", style="App.TLabel").pack(
-            padx=12, pady=12, anchor="nw"
-        )
+            w.pack_forget()
+        self.placeholder.pack(padx=12, pady=12, anchor="nw")
+
+    def show(self, frame):
+        self.clear()
+        self.placeholder.pack_forget()
+        frame.pack(fill="both", expand=True)
 
     def message(self, parent, text: str):
         for w in parent.winfo_children():
@@ -1,11 +1,18 @@
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import ttk
 
+from core.transcript import Transcript
+from ui.frameclock import FrameClock
+
 
 class TerminalView:
-    def __init__(self, root_unused, bg: str, fg: str):
+    def __init__(self, root_unused, bg: str, fg: str, perf=None, max_lines: int = 2000, trim_batch: int = 250, clock=None):
         self.bg = bg
         self.fg = fg
+        self.perf = perf
+        self.clock = clock
 
         self.input_var = tk.StringVar()
         self.name_var = tk.StringVar()
@@ -16,8 +23,41 @@ class TerminalView:
         self._namebar = None
         self._name_entry = None
 
-        self._typing_job = None
-        self._typing_active = False
+        # Narration: queued lines are typed on the frame clock, inserting every
+        # character due since the line started in one insert per frame. Frames
+        # are background subscriptions: typing goes on while the window is unfocused.
+        self.frame_ms = 16
+        self.gap_ms = 120
+        self._narration = deque()
+        self._line = None
+        self._line_pos = 0
+        self._line_delay = 14
+        self._line_t0 = 0.0
+        self._next_line_at = 0.0
+        self._frame_job = None
+
+        # Lines written during one burst of work are inserted together on the next idle tick.
+        self._pending = []
+        self._flush_job = None
+        self.stats = {"lines": 0, "flushes": 0, "coalesced": 0, "max_batch": 0}
+
+        # Scrollback: the widget keeps at most max_lines; older lines live in the
+        # transcript. _top is the transcript line shown on widget line 1 and
+        # _floor the first line that may be paged back in (raised by clear).
+        self.max_lines = max(1, int(max_lines))
+        self.trim_batch = max(1, int(trim_batch))
+        self.transcript = None
+        self._top = 0
+        self._floor = 0
+        self._written = 0
+
+        self.history = None
+        self._hist_seq = None
+        self._hist_draft = ""
+        self._search_var = tk.StringVar()
+        self._search_label = None
+        self._search_active = False
+        self._search_hit = None
 
     def pack_namebar(self, parent, on_set_name):
         if self._namebar is not None:
@@ -75,23 +115,133 @@ class TerminalView:
             wrap="word"
         )
         self.output.config(state="disabled")
+        if self.clock is None:
+            self.clock = FrameClock(self.output.winfo_toplevel())
 
-        sc = ttk.Scrollbar(container, command=self.output.yview)
+        sc = ttk.Scrollbar(container, command=self._on_scrollbar)
         self.output.configure(yscrollcommand=sc.set)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Prior>", "<Control-Home>"):
+            self.output.bind(seq, lambda e: self._page_in_later(), add="+")
 
         self.output.pack(side="left", fill="both", expand=True)
         sc.pack(side="right", fill="y")
 
-    def pack_input(self, parent, on_enter):
+    def pack_input(self, parent, on_enter, on_complete=None, history=None, on_skip=None, on_input=None):
+        self.history = history
+        # Esc goes through the app (on_skip) so spoken narration stops along with the typing.
+        self._on_skip = on_skip or self.skip_narration
+        # Keys handled here return "break", which also hides them from bind_all; on_input still hears them.
+        note = on_input or (lambda: None)
+
+        def handled(fn):
+            return lambda e: (note(), fn(), "break")[2]
+
+        self._search_label = ttk.Label(parent, textvariable=self._search_var)
+
         row = ttk.Frame(parent)
         row.pack(fill="x", padx=10, pady=(0, 10))
 
         ttk.Label(row, text="> ").pack(side="left")
         self.entry = ttk.Entry(row, textvariable=self.input_var)
         self.entry.pack(side="left", fill="x", expand=True)
-        self.entry.bind("<Return>", lambda e: on_enter())
+        self.entry.bind("<Return>", lambda e: self._on_return(on_enter))
+        if history is not None:
+            self.entry.bind("<Up>", handled(lambda: self._history_step(-1)))
+            self.entry.bind("<Down>", handled(lambda: self._history_step(1)))
+            self.entry.bind("<Control-r>", handled(self._search_next))
+            self.input_var.trace_add("write", lambda *_: self._search_update())
+        self.entry.bind("<Escape>", lambda e: self._on_escape())
+        if on_complete is not None:
+            # "break" keeps Tab from moving focus to the Send button.
+            self.entry.bind("<Tab>", handled(on_complete))
         ttk.Button(row, text="Send", command=on_enter).pack(side="left", padx=(8, 0))
 
+    def set_input(self, text: str):
+        self.input_var.set(text)
+        if self.entry is not None:
+            self.entry.icursor("end")
+
+    def _on_return(self, on_enter):
+        if self._search_active:
+            hit = self._search_hit
+            self._search_end()
+            if hit is not None:
+                self.set_input(hit[1])
+        self._hist_seq = None
+        on_enter()
+
+    def _history_step(self, direction: int):
+        """Up (-1) walks to older entries, Down (+1) back toward the unsent draft."""
+        h = self.history
+        if h is None or not len(h):
+            return
+        if self._search_active:
+            hit = self._search_hit
+            self._search_end()
+            if hit is not None:
+                self._hist_seq = hit[0]
+                self.set_input(hit[1])
+            return
+
+        if self._hist_seq is None:
+            if direction > 0:
+                return
+            self._hist_draft = self.input_var.get()
+            seq = h.last_seq
+        else:
+            seq = self._hist_seq + direction
+
+        if seq > h.last_seq:
+            self._hist_seq = None
+            self.set_input(self._hist_draft)
+            return
+        if seq < h.first_seq:
+            return
+        self._hist_seq = seq
+        self.set_input(h.get(seq) or "")
+
+    def _search_next(self):
+        """Ctrl+R: start reverse search, or jump to the next older match."""
+        if self.history is None:
+            return
+        if not self._search_active:
+            self._search_active = True
+            self._search_hit = None
+            if self._search_label is not None and self.entry is not None:
+                self._search_label.pack(fill="x", padx=10, before=self.entry.master)
+            self._search_update()
+            return
+        before = self._search_hit[0] if self._search_hit else None
+        hit = self.history.search(self.input_var.get(), before=before)
+        if hit is not None:
+            self._search_hit = hit
+        self._search_show()
+
+    def _search_update(self):
+        if not self._search_active:
+            return
+        self._search_hit = self.history.search(self.input_var.get())
+        self._search_show()
+
+    def _search_show(self):
+        query = self.input_var.get()
+        match = self._search_hit[1] if self._search_hit else "(no match)"
+        self._search_var.set(f"(reverse-i-search)`{query}': {match}")
+
+    def _on_escape(self):
+        """Esc leaves reverse search, otherwise finishes the narration line being typed."""
+        if self._search_active:
+            self._search_end()
+        else:
+            self._on_skip()
+
+    def _search_end(self):
+        self._search_active = False
+        self._search_hit = None
+        self._search_var.set("")
+        if self._search_label is not None:
+            self._search_label.pack_forget()
+
     def focus(self):
         if self.entry is not None:
             self.entry.focus_set()
@@ -99,62 +249,200 @@ class TerminalView:
     def write_line(self, s: str):
         if self.output is None:
             return
-        self._cancel_typing()
+        self._pending.append(s)
+        if self._flush_job is None:
+            self._flush_job = self.output.after_idle(self.flush)
+
+    def flush(self):
+        """Inserts every queued line with one widget update."""
+        self._flush_job = None
+        if self.output is None or not self._pending:
+            return
+        perf = self.perf
+        t0 = time.perf_counter() if perf is not None and perf.enabled else 0.0
+
+        # A line in progress is completed first so queued output never lands inside it.
+        self._finish_typing()
+        lines = self._pending
+        self._pending = []
+        text = "\n".join(lines) + "\n"
+        self._record(text)
         self.output.config(state="normal")
-        self.output.insert("end", s + "\n")
+        self.output.insert("end", text)
+        self._trim()
         self.output.see("end")
         self.output.config(state="disabled")
 
+        n = len(lines)
+        st = self.stats
+        st["lines"] += n
+        st["flushes"] += 1
+        st["coalesced"] += n - 1
+        if n > st["max_batch"]:
+            st["max_batch"] = n
+        if t0:
+            perf.since("ui.flush", t0)
+
     def clear(self):
         if self.output is None:
             return
         self._cancel_typing()
+        self._pending = []
+        if self._flush_job is not None:
+            try:
+                self.output.after_cancel(self._flush_job)
+            except Exception:
+                pass
+            self._flush_job = None
         self.output.config(state="normal")
         self.output.delete("1.0", "end")
         self.output.config(state="disabled")
+        self._top = self._floor = self._written
 
-    def _cancel_typing(self):
-        self._typing_active = False
-        if self._typing_job is not None and self.output is not None:
-            try:
-                self.output.after_cancel(self._typing_job)
-            except Exception:
-                pass
-        self._typing_job = None
+    # --- scrollback ---
 
-    def typewriter(self, root: tk.Misc, text: str, delay_ms: int = 14, newline: bool = True):
-        """
-        Writes text character-by-character reliably.
-        - Enables the Text widget once for the whole animation.
-        - Cancels any previous animation to prevent interleaving.
-        """
-        if self.output is None:
+    def attach_transcript(self, path: str):
+        """Spills every line to `path` so trimmed scrollback can be paged back in."""
+        self.transcript = Transcript(path)
+        self._top = self._floor = self._written = 0
+
+    def _record(self, text: str):
+        self._written += text.count("\n")
+        if self.transcript is not None:
+            self.transcript.append(text)
+
+    def _line_count(self) -> int:
+        return int(self.output.index("end-1c").split(".")[0]) - 1
+
+    def _trim(self):
+        """Drops whole batches from the top once the widget passes max_lines."""
+        excess = self._line_count() - self.max_lines
+        if excess <= 0:
             return
+        n = -(-excess // self.trim_batch) * self.trim_batch
+        self.output.delete("1.0", f"{n + 1}.0")
+        self._top += n
 
-        self._cancel_typing()
-        self._typing_active = True
+    def _on_scrollbar(self, *args):
+        self.output.yview(*args)
+        self._page_in_later()
 
+    def _page_in_later(self):
+        if self.output is not None and self._top > self._floor and self.transcript is not None:
+            self.output.after_idle(self._page_in)
+
+    def _page_in(self):
+        """Loads one batch of older lines from the transcript when the view is at the very top."""
+        if self.output is None or self.transcript is None or self._top <= self._floor:
+            return
+        if self.output.yview()[0] > 0.0:
+            return
+        start = max(self._floor, self._top - self.trim_batch)
+        text = self.transcript.read(start, self._top)
+        if not text:
+            return
+        n = self._top - start
         self.output.config(state="normal")
+        self.output.insert("1.0", text)
+        self.output.config(state="disabled")
+        self._top = start
+        # Keep the line the user was reading at the top; the older page sits just above it.
+        self.output.yview(f"{n + 1}.0")
 
-        i = 0
+    # --- narration ---
 
-        def step():
-            nonlocal i
-            if not self._typing_active or self.output is None:
-                return
+    def typewriter(self, root: tk.Misc, text: str, delay_ms: int = 14, newline: bool = True):
+        """Older entry point; queues the text like any narration line."""
+        self.narrate(text, delay_ms=delay_ms, newline=newline)
 
-            if i >= len(text):
-                if newline:
-                    self.output.insert("end", "\n")
-                self.output.see("end")
-                self.output.config(state="disabled")
-                self._typing_job = None
-                self._typing_active = False
-                return
+    def narrate(self, text: str, delay_ms: int = 14, newline: bool = True) -> int:
+        """
+        Queues a line to be typed out after any narration already queued.
+        Returns the estimated ms until it has fully appeared.
+        """
+        if self.output is None:
+            return 0
+        self._narration.append((text + ("\n" if newline else ""), max(1, int(delay_ms))))
+        if self._frame_job is None:
+            self._frame_job = self.clock.once(0, self._frame, background=True)
+        return self.narration_eta_ms()
+
+    def narration_eta_ms(self) -> int:
+        ms = 0.0
+        if self._line is not None:
+            ms += (len(self._line) - self._line_pos) * self._line_delay
+        for text, delay in self._narration:
+            ms += len(text) * delay + self.gap_ms
+        return int(ms)
+
+    def skip_narration(self, all_lines: bool = False) -> int:
+        """Completes the line being typed; with all_lines, the whole queue too. Returns lines finished."""
+        if self.output is None:
+            return 0
+        done = 1 if self._line is not None else 0
+        self._finish_typing()
+        if all_lines and self._narration:
+            self.flush()
+            text = "".join(t for t, _ in self._narration)
+            done += len(self._narration)
+            self._narration.clear()
+            self._record(text)
+            self._insert_typed(text)
+        # The next queued line starts right away rather than after the usual gap.
+        self._next_line_at = 0.0
+        if self._narration:
+            self.clock.cancel(self._frame_job)
+            self._frame_job = self.clock.once(0, self._frame, background=True)
+        return done
+
+    def _frame(self):
+        self._frame_job = None
+        if self.output is None:
+            return
+        now = time.monotonic()
+        if self._line is None and self._narration and now >= self._next_line_at:
+            # Lines printed before this one started go first.
+            self.flush()
+            self._line, self._line_delay = self._narration.popleft()
+            self._line_pos = 0
+            self._line_t0 = now
+            self._record(self._line)
+
+        if self._line is not None:
+            due = min(len(self._line), int((now - self._line_t0) * 1000.0 / self._line_delay) + 1)
+            if due > self._line_pos:
+                self._insert_typed(self._line[self._line_pos:due])
+                self._line_pos = due
+            if self._line_pos >= len(self._line):
+                self._line = None
+                self._next_line_at = now + self.gap_ms / 1000.0
+
+        if self._line is not None:
+            self._frame_job = self.clock.once(self.frame_ms, self._frame, background=True)
+        elif self._narration:
+            wait_ms = (self._next_line_at - time.monotonic()) * 1000.0
+            self._frame_job = self.clock.once(max(self.frame_ms, wait_ms), self._frame, background=True)
+
+    def _insert_typed(self, text: str):
+        self.output.config(state="normal")
+        self.output.insert("end", text)
+        self.output.see("end")
+        self.output.config(state="disabled")
 
-            self.output.insert("end", text[i])
-            self.output.see("end")
-            i += 1
-            self._typing_job = root.after(delay_ms, step)
+    def _finish_typing(self):
+        """Writes the rest of the line being typed at once instead of dropping it."""
+        if self._line is None:
+            return
+        rest = self._line[self._line_pos:]
+        self._line = None
+        self._next_line_at = time.monotonic() + self.gap_ms / 1000.0
+        if rest:
+            self._insert_typed(rest)
 
-        step()
+    def _cancel_typing(self):
+        """Drops the current line and everything queued (used by clear)."""
+        self._line = None
+        self._narration.clear()
+        if self._frame_job is not None:
+            self.clock.cancel(self._frame_job)
+        self._frame_job = None